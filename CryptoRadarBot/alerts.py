@@ -0,0 +1,338 @@
+"""
+Fiyat alarmları
+Price alert engine with per-coin sorted thresholds and SQLite persistence
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from config import ALERT_DB_PATH, ALERTS_PER_USER
+from utils import format_price
+
+logger = logging.getLogger(__name__)
+
+ABOVE = 'above'
+BELOW = 'below'
+
+_ALERT_QUERY = re.compile(r'^\s*(.+?)\s*(>=|<=|>|<)\s*([\d.,]+)\s*\$?\s*$')
+
+# Bu hatalarda (sohbet yok, bot engellendi) bildirimi tekrar denemek anlamsız, alarm silinir
+_PERMANENT_SEND_ERRORS = frozenset({400, 403})
+
+class Alert(NamedTuple):
+    """Tek bir fiyat alarmı"""
+    alert_id: int
+    user_id: int
+    chat_id: int
+    coin_id: str
+    direction: str  # ABOVE veya BELOW
+    threshold: float
+    created_at: float
+
+class CoinAlertBook:
+    """Bir coinin alarmlarını eşik değerine göre sıralı tutar.
+    İki listede de ilk tetiklenecek alarmlar sondadır; tetiklenenler listenin kuyruğundan kesilir"""
+
+    def __init__(self):
+        self.above: List[Tuple[float, int]] = []  # (-eşik, id), fiyat >= eşik olunca tetiklenir
+        self.below: List[Tuple[float, int]] = []  # (eşik, id), fiyat <= eşik olunca tetiklenir
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+    @staticmethod
+    def _entry(alert: Alert) -> Tuple[float, int]:
+        """Alarmın listedeki anahtarı; yukarı alarmlar azalan eşik sırası için eksi işaretle tutulur"""
+        threshold = -alert.threshold if alert.direction == ABOVE else alert.threshold
+        return threshold, alert.alert_id
+
+    def add(self, alert: Alert) -> None:
+        """Alarmı doğru listeye sıralı ekler"""
+        entries = self.above if alert.direction == ABOVE else self.below
+        insort(entries, self._entry(alert))
+
+    def remove(self, alert: Alert) -> None:
+        """Alarmı listeden çıkarır"""
+        entries = self.above if alert.direction == ABOVE else self.below
+        entry = self._entry(alert)
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def pop_triggered(self, price: float) -> List[int]:
+        """Fiyatın geçtiği eşiklerdeki alarmları çıkarıp id'lerini döndürür - O(log n + k)"""
+        triggered = []
+
+        position = bisect_left(self.above, (-price, float('-inf')))
+        if position < len(self.above):
+            triggered.extend(alert_id for _, alert_id in self.above[position:])
+            del self.above[position:]
+
+        position = bisect_left(self.below, (price, float('-inf')))
+        if position < len(self.below):
+            triggered.extend(alert_id for _, alert_id in self.below[position:])
+            del self.below[position:]
+
+        return triggered
+
+class AlertStore:
+    """Alarmları yerel SQLite veritabanında saklar"""
+
+    def __init__(self, path: str = ALERT_DB_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                coin_id TEXT NOT NULL,
+                direction TEXT NOT NULL,
+                threshold REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load_all(self) -> List[Alert]:
+        """Tüm alarmları okur"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, user_id, chat_id, coin_id, direction, threshold, created_at FROM alerts"
+            ).fetchall()
+        return [Alert(*row) for row in rows]
+
+    def insert(self, user_id: int, chat_id: int, coin_id: str, direction: str,
+               threshold: float, created_at: float) -> int:
+        """Alarmı ekler ve id'sini döndürür"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO alerts (user_id, chat_id, coin_id, direction, threshold, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, chat_id, coin_id, direction, threshold, created_at)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def delete(self, alert_ids: List[int]) -> None:
+        """Alarmları toplu siler"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM alerts WHERE id = ?", [(alert_id,) for alert_id in alert_ids])
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Veritabanı bağlantısını kapatır"""
+        with self._lock:
+            self._conn.close()
+
+class AlertEngine:
+    """Alarmları coin bazında indeksler ve fiyat güncellemelerinde tetiklenenleri bildirir"""
+
+    def __init__(self, store: AlertStore):
+        self.store = store
+        self.alerts: Dict[int, Alert] = {}
+        self.books: Dict[str, CoinAlertBook] = {}
+        self.by_user: Dict[int, Set[int]] = {}
+        self._keys: Dict[Tuple[int, str, str, float], int] = {}  # tekrar eden alarmları önlemek için
+        self._notify: Optional[Callable[[int, str], Awaitable]] = None
+        self.owns: Optional[Callable[[int], bool]] = None  # shard işçisinde yalnızca kendi sohbetleri yüklenir
+        self._dispatches: Set[asyncio.Task] = set()  # olay döngüsü görevleri zayıf tutar
+
+    def set_notifier(self, notify: Callable[[int, str], Awaitable]) -> None:
+        """Bildirim gönderecek fonksiyonu (chat_id, metin) ayarlar"""
+        self._notify = notify
+
+    async def load(self) -> None:
+        """Kayıtlı alarmları veritabanından yükler"""
+        for alert in await asyncio.to_thread(self.store.load_all):
+            if self.owns is None or self.owns(alert.chat_id):
+                self._index(alert)
+        logger.info(f"Loaded {len(self.alerts)} price alerts")
+
+    def _index(self, alert: Alert) -> None:
+        """Alarmı bellek içi yapılara ekler"""
+        self.alerts[alert.alert_id] = alert
+        self.books.setdefault(alert.coin_id, CoinAlertBook()).add(alert)
+        self.by_user.setdefault(alert.user_id, set()).add(alert.alert_id)
+        self._keys[(alert.user_id, alert.coin_id, alert.direction, alert.threshold)] = alert.alert_id
+
+    def _unindex(self, alert: Alert, remove_from_book: bool = True) -> None:
+        """Alarmı bellek içi yapılardan çıkarır"""
+        self.alerts.pop(alert.alert_id, None)
+        self._keys.pop((alert.user_id, alert.coin_id, alert.direction, alert.threshold), None)
+
+        user_alerts = self.by_user.get(alert.user_id)
+        if user_alerts is not None:
+            user_alerts.discard(alert.alert_id)
+            if not user_alerts:
+                del self.by_user[alert.user_id]
+
+        book = self.books.get(alert.coin_id)
+        if book is not None:
+            if remove_from_book:
+                book.remove(alert)
+            if not len(book):
+                del self.books[alert.coin_id]
+
+    def list_for_user(self, user_id: int) -> List[Alert]:
+        """Kullanıcının alarmlarını id sırasıyla döndürür"""
+        return sorted((self.alerts[alert_id] for alert_id in self.by_user.get(user_id, ())),
+                      key=lambda alert: alert.alert_id)
+
+    async def add(self, user_id: int, chat_id: int, coin_id: str,
+                  direction: str, threshold: float) -> Optional[Alert]:
+        """Yeni alarm ekler; aynısı varsa mevcut alarmı, limit aşıldıysa None döndürür"""
+        existing = self._keys.get((user_id, coin_id, direction, threshold))
+        if existing is not None:
+            return self.alerts[existing]
+
+        if len(self.by_user.get(user_id, ())) >= ALERTS_PER_USER:
+            return None
+
+        created_at = time.time()
+        alert_id = await asyncio.to_thread(
+            self.store.insert, user_id, chat_id, coin_id, direction, threshold, created_at
+        )
+        alert = Alert(alert_id, user_id, chat_id, coin_id, direction, threshold, created_at)
+        self._index(alert)
+        return alert
+
+    async def remove(self, user_id: int, alert_id: int) -> bool:
+        """Kullanıcının alarmını siler"""
+        alert = self.alerts.get(alert_id)
+        if alert is None or alert.user_id != user_id:
+            return False
+
+        self._unindex(alert)
+        await asyncio.to_thread(self.store.delete, [alert_id])
+        return True
+
+    def evaluate(self, prices: Dict[str, float]) -> List[Alert]:
+        """Verilen fiyatlarla tetiklenen alarmları çıkarır ve döndürür"""
+        triggered = []
+
+        for coin_id, price in prices.items():
+            book = self.books.get(coin_id)
+            if book is None:
+                continue
+
+            for alert_id in book.pop_triggered(price):
+                alert = self.alerts[alert_id]
+                self._unindex(alert, remove_from_book=False)
+                triggered.append(alert)
+
+        return triggered
+
+    def on_snapshot(self, snapshot) -> None:
+        """Piyasa anlık görüntüsü yenilendiğinde yalnızca alarmı olan coinleri değerlendirir"""
+        prices = {}
+        for coin_id in self.books:
+            price = snapshot.get_price(coin_id)
+            if price:
+                prices[coin_id] = price['usd']
+
+        triggered = self.evaluate(prices)
+        if triggered:
+            task = asyncio.create_task(self._dispatch(triggered, prices))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, triggered: List[Alert], prices: Dict[str, float]) -> None:
+        """Her sohbete tek mesaj gönderir; bildirilen alarmları siler, gönderilemeyenleri geri koyar"""
+        by_chat: Dict[int, List[Alert]] = {}
+        for alert in triggered:
+            by_chat.setdefault(alert.chat_id, []).append(alert)
+
+        logger.info(f"{len(triggered)} alerts triggered for {len(by_chat)} chats")
+
+        done = list(triggered)
+        if self._notify is not None:
+            results = await asyncio.gather(
+                *(self._send(chat_id, alerts, prices) for chat_id, alerts in by_chat.items())
+            )
+            done = []
+            for alerts, sent in zip(by_chat.values(), results):
+                if sent:
+                    done.extend(alerts)
+                else:
+                    # Koşul sürüyorsa bir sonraki anlık görüntüde yeniden tetiklenir
+                    done.extend(alert for alert in alerts if not self._restore(alert))
+
+        # Silme bildirimden sonra: gönderim başarısızsa alarm kaybolmaz
+        if done:
+            try:
+                await asyncio.to_thread(self.store.delete, [alert.alert_id for alert in done])
+            except Exception as e:
+                logger.error(f"Could not delete triggered alerts: {e}")
+
+    async def _send(self, chat_id: int, alerts: List[Alert], prices: Dict[str, float]) -> bool:
+        """Bildirimi gönderir; alarmlar silinebilecekse True, yeniden denenmeliyse False"""
+        try:
+            result = await self._notify(chat_id, create_alert_message(alerts, prices))
+        except Exception as e:
+            logger.error(f"Could not send alert notification to chat {chat_id}: {e}")
+            return False
+
+        if isinstance(result, dict) and not result.get('ok', True):
+            error_code = result.get('error_code')
+            if error_code in _PERMANENT_SEND_ERRORS:
+                logger.warning(f"Dropping {len(alerts)} alerts for chat {chat_id}: {result.get('description')}")
+                return True
+            logger.error(f"Could not send alert notification to chat {chat_id}: {error_code}")
+            return False
+        return True
+
+    def _restore(self, alert: Alert) -> bool:
+        """Bildirilemeyen alarmı indekse geri koyar; bu arada aynısı yeniden kurulduysa False"""
+        if (alert.user_id, alert.coin_id, alert.direction, alert.threshold) in self._keys:
+            return False
+        self._index(alert)
+        return True
+
+def is_triggered(direction: str, threshold: float, price: float) -> bool:
+    """Fiyat alarm koşulunu sağlıyor mu (CoinAlertBook.pop_triggered ile aynı sınırlar)"""
+    return price >= threshold if direction == ABOVE else price <= threshold
+
+def parse_alert_query(text: str) -> Optional[Tuple[str, str, float]]:
+    """'btc > 70000' biçimindeki girdiyi (coin sorgusu, yön, eşik) olarak ayrıştırır"""
+    match = _ALERT_QUERY.match(text)
+    if not match:
+        return None
+
+    coin_query, operator, raw_threshold = match.groups()
+    raw_threshold = raw_threshold.replace(',', '')
+    try:
+        threshold = float(raw_threshold)
+    except ValueError:
+        return None
+
+    if threshold <= 0:
+        return None
+
+    direction = ABOVE if operator.startswith('>') else BELOW
+    return coin_query.lower(), direction, threshold
+
+def describe_alert(alert: Alert) -> str:
+    """Alarmı tek satırlık metin olarak döndürür"""
+    sign = '>' if alert.direction == ABOVE else '<'
+    return f"#{alert.alert_id} {alert.coin_id.upper()} {sign} {format_price(alert.threshold, 'USD')}"
+
+def create_alert_message(alerts: List[Alert], prices: Dict[str, float]) -> str:
+    """Tetiklenen alarmlar için bildirim mesajı oluşturur"""
+    lines = ["🔔 **Fiyat Alarmı**", ""]
+    for alert in alerts:
+        action = "üzerine çıktı" if alert.direction == ABOVE else "altına düştü"
+        lines.append(
+            f"• **{alert.coin_id.upper()}** {format_price(alert.threshold, 'USD')} {action} "
+            f"(şu an {format_price(prices[alert.coin_id], 'USD')})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,32 @@
+"""
+Karşılaştırmalı ölçüm yardımcıları
+Shared setup and timing helpers for the before/after benchmark scripts
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+from typing import Callable
+
+# config.py içe aktarılırken token zorunludur; ölçümler gerçek veri dizinine dokunmaz
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench:TOKEN")
+os.environ.setdefault("CRYPTO_RADAR_DATA_DIR", tempfile.mkdtemp(prefix="crypto_radar_bench_"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def best_of(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Tek çağrının en iyi süresini saniye olarak döndürür"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def _format(seconds: float) -> str:
+    """Süreyi okunabilir birimle yazar"""
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f} us"
+    return f"{seconds * 1e9:.0f} ns"
+
+def report(name: str, before: float, after: float) -> None:
+    """Önce/sonra sürelerini ve hızlanmayı yazdırır"""
+    print(f"{name:<44} before {_format(before):>10}   after {_format(after):>10}   x{before / after:.1f}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Girdi kalıpları ölçümü
+Per-call re.sub/re.match with pattern strings and double cleaning (before) vs precompiled patterns (after)
+
+Eski kalıp ([^\\w\\s-.]) her çağrıda re.error veriyordu; "önce" tarafı düzeltilmiş kalıbı
+eski yapıyla (derlenmemiş, doğrulamada ikinci kez temizleme) çalıştırır.
+
+Örnek:
+    python benchmarks/bench_input_regex.py --number 100000
+"""
+
+import argparse
+import re
+
+import _bench
+
+from config import CRYPTO_ALIASES
+from utils import clean_user_input, is_valid_crypto_query
+
+MESSAGES = ['btc', 'Ethereum!', 'solana?', 'selam nasılsın', 'pepe-coin', '  DOGE  ', '/fiyat xrp', '12abc']
+
+def legacy_clean(text: str) -> str:
+    """Eski clean_user_input (kalıp düzeltilmiş)"""
+    cleaned = re.sub(r'[^\w\s.-]', '', text)
+    return cleaned.strip().lower()
+
+def legacy_is_valid(text: str) -> bool:
+    """Eski is_valid_crypto_query: girdiyi yeniden temizler, kalıbı her çağrıda çözer"""
+    cleaned = legacy_clean(text)
+    if len(cleaned) < 2:
+        return False
+    if cleaned in CRYPTO_ALIASES:
+        return True
+    return bool(re.match(r'^[a-zA-Z][a-zA-Z0-9\-]*$', cleaned))
+
+def before():
+    return [legacy_is_valid(legacy_clean(text)) for text in MESSAGES]
+
+def after():
+    return [is_valid_crypto_query(clean_user_input(text)) for text in MESSAGES]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    assert before() == after()
+    number = args.number // len(MESSAGES)
+    _bench.report(
+        f"clean + validate ({len(MESSAGES)} messages)",
+        _bench.best_of(before, number) / len(MESSAGES),
+        _bench.best_of(after, number) / len(MESSAGES)
+    )
+    _bench.report(
+        "clean only",
+        _bench.best_of(lambda: [legacy_clean(text) for text in MESSAGES], number) / len(MESSAGES),
+        _bench.best_of(lambda: [clean_user_input(text) for text in MESSAGES], number) / len(MESSAGES)
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Hazır mesaj önbelleği ölçümü
+Rendering each reply (before) vs the per-generation render cache (after)
+
+Örnek:
+    python benchmarks/bench_render_cache.py --number 20000
+"""
+
+import argparse
+import time
+
+import _bench
+
+import utils
+from bench_snapshot import synthetic_markets
+from market_snapshot import MarketSnapshot
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Anlık görüntüden gelen satırlar aynı veri kuşağını (last_updated_at) taşır
+    snapshot = MarketSnapshot.from_markets(synthetic_markets(500), 34.2, time.time(), 1)
+    price = snapshot.get_price('coin-1')
+    top10 = snapshot.rows(snapshot.top_k('market_cap', 10))
+    gainers = snapshot.rows(snapshot.top_k('change_1h', 5))
+    title = "🚀 **Son 1 Saatte En Çok Yükselenler**"
+
+    cases = (
+        ("price reply",
+         lambda: utils._render_price_message(price, 'coin-1'),
+         lambda: utils.create_price_message(price, 'coin-1', 'coin-1')),
+        ("top 10 reply",
+         lambda: utils._render_top_coins_message(top10),
+         lambda: utils.create_top_coins_message(top10)),
+        ("top 5 gainers reply",
+         lambda: utils._render_movers_message(gainers, title, '1h'),
+         lambda: utils.create_movers_message(gainers, title, '1h'))
+    )
+    for name, render, cached in cases:
+        assert render() == cached()
+        _bench.report(name, _bench.best_of(render, args.number), _bench.best_of(cached, args.number))
+    print(f"render cache: {utils.get_render_cache_stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Eski bot yönlendirici ölçümü
+startswith if/elif chain (before) vs the command -> handler table in SimpleCryptoBot.handle_message (after)
+
+Ağ çağrıları (send_message, get_crypto_price, get_top_gainers) sabit yanıt döndüren
+taslaklarla değiştirilir; ölçülen şey yalnızca yönlendirme ve yanıt biçimlendirmedir.
+"Önce" tarafı eski zinciri aynı biçimlendiricilerle çalıştırır, fark dağıtımdan gelir.
+
+Örnek:
+    python benchmarks/bench_router.py --number 200
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import _bench
+
+# bot.py depo kökündedir
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bot import HELP_TEXT, WELCOME_TEXT, SimpleCryptoBot, format_gainers, format_price_details
+
+MESSAGES = [
+    '/start', '/help', '/btc', '/eth', '/yukselenler', '/topgainers',
+    '/fiyat btc', '/fiyat ethereum', 'bitcoin', 'eth', 'selam', '/bilinmeyen'
+]
+
+BATCH = 120  # bir olay döngüsü turunda yönlendirilen mesaj; run_until_complete maliyeti paylaştırılır
+
+PRICE = {'usd': 67000.0, 'try': 2180000.0, 'usd_24h_change': 1.5}
+GAINERS = [
+    {'symbol': f'c{i}', 'current_price': 1.0 + i, 'price_change_percentage_1h_in_currency': 10.0 - i}
+    for i in range(5)
+]
+
+class StubbedNetwork:
+    """Ağ yerine sabit veri döndürür, gönderilen mesajları biriktirir"""
+
+    async def send_message(self, chat_id, text):
+        self.sent.append(text)
+
+    async def get_crypto_price(self, coin_id):
+        return PRICE
+
+    async def get_top_gainers(self):
+        return GAINERS
+
+class RouterBot(StubbedNetwork, SimpleCryptoBot):
+    """Güncel tablo tabanlı yönlendirici"""
+
+    def __init__(self):
+        super().__init__('bench:TOKEN')
+        self.sent = []
+
+class LegacyRouterBot(RouterBot):
+    """Eski startswith zinciri"""
+
+    async def handle_message(self, message):
+        chat_id = message['chat']['id']
+        text = message.get('text', '').strip().lower()
+
+        try:
+            if text.startswith('/start'):
+                await self.send_message(chat_id, WELCOME_TEXT)
+            elif text.startswith('/help'):
+                await self.send_message(chat_id, HELP_TEXT)
+            elif text.startswith('/btc'):
+                price_data = await self.get_crypto_price('bitcoin')
+                await self.send_message(chat_id, format_price_details("Bitcoin (BTC)", price_data))
+            elif text.startswith('/eth'):
+                price_data = await self.get_crypto_price('ethereum')
+                await self.send_message(chat_id, format_price_details("Ethereum (ETH)", price_data))
+            elif text.startswith('/yukselenler'):
+                gainers = await self.get_top_gainers()
+                await self.send_message(chat_id, format_gainers(gainers, "🚀 **Son 1 Saatte En Çok Yükselen 5 Coin:**"))
+            elif text.startswith('/topgainers'):
+                gainers = await self.get_top_gainers()
+                await self.send_message(chat_id, format_gainers(
+                    gainers, "🚀 **Top 5 Gaining Coins in Last Hour:**", english=True
+                ))
+            elif text.startswith('/fiyat '):
+                coin_name = text.replace('/fiyat ', '').strip()
+                coin_map = {
+                    'bitcoin': 'bitcoin', 'btc': 'bitcoin',
+                    'ethereum': 'ethereum', 'eth': 'ethereum',
+                    'binance': 'binancecoin', 'bnb': 'binancecoin'
+                }
+                price_data = await self.get_crypto_price(coin_map.get(coin_name, coin_name))
+                await self.send_message(chat_id, format_price_details(coin_name.upper(), price_data))
+            else:
+                coin_map = {
+                    'bitcoin': 'bitcoin', 'btc': 'bitcoin',
+                    'ethereum': 'ethereum', 'eth': 'ethereum'
+                }
+                if text in coin_map:
+                    price_data = await self.get_crypto_price(coin_map[text])
+                    usd_price = price_data.get('usd', 0)
+                    change_24h = price_data.get('usd_24h_change', 0)
+                    await self.send_message(
+                        chat_id,
+                        f"💰 **{text.upper()} Fiyat:** ${usd_price:,.2f}\n📊 **24s Değişim:** %{change_24h:.2f}"
+                    )
+        except Exception:
+            await self.send_message(chat_id, "⚠️ Bir hata oluştu, lütfen daha sonra tekrar deneyin.")
+
+def _messages(texts):
+    return [{'chat': {'id': 1}, 'text': text} for text in texts]
+
+async def _route(bot, messages) -> None:
+    for message in messages:
+        await bot.handle_message(message)
+
+def _per_message(loop, bots, texts, number: int):
+    """Her yönlendiricinin mesaj başına en iyi süresi"""
+    messages = _messages(texts * (BATCH // len(texts)))
+    timings = []
+    for bot in bots:
+        bot.sent = []
+        timings.append(_bench.best_of(lambda: loop.run_until_complete(_route(bot, messages)), number) / len(messages))
+    return timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    bots = (LegacyRouterBot(), RouterBot())
+
+    # İki yönlendirici aynı yanıtları vermeli
+    for bot in bots:
+        loop.run_until_complete(_route(bot, _messages(MESSAGES)))
+    assert bots[0].sent == bots[1].sent, (bots[0].sent, bots[1].sent)
+
+    before, after = _per_message(loop, bots, MESSAGES, args.number)
+    _bench.report(f"{len(MESSAGES)}-message mix", before, after)
+    print(f"{'':<44} {1 / before:,.0f} -> {1 / after:,.0f} msg/s")
+    for text in ('/start', '/fiyat btc', 'selam', '/bilinmeyen'):
+        _bench.report(f"  {text}", *_per_message(loop, bots, [text], args.number))
+    loop.close()
+
+if __name__ == '__main__':
+    main()
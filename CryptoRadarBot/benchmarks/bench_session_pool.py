@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Bağlantı havuzu ölçümü
+Per-command ClientSession (before) vs the shared pooled CryptoAPI session (after)
+
+Yerel HTTP sunucusuna karşı ölçer; gerçek CoinGecko'da her yeni oturuma
+DNS ve TLS el sıkışması da eklenir, fark burada görünenden büyüktür.
+
+Örnek:
+    python benchmarks/bench_session_pool.py --requests 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+
+import _bench
+from aiohttp import web
+
+import crypto_api
+from crypto_api import CryptoAPI, get_crypto_api, close_crypto_api
+from rate_limiter import TokenBucket
+
+class Upstream:
+    """Yanıtları ve açılan bağlantıları sayan yerel CoinGecko taklidi"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info('peername'))
+        return web.json_response({'bitcoin': {'usd': 1.0, 'try': 30.0}})
+
+async def _timed(call, requests: int, concurrency: int) -> float:
+    """İstek başına ortalama süre; çağrılar `concurrency` genişliğinde dalgalarla yapılır"""
+    started = time.perf_counter()
+    for _ in range(requests // concurrency):
+        await asyncio.gather(*(call() for _ in range(concurrency)))
+    return (time.perf_counter() - started) / (requests // concurrency * concurrency)
+
+async def run(requests: int, concurrency: int) -> None:
+    upstream = Upstream()
+    app = web.Application()
+    app.router.add_get('/api/v3/{endpoint:.+}', upstream.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    # Ölçülen şey oturum maliyeti; kota beklemesi devre dışı
+    crypto_api.share_rate_limit(TokenBucket(1e9, 1e9))
+    base_url = f'http://127.0.0.1:{port}/api/v3'
+    params = {'ids': 'bitcoin', 'vs_currencies': 'usd,try'}
+
+    async def unpooled():
+        # Eski handler davranışı: her komut kendi oturumunu açıp kapatır
+        async with CryptoAPI() as api:
+            api.base_url = base_url
+            return await api._fetch('simple/price', params)
+
+    shared = await get_crypto_api()
+    shared.base_url = base_url
+
+    async def pooled():
+        return await shared._fetch('simple/price', params)
+
+    try:
+        for label, width in (('sequential', 1), (f'{concurrency} concurrent', concurrency)):
+            await _timed(unpooled, width, width)  # ısınma
+            upstream.connections.clear()
+            before = await _timed(unpooled, requests, width)
+            before_connections = len(upstream.connections)
+
+            await _timed(pooled, width, width)
+            upstream.connections.clear()
+            after = await _timed(pooled, requests, width)
+            after_connections = len(upstream.connections)
+
+            _bench.report(f"simple/price, {label}", before, after)
+            print(f"{'':<44} connections {before_connections} -> {after_connections}")
+    finally:
+        await close_crypto_api()
+        await runner.cleanup()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Anlık görüntü sıralama ölçümü
+List-of-dicts scans (before) vs NumPy column snapshot with argpartition top-k (after)
+
+Örnek:
+    python benchmarks/bench_snapshot.py --coins 10000
+"""
+
+import argparse
+import random
+
+import _bench
+
+from market_snapshot import MarketSnapshot
+
+def synthetic_markets(count: int, seed: int = 7):
+    """coins/markets biçiminde rastgele satırlar (bazı alanlar eksik)"""
+    rng = random.Random(seed)
+    maybe = lambda value: None if rng.random() < 0.02 else value
+    return [
+        {
+            'id': f'coin-{i}',
+            'symbol': f'c{i}',
+            'name': f'Coin {i}',
+            'current_price': rng.uniform(0.0001, 50000),
+            'market_cap': rng.uniform(1e5, 1e12),
+            'market_cap_rank': i + 1,
+            'total_volume': rng.uniform(0, 1e10),
+            'price_change_percentage_1h_in_currency': maybe(rng.uniform(-10, 10)),
+            'price_change_percentage_24h_in_currency': maybe(rng.uniform(-30, 30)),
+            'price_change_percentage_7d_in_currency': maybe(rng.uniform(-60, 60))
+        }
+        for i in range(count)
+    ]
+
+def list_top_gainers(coins, window: str, limit: int, min_volume: float):
+    """Eski yöntem: tüm listeyi süzüp sözlük anahtarıyla sıralar"""
+    change_key = f'price_change_percentage_{window}_in_currency'
+    eligible = [
+        coin for coin in coins
+        if coin.get(change_key) is not None and (coin.get('total_volume') or 0) >= min_volume
+    ]
+    return sorted(eligible, key=lambda coin: coin[change_key], reverse=True)[:limit]
+
+def list_volume_leaders(coins, limit: int):
+    """Eski yöntem: hacme göre tam sıralama"""
+    return sorted(coins, key=lambda coin: coin.get('total_volume') or 0, reverse=True)[:limit]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--coins', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    coins = synthetic_markets(args.coins)
+    snapshot = MarketSnapshot.from_markets(coins, 30.0, 0.0, 1)
+    min_volume = 1e6
+
+    # İki yöntem aynı sonucu vermeli
+    expected = [coin['id'] for coin in list_top_gainers(coins, '1h', 5, min_volume)]
+    actual = [snapshot.ids[row] for row in snapshot.top_k('change_1h', 5, min_volume=min_volume)]
+    assert expected == actual, (expected, actual)
+
+    print(f"{args.coins} coins")
+    _bench.report(
+        "top 5 gainers (1h), ids only",
+        _bench.best_of(lambda: list_top_gainers(coins, '1h', 5, min_volume), args.number),
+        _bench.best_of(lambda: snapshot.top_k('change_1h', 5, min_volume=min_volume), args.number)
+    )
+    _bench.report(
+        "top 5 gainers (1h), rendered rows",
+        _bench.best_of(lambda: list_top_gainers(coins, '1h', 5, min_volume), args.number),
+        _bench.best_of(lambda: snapshot.rows(snapshot.top_k('change_1h', 5, min_volume=min_volume)), args.number)
+    )
+    _bench.report(
+        "top 10 by volume, rendered rows",
+        _bench.best_of(lambda: list_volume_leaders(coins, 10), args.number),
+        _bench.best_of(lambda: snapshot.rows(snapshot.top_k('volume', 10)), args.number)
+    )
+
+if __name__ == '__main__':
+    main()
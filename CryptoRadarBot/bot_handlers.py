@@ -3,29 +3,80 @@ Telegram bot komut işleyicileri
 Telegram bot command handlers
 """
 
+import asyncio
 import logging
-import requests
+import time
+from typing import Awaitable, Optional, Tuple
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from crypto_api import get_crypto_api
+from coin_catalog import search_coins, get_catalog
+from coin_index import get_index
+from market_snapshot import get_snapshot
+from alerts import parse_alert_query, describe_alert, is_triggered, ABOVE
+from history import parse_period, summarize
+from metrics import timed, COMMAND_LATENCY
+from telegram.error import BadRequest
 from utils import (
     get_coin_id, 
+    match_coin_id,
     create_price_message, 
     create_top_coins_message,
+    create_movers_message,
+    create_volume_leaders_message,
+    create_history_message,
+    format_price,
+    format_percentage,
     clean_user_input,
     is_valid_crypto_query
 )
-from config import MESSAGES
+from config import MESSAGES, ALERTS_PER_USER, PROCESSING_MESSAGE_DELAY
 
 logger = logging.getLogger(__name__)
 
 class BotHandlers:
     """Telegram bot komut işleyicilerini içeren sınıf"""
     
-    def __init__(self):
-        self.processing_users = set()  # İşlem yapılan kullanıcıları takip et
+    def __init__(self, alert_engine=None, history=None, charts=None):
+        self.alert_engine = alert_engine
+        self.history = history
+        self.charts = charts
     
+    async def _respond(self, update: Update, name: str, reply: Awaitable[Tuple[str, Optional[str]]],
+                       placeholder: str = MESSAGES['processing']) -> None:
+        """
+        Yanıt PROCESSING_MESSAGE_DELAY içinde hazırsa tek mesajla gönderir; gecikirse önce
+        bekleme mesajı gönderip hazır olunca düzenler (önbellekteki yanıtlar tek API çağrısı)
+        """
+        task = asyncio.ensure_future(reply)
+        try:
+            await asyncio.wait((task,), timeout=PROCESSING_MESSAGE_DELAY)
+            
+            processing_msg = None
+            if not task.done():
+                try:
+                    processing_msg = await update.message.reply_text(placeholder)
+                except Exception as e:
+                    # Bekleme mesajı gitmezse yanıt hazır olunca yeni mesaj olarak gönderilir
+                    logger.warning(f"Could not send placeholder for {name}: {e}")
+            
+            try:
+                text, parse_mode = await task
+            except Exception as e:
+                logger.error(f"Error in {name}: {e}")
+                text, parse_mode = MESSAGES['error_api'], None
+        finally:
+            # İşleyici iptal edilirse yanıt görevi sahipsiz kalmaz
+            if not task.done():
+                task.cancel()
+        
+        if processing_msg is None:
+            await update.message.reply_text(text, parse_mode=parse_mode)
+        else:
+            await processing_msg.edit_text(text, parse_mode=parse_mode)
+    
+    @timed(COMMAND_LATENCY, 'start')
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /start komutu - Hoş geldin mesajı gönderir
@@ -41,6 +92,7 @@ class BotHandlers:
             logger.error(f"Error in start command: {e}")
             await update.message.reply_text(MESSAGES['error_api'])
     
+    @timed(COMMAND_LATENCY, 'help')
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /help komutu - Yardım mesajı gönderir
@@ -56,19 +108,14 @@ class BotHandlers:
             logger.error(f"Error in help command: {e}")
             await update.message.reply_text(MESSAGES['error_api'])
     
+    @timed(COMMAND_LATENCY, 'fiyat')
     async def price_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /fiyat <coin> komutu - Belirli kripto para fiyatını gösterir
         """
         user_id = update.effective_user.id
         
-        if user_id in self.processing_users:
-            await update.message.reply_text("⏳ Zaten bir işlem devam ediyor, lütfen bekleyin...")
-            return
-        
         try:
-            self.processing_users.add(user_id)
-            
             # Parametreleri kontrol et
             if not context.args:
                 await update.message.reply_text(
@@ -81,29 +128,21 @@ class BotHandlers:
             coin_query = ' '.join(context.args).lower()
             coin_id = get_coin_id(coin_query)
             
-            # İşlem mesajı gönder
-            processing_msg = await update.message.reply_text(MESSAGES['processing'])
-            
-            async with await get_crypto_api() as api:
+            async def reply():
+                api = await get_crypto_api()
                 coin_data = await api.get_coin_price(coin_id)
                 
                 if coin_data:
-                    message = create_price_message(coin_data, coin_query)
-                    await processing_msg.edit_text(message, parse_mode=ParseMode.MARKDOWN)
                     logger.info(f"Price command successful for {coin_query} by user {user_id}")
-                else:
-                    await processing_msg.edit_text(MESSAGES['error_not_found'])
-                    logger.warning(f"Coin not found: {coin_query} by user {user_id}")
+                    return create_price_message(coin_data, coin_query, coin_id), ParseMode.MARKDOWN
+                logger.warning(f"Coin not found: {coin_query} by user {user_id}")
+                return MESSAGES['error_not_found'], None
+            
+            await self._respond(update, "price command", reply())
         
         except Exception as e:
             logger.error(f"Error in price command: {e}")
-            try:
-                await processing_msg.edit_text(MESSAGES['error_api'])
-            except:
-                await update.message.reply_text(MESSAGES['error_api'])
-        
-        finally:
-            self.processing_users.discard(user_id)
+            await update.message.reply_text(MESSAGES['error_api'])
     
     async def btc_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
@@ -119,55 +158,37 @@ class BotHandlers:
         context.args = ['ethereum']
         await self.price_command(update, context)
     
+    @timed(COMMAND_LATENCY, 'top10')
     async def top10_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /top10 komutu - En popüler 10 kripto parayı listeler
         """
         user_id = update.effective_user.id
         
-        if user_id in self.processing_users:
-            await update.message.reply_text("⏳ Zaten bir işlem devam ediyor, lütfen bekleyin...")
-            return
-        
         try:
-            self.processing_users.add(user_id)
-            
-            # İşlem mesajı gönder
-            processing_msg = await update.message.reply_text(MESSAGES['processing'])
-            
-            async with await get_crypto_api() as api:
+            async def reply():
+                api = await get_crypto_api()
                 coins_data = await api.get_top_cryptocurrencies(10)
                 
                 if coins_data:
-                    message = create_top_coins_message(coins_data)
-                    await processing_msg.edit_text(message, parse_mode=ParseMode.MARKDOWN)
                     logger.info(f"Top10 command successful by user {user_id}")
-                else:
-                    await processing_msg.edit_text(MESSAGES['error_api'])
+                    return create_top_coins_message(coins_data), ParseMode.MARKDOWN
+                return MESSAGES['error_api'], None
+            
+            await self._respond(update, "top10 command", reply())
                     
         except Exception as e:
             logger.error(f"Error in top10 command: {e}")
-            try:
-                await processing_msg.edit_text(MESSAGES['error_api'])
-            except:
-                await update.message.reply_text(MESSAGES['error_api'])
-        
-        finally:
-            self.processing_users.discard(user_id)
+            await update.message.reply_text(MESSAGES['error_api'])
     
+    @timed(COMMAND_LATENCY, 'ara')
     async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /ara <isim> komutu - Kripto para arar
         """
         user_id = update.effective_user.id
         
-        if user_id in self.processing_users:
-            await update.message.reply_text("⏳ Zaten bir işlem devam ediyor, lütfen bekleyin...")
-            return
-        
         try:
-            self.processing_users.add(user_id)
-            
             if not context.args:
                 await update.message.reply_text(
                     "❓ Hangi kripto parayı aramak istiyorsunuz?\n"
@@ -178,93 +199,316 @@ class BotHandlers:
             
             search_query = ' '.join(context.args)
             
-            # İşlem mesajı gönder
-            processing_msg = await update.message.reply_text(MESSAGES['processing'])
-            
-            async with await get_crypto_api() as api:
-                search_results = await api.search_cryptocurrency(search_query)
-                
-                if search_results:
-                    message = "🔍 **Arama Sonuçları:**\n\n"
-                    
-                    for coin in search_results:
-                        name = coin.get('name', 'Bilinmeyen')
-                        symbol = coin.get('symbol', '').upper()
-                        message += f"• **{name} ({symbol})**\n"
-                    
-                    message += f"\n💡 Fiyat öğrenmek için: `/fiyat <coin ismi>`"
-                    
-                    await processing_msg.edit_text(message, parse_mode=ParseMode.MARKDOWN)
-                    logger.info(f"Search command successful for '{search_query}' by user {user_id}")
+            async def reply():
+                # Yerel katalogda ara, katalog henüz yüklenmediyse CoinGecko'ya sor
+                if len(get_catalog()):
+                    search_results = search_coins(search_query, 5)
                 else:
-                    await processing_msg.edit_text(
+                    api = await get_crypto_api()
+                    search_results = await api.search_cryptocurrency(search_query)
+                
+                if not search_results:
+                    return (
                         f"❌ '{search_query}' için sonuç bulunamadı.\n"
                         "Farklı bir arama terimi deneyin."
-                    )
+                    ), None
+                
+                message = "🔍 **Arama Sonuçları:**\n\n"
+                
+                for coin in search_results:
+                    name = coin.get('name', 'Bilinmeyen')
+                    symbol = coin.get('symbol', '').upper()
+                    message += f"• **{name} ({symbol})**\n"
+                
+                message += f"\n💡 Fiyat öğrenmek için: `/fiyat <coin ismi>`"
+                logger.info(f"Search command successful for '{search_query}' by user {user_id}")
+                return message, ParseMode.MARKDOWN
+            
+            await self._respond(update, "search command", reply())
                     
         except Exception as e:
             logger.error(f"Error in search command: {e}")
-            try:
-                await processing_msg.edit_text(MESSAGES['error_api'])
-            except:
-                await update.message.reply_text(MESSAGES['error_api'])
-        
-        finally:
-            self.processing_users.discard(user_id)
+            await update.message.reply_text(MESSAGES['error_api'])
     
+    @timed(COMMAND_LATENCY, 'yukselenler')
     async def top_gainers_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         /yukselenler komutu - Son 1 saatte en çok yükselen 5 kripto parayı gösterir
         """
+        await self._ranking_command(
+            update,
+            "top gainers",
+            lambda api: api.get_top_gainers('1h', 5),
+            lambda coins: create_movers_message(coins, "🚀 **Son 1 Saatte En Çok Yükselen 5 Coin:**")
+        )
+    
+    @timed(COMMAND_LATENCY, 'dusenler')
+    async def top_losers_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /dusenler komutu - Son 1 saatte en çok düşen 5 kripto parayı gösterir
+        """
+        await self._ranking_command(
+            update,
+            "top losers",
+            lambda api: api.get_top_losers('1h', 5),
+            lambda coins: create_movers_message(coins, "🔻 **Son 1 Saatte En Çok Düşen 5 Coin:**")
+        )
+    
+    @timed(COMMAND_LATENCY, 'hacim')
+    async def volume_leaders_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /hacim komutu - 24 saatlik işlem hacmi en yüksek 10 kripto parayı gösterir
+        """
+        await self._ranking_command(
+            update,
+            "volume leaders",
+            lambda api: api.get_volume_leaders(10),
+            create_volume_leaders_message
+        )
+    
+    async def _ranking_command(self, update: Update, name: str, fetch, render) -> None:
+        """
+        Sıralama listesi komutlarının ortak akışı (yükselenler, düşenler, hacim)
+        """
         user_id = update.effective_user.id
         
-        if user_id in self.processing_users:
-            await update.message.reply_text("⏳ Zaten bir işlem devam ediyor, lütfen bekleyin...")
-            return
-        
         try:
-            self.processing_users.add(user_id)
-            
-            # İşlem mesajı gönder
-            processing_msg = await update.message.reply_text(MESSAGES['processing'])
-            
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'order': 'market_cap_desc',
-                'per_page': 50,
-                'page': 1,
-                'price_change_percentage': '1h'
-            }
-
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            # En çok yükselen 5 coini sırala
-            sorted_coins = sorted(data, key=lambda x: x.get('price_change_percentage_1h_in_currency', 0), reverse=True)[:5]
+            async def reply():
+                api = await get_crypto_api()
+                coins = await fetch(api)
+                
+                if not coins:
+                    return MESSAGES['error_api'], None
+                
+                logger.info(f"{name.capitalize()} command successful by user {user_id}")
+                return render(coins), ParseMode.MARKDOWN
+            
+            await self._respond(update, f"{name} command", reply())
+                    
+        except Exception as e:
+            logger.error(f"Error in {name} command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
 
-            message = "🚀 **Son 1 Saatte En Çok Yükselen 5 Coin:**\n\n"
-            for i, coin in enumerate(sorted_coins, 1):
-                isim = coin['symbol'].upper()
-                degisim = round(coin.get('price_change_percentage_1h_in_currency', 0), 2)
-                fiyat = round(coin['current_price'], 4)
-                message += f"{i}. **{isim}**: +%{degisim} | ${fiyat}\n"
+    @timed(COMMAND_LATENCY, 'gecmis')
+    async def history_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /gecmis <coin> [dönem] komutu - Yerel geçmişten fiyat özeti gösterir (ör. /gecmis btc 7g)
+        """
+        user_id = update.effective_user.id
+        
+        try:
+            args = context.args or []
+            period = args[-1].lower() if len(args) > 1 else '7g'
+            span = parse_period(period)
+            coin_query = ' '.join(args[:-1] if len(args) > 1 else args).lower()
             
-            message += f"\n🕐 _Güncelleme: Şimdi_"
+            if self.history is None or not coin_query or span is None:
+                await update.message.reply_text(
+                    "❓ Hangi coinin geçmişini görmek istiyorsunuz?\n"
+                    "**Örnek:** `/gecmis btc 7g` (s=saat, g=gün, h=hafta, a=ay)",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            coin_id = get_coin_id(coin_query)
+            _, bars = self.history.query(coin_id, time.time() - span)
+            summary = summarize(bars)
+            
+            if summary is None:
+                await update.message.reply_text(
+                    f"📭 '{coin_query}' için henüz yeterli geçmiş veri yok.\n"
+                    "Geçmiş, piyasa değerine göre ilk coinler için bot çalıştıkça birikir."
+                )
+                return
+            
+            await update.message.reply_text(
+                create_history_message(coin_query, period, summary),
+                parse_mode=ParseMode.MARKDOWN
+            )
+            logger.info(f"History command successful for {coin_id} ({period}) by user {user_id}")
             
-            await processing_msg.edit_text(message, parse_mode=ParseMode.MARKDOWN)
-            logger.info(f"Top gainers command successful by user {user_id}")
-                    
         except Exception as e:
-            logger.error(f"Error in top gainers command: {e}")
-            try:
-                await processing_msg.edit_text(MESSAGES['error_api'])
-            except:
-                await update.message.reply_text(MESSAGES['error_api'])
+            logger.error(f"Error in history command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
+    
+    @timed(COMMAND_LATENCY, 'grafik')
+    async def chart_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /grafik <coin> [dönem] komutu - Yerel geçmişten fiyat grafiği gönderir (ör. /grafik btc 7g)
+        """
+        user_id = update.effective_user.id
         
-        finally:
-            self.processing_users.discard(user_id)
+        try:
+            args = context.args or []
+            period = args[-1].lower() if len(args) > 1 else '7g'
+            span = parse_period(period)
+            coin_query = ' '.join(args[:-1] if len(args) > 1 else args).lower()
+            
+            if self.charts is None or not coin_query or span is None:
+                await update.message.reply_text(
+                    "❓ Hangi coinin grafiğini görmek istiyorsunuz?\n"
+                    "**Örnek:** `/grafik btc 7g` (s=saat, g=gün, h=hafta, a=ay)",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            coin_id = get_coin_id(coin_query)
+            title = f"{coin_query.upper()} / USD - {period}"
+            no_data = (
+                f"📭 '{coin_query}' için henüz yeterli geçmiş veri yok.\n"
+                "Geçmiş, piyasa değerine göre ilk coinler için bot çalıştıkça birikir."
+            )
+            chart = await self.charts.get(coin_id, title, period, span)
+            
+            if chart is None:
+                await update.message.reply_text(no_data)
+                return
+            
+            caption = (
+                f"📈 {coin_query.upper()} - Son {period}: "
+                f"{format_price(chart.summary['close'], 'USD')} ({format_percentage(chart.summary['change'])})"
+            )
+            
+            # Daha önce yüklenen grafik file_id ile gönderilir, bayt aktarılmaz
+            if chart.file_id:
+                try:
+                    await update.message.reply_photo(chart.file_id, caption=caption)
+                    logger.info(f"Chart command served from file_id for {coin_id} by user {user_id}")
+                    return
+                except BadRequest:
+                    self.charts.forget_file_id(chart.key)
+                    chart = await self.charts.get(coin_id, title, period, span)
+                    # Arada geçmiş kırpılmış olabilir; yeniden çizilecek veri kalmadıysa bildir
+                    if chart is None:
+                        await update.message.reply_text(no_data)
+                        return
+            
+            message = await update.message.reply_photo(chart.png, caption=caption)
+            if message.photo:
+                self.charts.remember_file_id(chart.key, message.photo[-1].file_id)
+            logger.info(f"Chart command successful for {coin_id} ({period}) by user {user_id}")
+            
+        except Exception as e:
+            logger.error(f"Error in chart command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
+    
+    @timed(COMMAND_LATENCY, 'alarm')
+    async def alarm_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /alarm <coin> > <fiyat> komutu - Fiyat alarmı kurar
+        """
+        user_id = update.effective_user.id
+        
+        try:
+            parsed = parse_alert_query(' '.join(context.args or []))
+            if self.alert_engine is None or not parsed:
+                await update.message.reply_text(
+                    "❓ Alarm kurmak için coin, yön ve fiyat yazın.\n"
+                    "**Örnek:** `/alarm btc > 70000` veya `/alarm eth < 2500`",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            coin_query, direction, threshold = parsed
+            coin_id = get_coin_id(coin_query)
+            
+            # Alarmlar yalnızca anlık görüntüdeki coinler için değerlendirilir; o yokken katalog esas alınır
+            snapshot = get_snapshot()
+            known = coin_id in snapshot.index if snapshot is not None else coin_id in get_index()
+            if not known:
+                await update.message.reply_text(MESSAGES['error_not_found'])
+                return
+            
+            price = snapshot.get_price(coin_id) if snapshot is not None else None
+            if price is None:
+                api = await get_crypto_api()
+                price = await api.get_coin_price(coin_id)
+            if not price or not price.get('usd'):
+                await update.message.reply_text(MESSAGES['error_api'])
+                return
+            
+            # Koşulu şimdiden sağlayan alarm bir sonraki yenilemede hemen tetiklenirdi
+            if is_triggered(direction, threshold, price['usd']):
+                state = "üzerinde" if direction == ABOVE else "altında"
+                await update.message.reply_text(
+                    f"ℹ️ {coin_id.upper()} şu an {format_price(price['usd'], 'USD')}, "
+                    f"zaten {format_price(threshold, 'USD')} {state}.\n"
+                    "Alarm, fiyatın henüz ulaşmadığı bir eşik için kurulabilir.",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            alert = await self.alert_engine.add(user_id, update.effective_chat.id, coin_id, direction, threshold)
+            if alert is None:
+                await update.message.reply_text(
+                    f"⚠️ En fazla {ALERTS_PER_USER} alarm kurabilirsiniz.\n"
+                    "Silmek için: `/alarmsil <no>`",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            action = "üzerine çıkınca" if direction == ABOVE else "altına düşünce"
+            await update.message.reply_text(
+                f"🔔 Alarm kuruldu: `{describe_alert(alert)}`\n"
+                f"Fiyat eşiğin {action} haber vereceğim.",
+                parse_mode=ParseMode.MARKDOWN
+            )
+            logger.info(f"Alarm command successful for {coin_id} by user {user_id}")
+            
+        except Exception as e:
+            logger.error(f"Error in alarm command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
+    
+    @timed(COMMAND_LATENCY, 'alarmlar')
+    async def alarms_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /alarmlar komutu - Kullanıcının alarmlarını listeler
+        """
+        try:
+            alerts = self.alert_engine.list_for_user(update.effective_user.id) if self.alert_engine else []
+            if not alerts:
+                await update.message.reply_text(
+                    "📭 Kurulu alarmınız yok.\n"
+                    "**Örnek:** `/alarm btc > 70000`",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            lines = ["🔔 **Alarmlarınız:**", ""]
+            lines.extend(f"• `{describe_alert(alert)}`" for alert in alerts)
+            lines.append("")
+            lines.append("🗑 Silmek için: `/alarmsil <no>`")
+            await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.MARKDOWN)
+            
+        except Exception as e:
+            logger.error(f"Error in alarms command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
+    
+    @timed(COMMAND_LATENCY, 'alarmsil')
+    async def alarm_delete_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /alarmsil <no> komutu - Alarmı siler
+        """
+        try:
+            raw_id = (context.args or [''])[0].lstrip('#')
+            if self.alert_engine is None or not raw_id.isdigit():
+                await update.message.reply_text(
+                    "❓ Silinecek alarmın numarasını yazın.\n"
+                    "**Örnek:** `/alarmsil 12` (numaralar için /alarmlar)",
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                return
+            
+            if await self.alert_engine.remove(update.effective_user.id, int(raw_id)):
+                await update.message.reply_text(f"🗑 #{raw_id} numaralı alarm silindi.")
+            else:
+                await update.message.reply_text(f"❌ #{raw_id} numaralı alarm bulunamadı.")
+            
+        except Exception as e:
+            logger.error(f"Error in alarm delete command: {e}")
+            await update.message.reply_text(MESSAGES['error_api'])
 
+    @timed(COMMAND_LATENCY, 'metin')
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         Metin mesajlarını işler - Kripto para ismi algılarsa fiyat gösterir
@@ -272,37 +516,26 @@ class BotHandlers:
         user_id = update.effective_user.id
         text = update.message.text
         
-        if user_id in self.processing_users:
-            return
-        
         try:
             # Kullanıcı girdisini temizle
             cleaned_text = clean_user_input(text)
             
-            # Geçerli kripto para sorgusu mu kontrol et
-            if is_valid_crypto_query(cleaned_text):
-                coin_id = get_coin_id(cleaned_text)
-                
-                if coin_id:
-                    self.processing_users.add(user_id)
+            # Geçerli ve bilinen bir kripto para mı kontrol et (tahmin yalnızca /fiyat ve /ara'da)
+            coin_id = match_coin_id(cleaned_text) if is_valid_crypto_query(cleaned_text) else None
+            if coin_id:
+                async def reply():
+                    api = await get_crypto_api()
+                    coin_data = await api.get_coin_price(coin_id)
                     
-                    # İşlem mesajı gönder
-                    processing_msg = await update.message.reply_text("🔍 Fiyat bilgisi getiriliyor...")
-                    
-                    async with await get_crypto_api() as api:
-                        coin_data = await api.get_coin_price(coin_id)
-                        
-                        if coin_data:
-                            message = create_price_message(coin_data, cleaned_text)
-                            await processing_msg.edit_text(message, parse_mode=ParseMode.MARKDOWN)
-                            logger.info(f"Text handler successful for '{cleaned_text}' by user {user_id}")
-                        else:
-                            await processing_msg.edit_text(
-                                f"❌ '{text}' bulunamadı.\n"
-                                "Desteklenen kripto paralar için /help komutunu kullanın."
-                            )
-                    
-                    self.processing_users.discard(user_id)
+                    if coin_data:
+                        logger.info(f"Text handler successful for '{cleaned_text}' by user {user_id}")
+                        return create_price_message(coin_data, cleaned_text, coin_id), ParseMode.MARKDOWN
+                    return (
+                        f"❌ '{text}' bulunamadı.\n"
+                        "Desteklenen kripto paralar için /help komutunu kullanın."
+                    ), None
+                
+                await self._respond(update, "text handler", reply(), "🔍 Fiyat bilgisi getiriliyor...")
             else:
                 # Tanınmayan metin için yardım önerisi
                 if len(text.split()) == 1 and len(text) > 2:  # Tek kelime ve yeterince uzun
@@ -316,6 +549,3 @@ class BotHandlers:
             logger.error(f"Error in text handler: {e}")
             # Sessizce geç, kullanıcıyı rahatsız etme
             pass
-        
-        finally:
-            self.processing_users.discard(user_id)
@@ -0,0 +1,141 @@
+"""
+Bellek içi önbellek
+In-memory TTL cache for API responses
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+def make_cache_key(endpoint: str, params: Optional[Dict] = None) -> Tuple:
+    """Endpoint ve parametrelerden normalize edilmiş önbellek anahtarı üretir"""
+    if not params:
+        return (endpoint, ())
+
+    normalized = []
+    for key, value in params.items():
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        normalized.append((str(key), str(value).lower()))
+
+    return (endpoint, tuple(sorted(normalized)))
+
+class TTLCache:
+    """Boyutu sınırlı, LRU tahliyeli ve süre aşımlı önbellek"""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: float = 60):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Geçerli kaydı döndürür, yoksa veya süresi dolmuşsa None"""
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Kaydı önbelleğe ekler, gerekirse en eski kaydı çıkarır"""
+        if ttl is None:
+            ttl = self.default_ttl
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Kaydı önbellekten çıkarır"""
+        self._data.pop(key, None)
+
+    def items(self) -> List[Tuple[Hashable, float, Any]]:
+        """Süresi dolmamış kayıtları (anahtar, kalan süre, değer) olarak eskiden yeniye döndürür"""
+        now = time.monotonic()
+        return [(key, expires_at - now, value) for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def clear(self) -> None:
+        """Önbelleği ve sayaçları sıfırlar"""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """İsabet/ıska istatistiklerini döndürür"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class ByteLRUCache:
+    """Toplam boyutu bayt olarak sınırlı LRU önbellek (görseller gibi büyük değerler için)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Kaydı döndürür ve en yeni olarak işaretler"""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: bytes) -> None:
+        """Kaydı ekler, toplam boyut sınırı aşılırsa en eski kayıtları çıkarır"""
+        if len(value) > self.max_bytes:
+            return
+
+        previous = self._data.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+
+        self._data[key] = value
+        self.size += len(value)
+
+        while self.size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Boyut ve isabet istatistiklerini döndürür"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,170 @@
+"""
+Fiyat grafikleri
+Off-loop chart rendering in a process pool with PNG and Telegram file_id caches
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+import numpy as np
+from config import (
+    CHART_WORKERS,
+    CHART_CACHE_MAX_BYTES,
+    CHART_FILE_ID_CACHE_SIZE,
+    CHART_FILE_ID_TTL,
+    CHART_CANDLE_MAX_BARS
+)
+from cache import ByteLRUCache, TTLCache
+from history import ROLLUPS, summarize
+
+logger = logging.getLogger(__name__)
+
+def _init_worker() -> None:
+    """Çizim sürecinde matplotlib'i bir kez yükler"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot
+
+def render_chart(title: str, ts: np.ndarray, opens: np.ndarray, highs: np.ndarray,
+                 lows: np.ndarray, closes: np.ndarray, candles: bool) -> bytes:
+    """OHLC verisinden PNG grafik üretir (süreç havuzunda çalışır)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    days = ts / 86400.0 + mdates.date2num(np.datetime64('1970-01-01T00:00:00'))
+    rising = closes >= opens
+    color = '#16a34a' if closes[-1] >= opens[0] else '#dc2626'
+
+    fig, ax = plt.subplots(figsize=(8, 4), dpi=100)
+    try:
+        if candles:
+            width = (days[1] - days[0]) * 0.7 if len(days) > 1 else 0.02
+            colors = np.where(rising, '#16a34a', '#dc2626')
+            ax.vlines(days, lows, highs, colors=colors, linewidth=0.8)
+            ax.bar(days, np.abs(closes - opens), width, np.minimum(opens, closes),
+                   color=colors, linewidth=0)
+        else:
+            ax.plot(days, closes, color=color, linewidth=1.4)
+            ax.fill_between(days, closes, closes.min(), color=color, alpha=0.12)
+
+        ax.set_title(title)
+        ax.grid(alpha=0.25)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
+        ax.margins(x=0.01)
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+class Chart(NamedTuple):
+    """Gönderilecek grafik: önceden yüklendiyse file_id, değilse PNG baytları"""
+    key: Tuple
+    file_id: Optional[str]
+    png: Optional[bytes]
+    summary: Dict
+
+class ChartService:
+    """Geçmiş verisinden grafik üretir; PNG'leri ve Telegram file_id'lerini önbellekler"""
+
+    def __init__(self, history, workers: int = CHART_WORKERS, max_bytes: int = CHART_CACHE_MAX_BYTES):
+        self.history = history
+        self.workers = workers
+        self.renders = 0
+        self._images = ByteLRUCache(max_bytes)
+        self._file_ids = TTLCache(CHART_FILE_ID_CACHE_SIZE, CHART_FILE_ID_TTL)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Çizim süreçlerini başlatır"""
+        if self._pool is None:
+            # fork yerine spawn: olay döngüsü ve iş parçacıkları alt sürece kopyalanmaz
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+
+    def stop(self) -> None:
+        """Çizim süreçlerini kapatır"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def remember_file_id(self, key: Tuple, file_id: str) -> None:
+        """Telegram'a yüklenen grafiğin file_id'sini saklar, sonraki isteklerde bayt gönderilmez"""
+        self._file_ids.set(key, file_id)
+
+    def forget_file_id(self, key: Tuple) -> None:
+        """Geçersiz çıkan file_id'yi bırakır"""
+        self._file_ids.delete(key)
+
+    async def get(self, coin_id: str, title: str, period: str, span: float) -> Optional[Chart]:
+        """Grafiği döndürür; aynı veri diliminde önbellekten, yoksa süreç havuzunda çizerek"""
+        resolution, bars = self.history.query(coin_id, time.time() - span)
+        summary = summarize(bars)
+        if summary is None or len(bars) < 2:
+            return None
+
+        # Veri dilimi: mum genişliği içinde aynı grafik tekrar kullanılır
+        key = (coin_id, period, resolution, int(time.time() // ROLLUPS[resolution]))
+
+        file_id = self._file_ids.get(key)
+        if file_id:
+            return Chart(key, file_id, None, summary)
+
+        png = self._images.get(key)
+        if png is None:
+            png = await self._render(key, title, bars)
+        return Chart(key, None, png, summary)
+
+    async def _render(self, key: Tuple, title: str, bars: np.ndarray) -> bytes:
+        """Aynı anahtar için eşzamanlı istekleri tek çizimde birleştirir"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            started = time.perf_counter()
+            # memmap dilimleri kopyalanarak alt sürece gönderilir
+            png = await loop.run_in_executor(
+                self._pool, render_chart, title,
+                np.array(bars['ts']), np.array(bars['open']), np.array(bars['high']),
+                np.array(bars['low']), np.array(bars['close']), len(bars) <= CHART_CANDLE_MAX_BARS
+            )
+            self.renders += 1
+            self._images.set(key, png)
+            future.set_result(png)
+            logger.info(f"Chart {key} rendered in {time.perf_counter() - started:.2f}s ({len(png)} bytes)")
+            return png
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # Çöken süreç havuzu bir sonraki istekte yeniden kurulur
+                self._pool = None
+            future.set_exception(e)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısını önle
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict:
+        """Önbellek istatistiklerini döndürür"""
+        return {
+            'renders': self.renders,
+            'images': self._images.stats(),
+            'file_ids': self._file_ids.stats()
+        }
@@ -0,0 +1,125 @@
+"""
+Devre kesici
+Per-endpoint circuit breaker (closed / open / half-open) driven by a rolling failure rate
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from config import (
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_FAILURE_RATE,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_HALF_OPEN_CALLS
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """Son N çağrının hata oranı eşiği aşınca açılır; süre dolunca deneme isteğiyle yokladıktan sonra kapanır"""
+
+    def __init__(self, name: str, window: int = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 half_open_calls: int = BREAKER_HALF_OPEN_CALLS):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened = 0  # açılma sayısı
+        self.rejected = 0  # devre açıkken kesilen çağrılar
+        self._results: Deque[bool] = deque(maxlen=window)  # True = hata
+        self._failures = 0
+        self._changed_at = time.monotonic()
+        self._probes = 0
+
+    def allows(self, now: Optional[float] = None) -> bool:
+        """Şu an bir çağrının geçip geçmeyeceği (durumu değiştirmez)"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic() if now is None else now
+        if now - self._changed_at >= self.open_seconds:
+            return True
+        return self.state == HALF_OPEN and self._probes < self.half_open_calls
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """Çağrı geçebiliyorsa True; açık devrede süre dolduysa yarı açığa geçip deneme hakkı verir"""
+        if self.state == CLOSED:
+            return True
+
+        now = time.monotonic() if now is None else now
+        # Yarı açıkta sonucu hiç gelmeyen (iptal edilen) deneme devreyi kilitlemesin
+        if now - self._changed_at >= self.open_seconds:
+            self._set_state(HALF_OPEN, now)
+            self._probes = 0
+
+        if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Başarılı çağrıyı kaydeder; yarı açıkta devreyi kapatır"""
+        if self.state == HALF_OPEN:
+            self._reset()
+            self._set_state(CLOSED, time.monotonic())
+            logger.info(f"Circuit {self.name} closed")
+            return
+        self._add(False)
+
+    def record_failure(self) -> None:
+        """Başarısız çağrıyı kaydeder; eşik aşılırsa ya da deneme başarısızsa devreyi açar"""
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._trip(now)
+            return
+        if self.state == OPEN:
+            return  # açılmadan önce çıkan isteklerin geç gelen sonuçları
+
+        self._add(True)
+        calls = len(self._results)
+        if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+            self._trip(now)
+
+    def _add(self, failed: bool) -> None:
+        """Sonucu kayan pencereye ekler"""
+        if len(self._results) == self._results.maxlen and self._results[0]:
+            self._failures -= 1
+        self._results.append(failed)
+        if failed:
+            self._failures += 1
+
+    def _reset(self) -> None:
+        """Pencereyi boşaltır"""
+        self._results.clear()
+        self._failures = 0
+
+    def _trip(self, now: float) -> None:
+        """Devreyi açar"""
+        rate = self._failures / len(self._results) if self._results else 1.0
+        self._reset()
+        self._set_state(OPEN, now)
+        self.opened += 1
+        logger.warning(f"Circuit {self.name} opened (failure rate {rate:.0%}), retrying in {self.open_seconds}s")
+
+    def _set_state(self, state: str, now: float) -> None:
+        self.state = state
+        self._changed_at = now
+
+    def stats(self) -> Dict:
+        """Durum ve sayaçları döndürür"""
+        return {
+            'state': self.state,
+            'opened': self.opened,
+            'rejected': self.rejected,
+            'failure_rate': self._failures / len(self._results) if self._results else 0.0
+        }
@@ -0,0 +1,258 @@
+"""
+Yerel coin kataloğu
+Persisted coin catalog (coins/list + market-cap ranks) backing offline search
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from config import (
+    CRYPTO_ALIASES,
+    COIN_CATALOG_PATH,
+    COIN_LIST_MAX_AGE,
+    CATALOG_REFRESH_INTERVAL
+)
+from coin_index import CoinIndex, set_index, get_index
+from market_snapshot import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FORMAT_VERSION = 1
+
+class CoinCatalog:
+    """Tüm coinlerin id, sembol, isim ve piyasa sırasını sütunlar halinde tutar"""
+
+    def __init__(self, ids: List[str], symbols: List[str], names: List[str],
+                 ranks: List[Optional[int]], updated_at: float):
+        self.ids = ids
+        self.symbols = symbols
+        self.names = names
+        self.ranks = ranks
+        self.updated_at = updated_at  # coins/list'in en son indirildiği an
+        self.index = {coin_id: row for row, coin_id in enumerate(ids)}
+
+    @classmethod
+    def empty(cls) -> 'CoinCatalog':
+        """Boş katalog döndürür"""
+        return cls([], [], [], [], 0.0)
+
+    @classmethod
+    def from_coin_list(cls, coins: List[Dict], updated_at: Optional[float] = None) -> 'CoinCatalog':
+        """coins/list yanıtından katalog oluşturur"""
+        return cls(
+            [coin['id'] for coin in coins],
+            [coin.get('symbol') or '' for coin in coins],
+            [coin.get('name') or '' for coin in coins],
+            [None] * len(coins),
+            time.time() if updated_at is None else updated_at
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def is_stale(self) -> bool:
+        """coins/list COIN_LIST_MAX_AGE'den eskiyse True"""
+        return time.time() - self.updated_at > COIN_LIST_MAX_AGE
+
+    def apply_snapshot_ranks(self) -> int:
+        """Güncel piyasa anlık görüntüsündeki sıraları kataloğa işler"""
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return 0
+
+        ranks = snapshot.columns['rank']
+        updated = 0
+        for coin_id, snapshot_row in snapshot.index.items():
+            row = self.index.get(coin_id)
+            if row is not None and not np.isnan(ranks[snapshot_row]):
+                self.ranks[row] = int(ranks[snapshot_row])
+                updated += 1
+        return updated
+
+    def get(self, coin_id: str) -> Optional[Dict]:
+        """Coin kaydını döndürür"""
+        row = self.index.get(coin_id)
+        if row is None:
+            return None
+        return {
+            'id': coin_id,
+            'symbol': self.symbols[row],
+            'name': self.names[row],
+            'market_cap_rank': self.ranks[row]
+        }
+
+    def entries(self) -> Iterator[Dict]:
+        """İndeks kurulumu için kayıtları döndürür"""
+        for row, coin_id in enumerate(self.ids):
+            yield {
+                'id': coin_id,
+                'symbol': self.symbols[row],
+                'name': self.names[row],
+                'rank': self.ranks[row]
+            }
+
+    def save(self, path: str = COIN_CATALOG_PATH) -> None:
+        """Kataloğu sütun bazlı, gzip'li JSON olarak diske yazar"""
+        payload = {
+            'format': CATALOG_FORMAT_VERSION,
+            'updated_at': self.updated_at,
+            'ids': self.ids,
+            'symbols': self.symbols,
+            'names': self.names,
+            'ranks': self.ranks
+        }
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = COIN_CATALOG_PATH) -> 'CoinCatalog':
+        """Diskteki kataloğu okur, yoksa boş katalog döndürür"""
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return cls.empty()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read coin catalog {path}: {e}")
+            return cls.empty()
+
+        if payload.get('format') != CATALOG_FORMAT_VERSION:
+            logger.warning(f"Ignoring coin catalog with unknown format {payload.get('format')}")
+            return cls.empty()
+
+        return cls(payload['ids'], payload['symbols'], payload['names'],
+                   payload['ranks'], payload['updated_at'])
+
+    def build_index(self) -> CoinIndex:
+        """Katalog ve alias'lardan arama indeksini kurar"""
+        started = time.perf_counter()
+        index = CoinIndex.build(self.entries(), CRYPTO_ALIASES)
+        logger.info(
+            f"Coin index built with {len(index.terms)} terms "
+            f"from {len(self)} coins in {time.perf_counter() - started:.3f}s"
+        )
+        return index
+
+# Süreç genelinde paylaşılan katalog
+_catalog: Optional[CoinCatalog] = None
+
+def get_catalog() -> CoinCatalog:
+    """Paylaşılan kataloğu döndürür (yüklenmediyse boş katalog)"""
+    return _catalog if _catalog is not None else CoinCatalog.empty()
+
+def set_catalog(catalog: CoinCatalog) -> None:
+    """Paylaşılan kataloğu değiştirir"""
+    global _catalog
+    _catalog = catalog
+
+def search_coins(query: str, limit: int = 5) -> List[Dict]:
+    """Ağa çıkmadan yerel indekste coin arar, sonuçları piyasa sırasıyla döndürür"""
+    catalog = get_catalog()
+    results = []
+
+    for coin_id in get_index().search(query, limit):
+        coin = catalog.get(coin_id)
+        if coin is None:
+            # Yalnızca alias listesinden bilinen coin, en kısa alias'ı sembol say
+            symbol = min((alias for alias, alias_id in CRYPTO_ALIASES.items() if alias_id == coin_id), key=len)
+            coin = {'id': coin_id, 'symbol': symbol, 'name': coin_id.replace('-', ' ').title(),
+                    'market_cap_rank': None}
+        results.append(coin)
+    return results
+
+class CatalogRefresher:
+    """Kataloğu diskten yükleyen, periyodik olarak yenileyen ve indeksi kuran görev"""
+
+    def __init__(self, api, interval: float = CATALOG_REFRESH_INTERVAL, path: str = COIN_CATALOG_PATH,
+                 download: bool = True):
+        self.api = api
+        self.interval = interval
+        self.path = path
+        self.download = download  # False: shard işçisi, koordinatörün kaydettiği dosyayı izler
+        self._loaded_mtime = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Yenileme döngüsünü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Yenileme döngüsünü durdurur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ana döngü: önce diskteki kataloğu kullan, sonra periyodik yenile"""
+        if _catalog is None and self.download:
+            catalog = await asyncio.to_thread(CoinCatalog.load, self.path)
+            if len(catalog):
+                set_catalog(catalog)
+                set_index(await asyncio.to_thread(catalog.build_index))
+                if not catalog.is_stale():
+                    # Diskteki katalog güncel: açılışta indeks ikinci kez kurulmaz
+                    await asyncio.sleep(self.interval)
+
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Coin catalog refresh failed: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> None:
+        """Gerekirse coins/list'i indirir, sıraları günceller, kaydeder ve indeksi yeniden kurar"""
+        if not self.download:
+            await self.follow()
+            return
+
+        catalog = get_catalog()
+
+        if catalog.is_stale():
+            coins = await self.api.get_coin_list()
+            if coins:
+                catalog = CoinCatalog.from_coin_list(coins)
+                logger.info(f"Coin catalog downloaded with {len(catalog)} coins")
+            elif not len(catalog):
+                logger.warning("coins/list download failed and no local catalog is available")
+                return
+
+        catalog.apply_snapshot_ranks()
+        await asyncio.to_thread(catalog.save, self.path)
+
+        index = await asyncio.to_thread(catalog.build_index)
+        set_catalog(catalog)
+        set_index(index)
+
+    async def follow(self) -> None:
+        """Diskteki katalog değiştiyse yükler ve indeksi kurar (indirme ve kayıt koordinatörde)"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        catalog = await asyncio.to_thread(CoinCatalog.load, self.path)
+        if not len(catalog):
+            return
+        index = await asyncio.to_thread(catalog.build_index)
+        set_catalog(catalog)
+        set_index(index)
+        self._loaded_mtime = mtime
+        logger.info(f"Coin catalog reloaded from disk with {len(catalog)} coins")
@@ -0,0 +1,257 @@
+"""
+Coin kimliği indeksi
+Prebuilt exact / prefix / trigram index over coin ids, symbols and names
+"""
+
+import logging
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from config import (
+    CRYPTO_ALIASES,
+    INDEX_PREFIX_DEPTH,
+    INDEX_PREFIX_LIMIT,
+    FUZZY_MIN_SCORE
+)
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_SPACES = re.compile(r'\s+')
+UNRANKED = 1_000_000  # piyasa sırası bilinmeyen coinler en sona
+
+def normalize(text: str) -> str:
+    """Küçük harfe çevirir ve boşlukları sadeleştirir"""
+    return _SPACES.sub(' ', text.lower()).strip()
+
+def compact(text: str) -> str:
+    """Harf ve rakam dışındaki her şeyi atar ('Ethereum Classic' -> 'ethereumclassic')"""
+    return _NON_ALNUM.sub('', text.lower())
+
+def trigrams(term: str) -> List[str]:
+    """Kenar boşluklarıyla doldurulmuş terimin trigramlarını döndürür"""
+    padded = f"  {term} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+class CoinIndex:
+    """Coin id, sembol ve isimleri üzerinde tam eşleşme, önek ve bulanık arama indeksi"""
+
+    def __init__(self):
+        self.ranks: Dict[str, int] = {}
+        self.exact: Dict[str, List[str]] = {}
+        self.named: Dict[str, List[str]] = {}  # yalnızca id ve isim terimleri (sembolsüz tam eşleşme)
+        self.prefixes: Dict[str, List[str]] = {}  # INDEX_PREFIX_DEPTH'e kadar düzleştirilmiş trie
+        self.terms: List[str] = []  # Sıralı terimler (daha uzun önekler için bisect)
+        self.term_ids: List[List[str]] = []
+        self.tokens: List[str] = []  # Çok kelimeli isimlerin sıralı kelimeleri (yalnızca arama için)
+        self.token_ids: List[List[str]] = []
+        self._trigram_postings: Dict[str, np.ndarray] = {}
+        self._trigram_counts = np.zeros(0, dtype=np.int32)
+        self._term_lengths = np.zeros(0, dtype=np.int32)
+
+    @classmethod
+    def build(cls, coins: Iterable[Dict], aliases: Optional[Dict[str, str]] = None) -> 'CoinIndex':
+        """coins/list biçimindeki kayıtlardan (id, symbol, name, isteğe bağlı rank) indeks kurar"""
+        index = cls()
+        term_map: Dict[str, List[str]] = {}
+        named_map: Dict[str, List[str]] = {}
+
+        coins = list(coins)
+        for coin in coins:
+            rank = coin.get('rank')
+            index.ranks[coin['id']] = int(rank) if rank else UNRANKED
+
+        # Alias'ların işaret ettiği coinler her zaman en önde
+        for coin_id in (aliases or {}).values():
+            index.ranks[coin_id] = 0
+
+        ordered = sorted(coins, key=lambda coin: (index.ranks[coin['id']], coin['id']))
+        for alias, coin_id in (aliases or {}).items():
+            ordered.insert(0, {'id': coin_id, 'symbol': alias, 'name': alias})
+
+        for coin in ordered:
+            coin_id = coin['id']
+            fields = ((coin_id, True), (coin.get('symbol') or '', False), (coin.get('name') or '', True))
+            for raw, named in fields:
+                for term in {normalize(raw), compact(raw)}:
+                    if not term:
+                        continue
+                    for target in ((term_map, named_map) if named else (term_map,)):
+                        ids = target.setdefault(term, [])
+                        if coin_id not in ids:
+                            ids.append(coin_id)
+
+        index.exact = term_map
+        index.named = named_map
+        index.terms = sorted(term_map)
+        index.term_ids = [term_map[term] for term in index.terms]
+
+        # İsimlerin tek tek kelimeleri ('bitcoin cash' -> 'cash')
+        token_map: Dict[str, List[str]] = {}
+        for coin in ordered:
+            words = normalize(coin.get('name') or '').split(' ')
+            if len(words) < 2:
+                continue
+            for word in words:
+                token = compact(word)
+                if len(token) < 2:
+                    continue
+                ids = token_map.setdefault(token, [])
+                if coin['id'] not in ids:
+                    ids.append(coin['id'])
+
+        index.tokens = sorted(token_map)
+        index.token_ids = [token_map[token] for token in index.tokens]
+
+        # Kısa önekler için en iyi adayları önceden hesapla
+        for coin in ordered:
+            coin_id = coin['id']
+            for raw in (coin_id, coin.get('symbol') or '', coin.get('name') or ''):
+                term = compact(raw)
+                for depth in range(1, min(len(term), INDEX_PREFIX_DEPTH) + 1):
+                    best = index.prefixes.setdefault(term[:depth], [])
+                    if coin_id not in best and len(best) < INDEX_PREFIX_LIMIT:
+                        best.append(coin_id)
+
+        # Trigram -> terim numarası listeleri
+        postings: Dict[str, List[int]] = {}
+        counts = []
+        for number, term in enumerate(index.terms):
+            grams = set(trigrams(term))
+            counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(number)
+
+        index._trigram_postings = {
+            gram: np.array(numbers, dtype=np.int32) for gram, numbers in postings.items()
+        }
+        index._trigram_counts = np.array(counts, dtype=np.int32)
+        index._term_lengths = np.array([len(term) for term in index.terms], dtype=np.int32)
+        return index
+
+    def __contains__(self, coin_id: str) -> bool:
+        """Coin id'si katalogda (ya da alias'larda) var mı"""
+        return coin_id in self.ranks
+
+    def _ranked(self, coin_ids: Iterable[str], limit: int) -> List[str]:
+        """Coinleri piyasa sırasına göre tekilleştirip sıralar"""
+        unique = list(dict.fromkeys(coin_ids))
+        unique.sort(key=lambda coin_id: self.ranks.get(coin_id, UNRANKED))
+        return unique[:limit]
+
+    def lookup_exact(self, query: str) -> List[str]:
+        """Tam eşleşen coinleri sıralı döndürür"""
+        return self.exact.get(normalize(query)) or self.exact.get(compact(query)) or []
+
+    def lookup_prefix(self, query: str, limit: int = 5) -> List[str]:
+        """Verilen önekle başlayan coinleri sıralı döndürür"""
+        prefix = compact(query)
+        if not prefix:
+            return []
+
+        if len(prefix) <= INDEX_PREFIX_DEPTH:
+            return self.prefixes.get(prefix, [])[:limit]
+
+        matches = []
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and self.terms[position].startswith(prefix):
+            matches.extend(self.term_ids[position])
+            position += 1
+        return self._ranked(matches, limit)
+
+    def lookup_tokens(self, query: str, limit: int = 5) -> List[str]:
+        """İsmindeki herhangi bir kelime sorguyla başlayan coinleri döndürür"""
+        prefix = compact(query)
+        if len(prefix) < 2:
+            return []
+
+        matches = []
+        position = bisect_left(self.tokens, prefix)
+        while position < len(self.tokens) and self.tokens[position].startswith(prefix):
+            matches.extend(self.token_ids[position])
+            position += 1
+        return self._ranked(matches, limit)
+
+    def lookup_fuzzy(self, query: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE) -> List[str]:
+        """Trigram benzerliğine (Dice) göre yazım hatalarını tolere eden arama"""
+        term = compact(query)
+        grams = set(trigrams(term))
+        postings = [self._trigram_postings[gram] for gram in grams if gram in self._trigram_postings]
+        if not postings:
+            return []
+
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.terms))
+
+        # Dice >= min_score için gereken en az ortak trigram sayısına göre ön eleme
+        candidates = np.flatnonzero(shared >= max(1, int(min_score * len(grams) / 2)))
+        scores = 2.0 * shared[candidates] / (len(grams) + self._trigram_counts[candidates])
+
+        # Uzunluk farkı büyükse benzerlik ne olursa olsun farklı coin sayılır
+        max_diff = max(2, len(term) // 4)
+        keep = (scores >= min_score) & (np.abs(self._term_lengths[candidates] - len(term)) <= max_diff)
+        candidates, scores = candidates[keep], scores[keep]
+        if not len(candidates):
+            return []
+
+        best = np.argsort(-scores, kind='stable')[:limit * 3]
+        return self._ranked_by_score(
+            [(float(scores[i]), self.term_ids[candidates[i]]) for i in best], limit
+        )
+
+    def _ranked_by_score(self, scored: List, limit: int) -> List[str]:
+        """Skor, ardından piyasa sırasına göre sıralar"""
+        flat = [(-score, self.ranks.get(coin_id, UNRANKED), coin_id)
+                for score, coin_ids in scored for coin_id in coin_ids]
+        flat.sort()
+        return list(dict.fromkeys(coin_id for _, _, coin_id in flat))[:limit]
+
+    def candidates(self, query: str, limit: int = 5) -> List[str]:
+        """Tam eşleşme, önek ve bulanık eşleşme sırasıyla aday coinleri döndürür"""
+        found = self.lookup_exact(query)[:limit]
+        if len(found) < limit and len(compact(query)) >= 3:
+            found = list(dict.fromkeys(found + self.lookup_prefix(query, limit)))[:limit]
+        if not found:
+            found = self.lookup_fuzzy(query, limit)
+        return found
+
+    def search(self, query: str, limit: int = 5) -> List[str]:
+        """Arama sonuçları: önce tam eşleşmeler, sonra önek/kelime, sonra bulanık; her grupta piyasa sırası"""
+        tiers: Dict[str, int] = {}
+        for coin_id in self.lookup_exact(query):
+            tiers.setdefault(coin_id, 0)
+        for coin_id in self.lookup_prefix(query, limit * 2) + self.lookup_tokens(query, limit * 2):
+            tiers.setdefault(coin_id, 1)
+        if len(tiers) < limit:
+            for coin_id in self.lookup_fuzzy(query, limit):
+                tiers.setdefault(coin_id, 2)
+
+        ranked = sorted(tiers, key=lambda coin_id: (tiers[coin_id], self.ranks.get(coin_id, UNRANKED)))
+        return ranked[:limit]
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Sorgu için en iyi coin id'sini döndürür, bulamazsa None"""
+        found = self.candidates(query, 1)
+        return found[0] if found else None
+
+    def resolve_exact(self, query: str, symbols: bool = True) -> Optional[str]:
+        """Yalnızca tam eşleşen en iyi coin id'sini döndürür (önek/bulanık yok); symbols=False ise sembolleri saymaz"""
+        terms = self.exact if symbols else self.named
+        found = terms.get(normalize(query)) or terms.get(compact(query))
+        return found[0] if found else None
+
+# Süreç genelinde paylaşılan indeks
+_index: Optional[CoinIndex] = None
+
+def get_index() -> CoinIndex:
+    """Paylaşılan indeksi döndürür; katalog yüklenene kadar yalnızca alias'ları içerir"""
+    global _index
+
+    if _index is None:
+        _index = CoinIndex.build([], CRYPTO_ALIASES)
+    return _index
+
+def set_index(index: Optional[CoinIndex]) -> None:
+    """Paylaşılan indeksi değiştirir"""
+    global _index
+    _index = index
@@ -11,13 +11,149 @@ BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 if not BOT_TOKEN:
     raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required!")
 
+# Telegram Bot API adresi (yerel sahte sunucuyla test için değiştirilebilir)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org/bot")
+
+# Telegram gönderim hız sınırları (Bot API: saniyede ~30 mesaj, sohbet başına ~1 mesaj/sn, grupta 20 mesaj/dk)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))  # saniyede mesaj (burst ile birlikte herhangi 1 sn içinde en fazla 30)
+TELEGRAM_GLOBAL_BURST = 5
+TELEGRAM_CHAT_RATE = 1  # özel sohbet başına saniyede mesaj
+TELEGRAM_GROUP_RATE = 20 / 60  # grup başına saniyede mesaj
+TELEGRAM_CHAT_BURST = 3  # yanıt + düzenleme gibi kısa ardışık gönderimler için
+TELEGRAM_MAX_RETRIES = 5
+
+# Güncelleme alma yöntemi: "polling" (getUpdates) veya "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "0") == "1"  # kapalıyken yeniden başlatmada bekleyen mesajlar yanıtlanır
+
+# Webhook ayarları (BOT_MODE=webhook)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Telegram'a bildirilecek dış adres, boşsa setWebhook çağrılmaz
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # X-Telegram-Bot-Api-Secret-Token başlığı
+WEBHOOK_QUEUE_SIZE = 1000  # bekleyen en fazla güncelleme, dolunca Telegram'dan tekrar göndermesi istenir
+WEBHOOK_WORKERS = 8  # güncellemeleri işleyen eşzamanlı görev sayısı
+
+# Güncelleme işleme ayarları (sohbet başına sıralı, sohbetler arası eşzamanlı)
+UPDATE_CONCURRENCY = 32  # aynı anda işlenen en fazla güncelleme
+UPDATE_MAX_PENDING = 1000  # bekleyen en fazla güncelleme, dolunca yeni güncelleme alımı bekler
+USER_MAX_QUEUED = 5  # kullanıcı başına sırada bekleyebilecek en fazla güncelleme
+USER_RATE = 1  # kullanıcı başına saniyede kabul edilen güncelleme (sel koruması)
+USER_BURST = 5  # art arda gönderilebilecek en fazla güncelleme
+USER_IDLE_TTL = 600  # saniye, bu süre sessiz kalan kullanıcının durumu silinir
+USER_NOTICE_INTERVAL = 60  # saniye, sınıra takılan kullanıcıya bu süre içinde en fazla bir uyarı gönderilir
+PROCESSING_MESSAGE_DELAY = 0.3  # saniye, yanıt bu sürede hazır değilse önce bekleme mesajı gönderilir
+
+# Yatay ölçekleme: 1'den büyükse sohbetler chat_id % SHARD_COUNT ile işçi süreçlere dağıtılır
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_QUEUE_SIZE = 1000  # işçi başına bekleyen en fazla güncelleme, dolunca alım bekler
+SHARD_SNAPSHOT_BYTES = 16 * 1024 * 1024  # paylaşılan bellekte anlık görüntüye ayrılan alan
+SHARD_SNAPSHOT_POLL = 0.5  # saniye, işçilerin yeni anlık görüntüyü kontrol etme aralığı
+SHARD_CATALOG_POLL = 60  # saniye, işçilerin diskteki kataloğun değişip değişmediğine bakma aralığı
+
 # CoinGecko API ayarları
-COINGECKO_API_BASE = "https://api.coingecko.com/api/v3"
+COINGECKO_API_BASE = os.getenv("COINGECKO_API_BASE", "https://api.coingecko.com/api/v3")
 API_TIMEOUT = 10  # saniye
 
+# HTTP bağlantı havuzu ayarları
+HTTP_POOL_LIMIT = 100  # toplam açık bağlantı sınırı
+HTTP_POOL_LIMIT_PER_HOST = 20  # tek sunucuya açık bağlantı sınırı
+HTTP_KEEPALIVE_TIMEOUT = 60  # saniye, boştaki bağlantının açık tutulma süresi
+HTTP_DNS_CACHE_TTL = 300  # saniye
+
+# CoinGecko kota ayarları (planın dakika başı çağrı hakkı)
+COINGECKO_CALLS_PER_MINUTE = int(os.getenv("COINGECKO_CALLS_PER_MINUTE", "30"))
+COINGECKO_BURST = 5  # art arda gönderilebilecek en fazla istek
+BACKOFF_BASE = 1  # saniye, üstel bekleme tabanı
+BACKOFF_MAX = 30  # saniye, tek beklemenin üst sınırı
+
 # Bot ayarları
 MAX_RETRIES = 3
+BACKGROUND_MAX_RETRIES = 5  # arka plan yenilemeleri için deneme sayısı
 CACHE_DURATION = 60  # saniye
+CACHE_MAX_SIZE = 1024  # önbellekteki en fazla kayıt
+
+# Devre kesici (endpoint başına): son çağrıların hata oranı eşiği aşınca istekler kesilir
+BREAKER_WINDOW = 20  # hata oranı hesaplanan son çağrı sayısı
+BREAKER_MIN_CALLS = 5  # devre bu kadar çağrı görmeden açılmaz
+BREAKER_FAILURE_RATE = 0.5  # bu orandan fazla hata (5xx, timeout, bağlantı hatası) devreyi açar
+BREAKER_OPEN_SECONDS = 30  # açık kalma süresi, sonra tek deneme isteği geçer (yarı açık)
+BREAKER_HALF_OPEN_CALLS = 1  # yarı açıkken aynı anda geçen deneme isteği
+
+# Son bilinen iyi değerler (stale-while-revalidate)
+STALE_MAX_AGE = 6 * 60 * 60  # saniye, kaynak yanıt vermezken en fazla bu kadar eski veri gösterilir
+STALE_NOTICE_AGE = 3 * 60  # saniye, bundan eski veride "Şimdi" yerine veri zamanı yazılır
+
+# Metrikler (METRICS_ENABLED=1 ile açılır, yerel /metrics adresinden okunur)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_LATENCY_BUCKETS = (0.00025, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # saniye
+
+# Olay döngüsü izleme (LOOP_DEBUG=1 ile açılır)
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "0") == "1"
+LOOP_BLOCK_THRESHOLD = 0.1  # saniye, bu süreden uzun bloklamalar loglanır
+LOOP_MONITOR_INTERVAL = 0.1  # saniye
+
+# Endpoint bazlı önbellek süreleri (saniye), listede olmayanlar CACHE_DURATION kullanır
+ENDPOINT_CACHE_TTLS = {
+    'simple/price': CACHE_DURATION,
+    'coins/markets': CACHE_DURATION,
+    'search': 10 * 60,
+    'coins': 5 * 60
+}
+
+# simple/price toplu istek ayarları
+PRICE_BATCH_WINDOW = 0.03  # saniye, tek istekte toplanacak çağrılar için bekleme süresi
+PRICE_BATCH_MAX_SIZE = 50  # tek istekteki en fazla coin sayısı
+
+# Piyasa anlık görüntüsü ayarları
+SNAPSHOT_TOP_N = 1000  # piyasa değerine göre takip edilen coin sayısı
+SNAPSHOT_PAGE_SIZE = 250  # coins/markets sayfa boyutu (CoinGecko üst sınırı)
+SNAPSHOT_REFRESH_INTERVAL = 60  # saniye
+SNAPSHOT_MAX_AGE = 5 * 60  # saniye, daha eski anlık görüntü kullanılmaz
+RANKING_MIN_VOLUME = 1_000_000  # USD, yükselen/düşen listelerine girmek için en az 24s hacim
+
+# Hazır mesaj önbelleği (aynı veri kuşağı için mesaj bir kez üretilir)
+RENDER_CACHE_SIZE = 4096
+RENDER_CACHE_TTL = 5 * 60  # saniye
+
+# Yerel veri dizini (coin listesi, geçmiş, kontrol noktaları)
+DATA_DIR = os.getenv("CRYPTO_RADAR_DATA_DIR", "data")
+
+# Sıcak başlangıç: anlık görüntü ve son iyi yanıtlar diske yazılır, açılışta hemen kullanılır
+WARM_START_PATH = os.path.join(DATA_DIR, "warm_start.npz")
+WARM_START_INTERVAL = 5 * 60  # saniye, kontrol noktası yazma aralığı (kapanışta da yazılır)
+
+# Coin indeksi ayarları
+COIN_CATALOG_PATH = os.path.join(DATA_DIR, "coin_catalog.json.gz")  # coins/list + piyasa sıraları
+COIN_LIST_MAX_AGE = 24 * 60 * 60  # saniye, coins/list bu süreden eskiyse yeniden indirilir
+CATALOG_REFRESH_INTERVAL = 60 * 60  # saniye, sıraların güncellenip indeksin yeniden kurulma aralığı
+INDEX_PREFIX_DEPTH = 3  # bu uzunluğa kadar öneklerin en iyi adayları önceden hesaplanır
+INDEX_PREFIX_LIMIT = 8  # önek başına saklanan aday sayısı
+FUZZY_MIN_SCORE = 0.5  # bulanık eşleşme için en düşük trigram benzerliği
+
+# Fiyat geçmişi ayarları
+HISTORY_DIR = os.path.join(DATA_DIR, "history")  # coin başına sabit genişlikli kayıt dosyaları
+HISTORY_TOP_N = 100  # piyasa değerine göre geçmişi tutulan coin sayısı (alias'lar her zaman dahil)
+HISTORY_MAX_POINTS = 800  # sorgularda dönen en fazla mum sayısı (çözünürlük buna göre seçilir)
+HISTORY_RETENTION_DAYS = {  # seri başına saklama süresi (gün), burada olmayan seriler kırpılmaz
+    'raw': int(os.getenv("HISTORY_RAW_RETENTION_DAYS", "7")),
+    '1m': int(os.getenv("HISTORY_1M_RETENTION_DAYS", "30"))
+}
+HISTORY_COMPACT_INTERVAL = 6 * 60 * 60  # saniye, süresi dolan kayıtların dosyalardan atılma aralığı
+
+# Grafik ayarları
+CHART_WORKERS = 2  # grafik çizen süreç sayısı
+CHART_CACHE_MAX_BYTES = 32 * 1024 * 1024  # bellekte tutulan PNG'lerin toplam boyutu
+CHART_FILE_ID_CACHE_SIZE = 4096  # yeniden kullanılacak Telegram file_id sayısı
+CHART_FILE_ID_TTL = 24 * 60 * 60  # saniye
+CHART_CANDLE_MAX_BARS = 120  # bundan az mum varsa mum grafiği, fazlaysa çizgi grafik
+
+# Fiyat alarmı ayarları
+ALERT_DB_PATH = os.path.join(DATA_DIR, "alerts.db")
+ALERTS_PER_USER = 20  # kullanıcı başına en fazla alarm
 
 # Desteklenen kripto paralar (Türkçe isimler ile)
 CRYPTO_ALIASES = {
@@ -55,7 +191,13 @@ Bu bot ile kripto para fiyatlarını takip edebilirsin:
 • `/btc` - Bitcoin fiyatı
 • `/eth` - Ethereum fiyatı
 • `/top10` - En popüler 10 kripto para
+• `/yukselenler` - Son 1 saatte en çok yükselenler
+• `/dusenler` - Son 1 saatte en çok düşenler
+• `/hacim` - İşlem hacmi en yüksek coinler
 • `/ara <isim>` - Kripto para ara
+• `/gecmis <coin> <dönem>` - Fiyat geçmişi (ör. `/gecmis btc 7g`)
+• `/grafik <coin> <dönem>` - Fiyat grafiği (ör. `/grafik eth 24s`)
+• `/alarm <coin> > <fiyat>` - Fiyat alarmı kur
 • `/help` - Yardım menüsü
 
 **Örnek:** `/fiyat bitcoin` veya `/fiyat btc`
@@ -73,7 +215,15 @@ Bu bot ile kripto para fiyatlarını takip edebilirsin:
 ₿ `/btc` - Bitcoin fiyatı ve bilgileri  
 ⟠ `/eth` - Ethereum fiyatı ve bilgileri
 🔟 `/top10` - Top 10 kripto para listesi
+🚀 `/yukselenler` - Son 1 saatte en çok yükselen 5 coin
+🔻 `/dusenler` - Son 1 saatte en çok düşen 5 coin
+💹 `/hacim` - 24 saatlik hacim liderleri
 🔍 `/ara <isim>` - Kripto para ara
+📜 `/gecmis btc 7g` - Fiyat geçmişi (s=saat, g=gün, h=hafta, a=ay)
+📈 `/grafik btc 7g` - Fiyat grafiği
+🔔 `/alarm btc > 70000` - Fiyat alarmı kur (`<` ile düşüş alarmı)
+📋 `/alarmlar` - Alarmlarını listele
+🗑 `/alarmsil <no>` - Alarmı sil
 
 **Desteklenen Kripto Paralar:**
 Bitcoin (BTC), Ethereum (ETH), Binance Coin (BNB), 
@@ -91,5 +241,6 @@ Polkadot (DOT), Avalanche (AVAX), Litecoin (LTC)
     'error_api': "⚠️ Şu anda kripto para verilerine ulaşılamıyor. Lütfen daha sonra tekrar deneyin.",
     'error_not_found': "❌ Bu kripto para bulunamadı. Lütfen geçerli bir kripto para ismi girin.",
     'error_invalid': "❌ Geçersiz komut. /help komutunu kullanarak yardım alabilirsiniz.",
-    'processing': "⏳ Veriler getiriliyor, lütfen bekleyin..."
+    'processing': "⏳ Veriler getiriliyor, lütfen bekleyin...",
+    'rate_limited': "🐢 Çok hızlı mesaj gönderiyorsunuz, bazı mesajlarınız yanıtsız kaldı. Lütfen biraz bekleyip tekrar deneyin."
 }
@@ -6,11 +6,228 @@ CoinGecko API integration for cryptocurrency data
 import aiohttp
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from config import COINGECKO_API_BASE, API_TIMEOUT, MAX_RETRIES
+import time
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Set
+from cache import TTLCache, make_cache_key
+from circuit_breaker import CircuitBreaker
+from market_snapshot import get_snapshot
+from rate_limiter import (
+    TokenBucket,
+    RateLimiter,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND,
+    backoff_delay,
+    parse_retry_after
+)
+from metrics import COINGECKO_LATENCY, COINGECKO_RESPONSES, COINGECKO_RETRIES
+from config import (
+    COINGECKO_API_BASE,
+    API_TIMEOUT,
+    MAX_RETRIES,
+    BACKGROUND_MAX_RETRIES,
+    COINGECKO_CALLS_PER_MINUTE,
+    COINGECKO_BURST,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    CACHE_DURATION,
+    CACHE_MAX_SIZE,
+    ENDPOINT_CACHE_TTLS,
+    PRICE_BATCH_WINDOW,
+    PRICE_BATCH_MAX_SIZE,
+    RANKING_MIN_VOLUME,
+    STALE_MAX_AGE,
+    METRICS_ENABLED
+)
 
 logger = logging.getLogger(__name__)
 
+# Tüm CryptoAPI örneklerinin paylaştığı yanıt önbelleği (süreç başına; shard işçileri ayrı tutar, bkz. sharding._worker)
+_response_cache = TTLCache(maxsize=CACHE_MAX_SIZE, default_ttl=CACHE_DURATION)
+
+# Son başarılı yanıtlar: taze kayıt yokken yenileme sürerken veya devre açıkken sunulur
+_last_good = TTLCache(maxsize=CACHE_MAX_SIZE, default_ttl=STALE_MAX_AGE)
+
+def get_cache_ttl(endpoint: str) -> float:
+    """Endpoint için önbellek süresini döndürür"""
+    if endpoint in ENDPOINT_CACHE_TTLS:
+        return ENDPOINT_CACHE_TTLS[endpoint]
+    return ENDPOINT_CACHE_TTLS.get(endpoint.split('/')[0], CACHE_DURATION)
+
+# Metrik etiketleri: coin kimliği içeren yollar (coins/bitcoin) tek etikette toplanır
+_KNOWN_ENDPOINTS = frozenset({'simple/price', 'coins/markets', 'coins/list', 'search', 'exchange_rates'})
+
+def endpoint_label(endpoint: str) -> str:
+    """Endpoint'in sınırlı sayıda değer alan metrik etiketini döndürür"""
+    if endpoint in _KNOWN_ENDPOINTS:
+        return endpoint
+    return f"{endpoint.split('/')[0]}/:id"
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Paylaşılan önbelleğin istatistiklerini döndürür"""
+    return _response_cache.stats()
+
+# Endpoint etiketi başına devre kesiciler
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Endpoint'in devre kesicisini döndürür"""
+    label = endpoint_label(endpoint)
+    breaker = _breakers.get(label)
+    if breaker is None:
+        breaker = _breakers[label] = CircuitBreaker(label)
+    return breaker
+
+def get_breaker_stats() -> Dict[str, Dict]:
+    """Devre kesicilerin durumlarını döndürür"""
+    return {label: breaker.stats() for label, breaker in _breakers.items()}
+
+def _market_snapshot():
+    """Taze anlık görüntü; kontrol noktasından yüklendiyse veya coins/markets devresi açıksa
+    en fazla STALE_MAX_AGE eski olanı da kabul eder"""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        stale = get_snapshot(STALE_MAX_AGE)
+        if stale is not None and (stale.restored or not get_breaker('coins/markets').allows()):
+            snapshot = stale
+    return snapshot
+
+def export_responses() -> List[List]:
+    """Son iyi yanıtları kontrol noktası için [endpoint, parametreler, kalan süre, veri] listesi olarak verir"""
+    return [[key[0], [list(pair) for pair in key[1]], ttl, value] for key, ttl, value in _last_good.items()]
+
+def import_responses(entries: List[List], elapsed: float = 0.0) -> int:
+    """Kontrol noktasındaki yanıtları son iyi değerler olarak yükler, yüklenen sayıyı döndürür"""
+    loaded = 0
+    for endpoint, params, ttl, value in entries:
+        if ttl - elapsed > 0:
+            _last_good.set((endpoint, tuple(tuple(pair) for pair in params)), value, ttl - elapsed)
+            loaded += 1
+    return loaded
+
+class SingleFlight:
+    """Aynı anahtar için eşzamanlı çağrıları tek bir isteğe indirger"""
+    
+    def __init__(self):
+        self._inflight: Dict[Any, asyncio.Task] = {}
+    
+    def start(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Anahtar için uçuşta bir istek yoksa başlatır; beklemeden görevi döndürür"""
+        task = self._inflight.get(key)
+        
+        if task is None:
+            # İstek ayrı bir görevde çalışır; ilk çağıranın iptali diğerlerini etkilemez
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+    
+    async def do(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Anahtar için uçuşta bir istek varsa onu bekler, yoksa yenisini başlatır"""
+        # Sonuç da hata da bekleyen herkesle paylaşılır
+        return await asyncio.shield(self.start(key, factory))
+    
+    def __contains__(self, key: Any) -> bool:
+        return key in self._inflight
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+# Tüm CryptoAPI örneklerinin paylaştığı CoinGecko kotası
+_rate_limiter = RateLimiter(TokenBucket(COINGECKO_CALLS_PER_MINUTE / 60, COINGECKO_BURST))
+
+def share_rate_limit(bucket) -> None:
+    """CoinGecko kotasını süreçler arası paylaşılan kovaya bağlar (shard işçileri)"""
+    _rate_limiter.bucket = bucket
+
+# Tüm CryptoAPI örneklerinin paylaştığı uçuştaki istek tablosu
+_inflight_requests = SingleFlight()
+
+def _price_params(ids: str) -> Dict[str, str]:
+    """simple/price isteği için parametreleri oluşturur"""
+    return {
+        'ids': ids,
+        'vs_currencies': 'usd,try',
+        'include_24hr_change': 'true',
+        'include_market_cap': 'true',
+        'include_24hr_vol': 'true',
+        'include_last_updated_at': 'true'
+    }
+
+class PriceBatcher:
+    """Kısa bir pencere içindeki fiyat sorgularını tek simple/price isteğinde toplar"""
+    
+    def __init__(self, window: float = PRICE_BATCH_WINDOW, max_size: int = PRICE_BATCH_MAX_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._api: Optional['CryptoAPI'] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sends: Set[asyncio.Task] = set()  # toplanırsa partideki tüm bekleyenler asılı kalır
+    
+    async def get(self, api: 'CryptoAPI', coin_id: str) -> Optional[Dict]:
+        """Coin fiyatını bir sonraki toplu istekle birlikte getirir"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        self._pending.setdefault(coin_id, []).append(future)
+        if self._api is None:
+            self._api = api
+        
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Bekleyen sorguları tek istek olarak gönderir"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, api = self._pending, self._api
+        self._pending, self._api = {}, None
+        
+        if batch:
+            task = asyncio.ensure_future(self._send(api, batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+    
+    async def _send(self, api: 'CryptoAPI', batch: Dict[str, List[asyncio.Future]]) -> None:
+        """Toplu isteği yapar ve sonuçları bekleyen çağıranlara dağıtır"""
+        coin_ids = sorted(batch)
+        
+        try:
+            data = await api._make_request(
+                'simple/price', _price_params(','.join(coin_ids)), use_cache=False
+            )
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        
+        ttl = get_cache_ttl('simple/price')
+        for coin_id in coin_ids:
+            coin_data = data.get(coin_id) if data else None
+            
+            # Tekil sorgularla aynı anahtar altında önbelleğe yaz
+            if coin_data is not None:
+                key = make_cache_key('simple/price', _price_params(coin_id))
+                _response_cache.set(key, {coin_id: coin_data}, ttl)
+                _last_good.set(key, {coin_id: coin_data})
+            
+            for future in batch[coin_id]:
+                if not future.done():
+                    future.set_result(coin_data)
+
+# Tüm CryptoAPI örneklerinin paylaştığı fiyat toplayıcı; yalnızca bu süreçteki sorguları birleştirir
+_price_batcher = PriceBatcher()
+
 class CryptoAPI:
     """CoinGecko API ile kripto para verilerini yöneten sınıf"""
     
@@ -19,64 +236,183 @@ class CryptoAPI:
         self.timeout = API_TIMEOUT
         self.session = None
         
+    async def start(self) -> 'CryptoAPI':
+        """Bağlantı havuzlu HTTP oturumunu açar (açıksa dokunmaz)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self
+    
+    async def close(self) -> None:
+        """HTTP oturumunu ve havuzdaki bağlantıları kapatır"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+        
     async def __aenter__(self):
         """Async context manager giriş"""
-        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
-        return self
+        return await self.start()
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager çıkış"""
-        if self.session:
-            await self.session.close()
+        await self.close()
+    
+    async def _make_request(self, endpoint: str, params: Dict = None, use_cache: bool = True,
+                            priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict]:
+        """API isteği yapan yardımcı fonksiyon - önce paylaşılan önbelleğe bakar"""
+        cache_key = make_cache_key(endpoint, params)
+        
+        factory = lambda: self._fetch_and_cache(cache_key, endpoint, params, use_cache, priority)
+        
+        if use_cache:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Stale-while-revalidate: son bilinen değer hemen döner, yenileme arka planda sürer
+            stale = _last_good.get(cache_key)
+            if stale is not None:
+                if get_breaker(endpoint).allows():
+                    _inflight_requests.start(cache_key, factory)
+                return stale
+        
+        return await _inflight_requests.do(cache_key, factory)
+    
+    async def _fetch_and_cache(self, cache_key: Any, endpoint: str, params: Dict = None,
+                               use_cache: bool = True, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict]:
+        """İsteği yapar ve başarılı yanıtı önbelleğe yazar"""
+        data = await self._fetch(endpoint, params, priority)
+        
+        if data is not None and use_cache:
+            _response_cache.set(cache_key, data, get_cache_ttl(endpoint))
+            _last_good.set(cache_key, data)
+        return data
     
-    async def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """API isteği yapan yardımcı fonksiyon"""
+    async def _fetch(self, endpoint: str, params: Dict = None,
+                     priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict]:
+        """CoinGecko'ya gerçek HTTP isteğini yapar"""
         url = f"{self.base_url}/{endpoint}"
         
-        for attempt in range(MAX_RETRIES):
+        if params:
+            # aiohttp bool değerleri sorgu parametresi olarak kabul etmez
+            params = {
+                key: ('true' if value else 'false') if isinstance(value, bool) else value
+                for key, value in params.items()
+            }
+        
+        max_retries = MAX_RETRIES if priority == PRIORITY_INTERACTIVE else BACKGROUND_MAX_RETRIES
+        label = endpoint_label(endpoint)
+        breaker = get_breaker(endpoint)
+        
+        for attempt in range(max_retries):
+            # Devre açıkken beklemeden vazgeç: kaynak çökükken komut başına 30+ sn harcanmaz
+            if not breaker.allow():
+                if METRICS_ENABLED:
+                    COINGECKO_RESPONSES.inc(label, 'short_circuit')
+                logger.debug(f"Circuit {label} is open, skipping request")
+                return None
+            
+            await _rate_limiter.acquire(priority)
+            if attempt and METRICS_ENABLED:
+                COINGECKO_RETRIES.inc(label)
+            
+            started = time.perf_counter()
             try:
                 async with self.session.get(url, params=params) as response:
+                    if METRICS_ENABLED:
+                        COINGECKO_RESPONSES.inc(label, str(response.status))
                     if response.status == 200:
-                        return await response.json()
+                        data = await response.json()
+                        breaker.record_success()
+                        return data
                     elif response.status == 429:  # Rate limit
-                        await asyncio.sleep(2 ** attempt)
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                        
+                        # Ceza tüm çağıranlara uygulanır, limiter bekletir
+                        _rate_limiter.penalize(delay)
+                        logger.warning(f"Rate limited on {endpoint}, pausing requests for {delay:.1f}s")
+                        continue
+                    elif response.status >= 500:
+                        breaker.record_failure()
+                        logger.warning(f"API request failed with status {response.status} on attempt {attempt + 1}")
+                        if attempt < max_retries - 1:
+                            await asyncio.sleep(backoff_delay(attempt))
                         continue
                     else:
+                        # 4xx isteğin hatasıdır, kaynak ayaktadır
+                        breaker.record_success()
                         logger.warning(f"API request failed with status {response.status}")
                         return None
                         
             except asyncio.TimeoutError:
+                if METRICS_ENABLED:
+                    COINGECKO_RESPONSES.inc(label, 'timeout')
+                breaker.record_failure()
                 logger.warning(f"Request timeout on attempt {attempt + 1}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(1)
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(backoff_delay(attempt))
                     continue
                     
             except Exception as e:
+                if METRICS_ENABLED:
+                    COINGECKO_RESPONSES.inc(label, 'error')
+                breaker.record_failure()
                 logger.error(f"Request error on attempt {attempt + 1}: {e}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(1)
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(backoff_delay(attempt))
                     continue
+            
+            finally:
+                if METRICS_ENABLED:
+                    COINGECKO_LATENCY.observe(time.perf_counter() - started, label)
                     
         return None
     
     async def get_coin_price(self, coin_id: str) -> Optional[Dict]:
         """Belirli bir kripto paranın fiyat bilgilerini getirir"""
-        params = {
-            'ids': coin_id,
-            'vs_currencies': 'usd,try',
-            'include_24hr_change': 'true',
-            'include_market_cap': 'true',
-            'include_24hr_vol': 'true'
-        }
+        snapshot = _market_snapshot()
+        if snapshot:
+            price = snapshot.get_price(coin_id)
+            if price:
+                return price
         
-        data = await self._make_request('simple/price', params)
+        cache_key = make_cache_key('simple/price', _price_params(coin_id))
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached.get(coin_id)
         
-        if data and coin_id in data:
-            return data[coin_id]
-        return None
+        # Son bilinen fiyat hemen döner, yenisi diğer sorgularla birlikte arka planda istenir
+        stale = _last_good.get(cache_key)
+        if stale is not None:
+            if get_breaker('simple/price').allows():
+                _inflight_requests.start(cache_key, lambda: self._refresh_price(coin_id))
+            return stale.get(coin_id)
+        
+        # Önbellekte yoksa diğer kullanıcıların sorgularıyla birlikte toplu iste
+        return await _price_batcher.get(self, coin_id)
+    
+    async def _refresh_price(self, coin_id: str) -> None:
+        """Arka plan fiyat yenilemesi; sonucu toplayıcı önbelleğe yazar"""
+        try:
+            await _price_batcher.get(self, coin_id)
+        except Exception as e:
+            logger.debug(f"Background price refresh for {coin_id} failed: {e}")
     
     async def get_top_cryptocurrencies(self, limit: int = 10) -> Optional[List[Dict]]:
         """En popüler kripto paraları getirir"""
+        snapshot = _market_snapshot()
+        if snapshot and len(snapshot) >= limit:
+            return snapshot.top(limit)
+        
         params = {
             'vs_currency': 'usd',
             'order': 'market_cap_desc',
@@ -88,6 +424,86 @@ class CryptoAPI:
         
         return await self._make_request('coins/markets', params)
     
+    async def get_top_gainers(self, window: str = '1h', limit: int = 5) -> Optional[List[Dict]]:
+        """Verilen zaman aralığında (1h, 24h, 7d) en çok yükselen kripto paraları getirir"""
+        snapshot = _market_snapshot()
+        if snapshot:
+            return snapshot.top_gainers(window, limit, min_volume=RANKING_MIN_VOLUME)
+        
+        return await self._rank_markets(window, limit, descending=True)
+    
+    async def get_top_losers(self, window: str = '1h', limit: int = 5) -> Optional[List[Dict]]:
+        """Verilen zaman aralığında (1h, 24h, 7d) en çok düşen kripto paraları getirir"""
+        snapshot = _market_snapshot()
+        if snapshot:
+            return snapshot.top_losers(window, limit, min_volume=RANKING_MIN_VOLUME)
+        
+        return await self._rank_markets(window, limit, descending=False)
+    
+    async def get_volume_leaders(self, limit: int = 10) -> Optional[List[Dict]]:
+        """24 saatlik işlem hacmi en yüksek kripto paraları getirir"""
+        snapshot = _market_snapshot()
+        if snapshot:
+            return snapshot.volume_leaders(limit)
+        
+        params = {
+            'vs_currency': 'usd',
+            'order': 'volume_desc',
+            'per_page': limit,
+            'page': 1,
+            'sparkline': False,
+            'price_change_percentage': '24h'
+        }
+        
+        return await self._make_request('coins/markets', params)
+    
+    async def _rank_markets(self, window: str, limit: int, descending: bool) -> Optional[List[Dict]]:
+        """Anlık görüntü yokken ilk 50 coini değişime göre sıralar"""
+        params = {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': 50,
+            'page': 1,
+            'sparkline': False,
+            'price_change_percentage': window
+        }
+        
+        data = await self._make_request('coins/markets', params)
+        if not data:
+            return None
+        
+        change_key = f'price_change_percentage_{window}_in_currency'
+        return sorted(data, key=lambda coin: coin.get(change_key) or 0, reverse=descending)[:limit]
+    
+    async def get_market_page(self, page: int, per_page: int, ids: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        """coins/markets verisinin bir sayfasını önbelleğe bakmadan getirir"""
+        params = {
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': per_page,
+            'page': page,
+            'sparkline': False,
+            'price_change_percentage': '1h,24h,7d'
+        }
+        if ids:
+            params['ids'] = ','.join(ids)
+        
+        return await self._make_request('coins/markets', params, use_cache=False, priority=PRIORITY_BACKGROUND)
+    
+    async def get_usd_try_rate(self) -> Optional[float]:
+        """1 USD'nin TL karşılığını exchange_rates üzerinden hesaplar"""
+        data = await self._make_request('exchange_rates', use_cache=False, priority=PRIORITY_BACKGROUND)
+        
+        try:
+            rates = data['rates']
+            return rates['try']['value'] / rates['usd']['value']
+        except (TypeError, KeyError, ZeroDivisionError):
+            return None
+    
+    async def get_coin_list(self) -> Optional[List[Dict]]:
+        """Tüm coinlerin id, sembol ve isim listesini getirir"""
+        return await self._make_request('coins/list', use_cache=False, priority=PRIORITY_BACKGROUND)
+    
     async def search_cryptocurrency(self, query: str) -> Optional[List[Dict]]:
         """Kripto para arama yapar"""
         params = {'query': query}
@@ -110,7 +526,22 @@ class CryptoAPI:
         
         return await self._make_request(f'coins/{coin_id}', params)
 
-# Global API instance
-async def get_crypto_api():
-    """CryptoAPI instance döndürür"""
-    return CryptoAPI()
+# Uygulama boyunca paylaşılan API örneği
+_shared_api: Optional[CryptoAPI] = None
+
+async def get_crypto_api() -> CryptoAPI:
+    """Paylaşılan CryptoAPI örneğini döndürür, gerekirse oturumunu açar"""
+    global _shared_api
+    
+    if _shared_api is None:
+        _shared_api = CryptoAPI()
+    return await _shared_api.start()
+
+async def close_crypto_api() -> None:
+    """Paylaşılan CryptoAPI oturumunu kapatır"""
+    global _shared_api
+    
+    if _shared_api is not None:
+        await _shared_api.close()
+        _shared_api = None
+
@@ -0,0 +1,327 @@
+"""
+Yerel fiyat geçmişi
+Append-only memory-mapped price history with incremental OHLC rollups
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import (
+    CRYPTO_ALIASES,
+    HISTORY_DIR,
+    HISTORY_TOP_N,
+    HISTORY_MAX_POINTS,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_COMPACT_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Ham kayıt: her anlık görüntüdeki fiyat ve 24s hacim
+TICK_DTYPE = np.dtype([('ts', '<f8'), ('price', '<f8'), ('volume', '<f8')])
+
+# Toplulaştırılmış mum: açılış, en yüksek, en düşük, kapanış ve son 24s hacim
+BAR_DTYPE = np.dtype([
+    ('ts', '<f8'), ('open', '<f8'), ('high', '<f8'),
+    ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')
+])
+
+# Seri adı -> saniye cinsinden mum genişliği, küçükten büyüğe
+ROLLUPS = {
+    '1m': 60,
+    '5m': 5 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60
+}
+
+RAW = 'raw'
+
+_SAFE_ID = re.compile(r'[^a-z0-9._-]')
+
+class SeriesFile:
+    """Sabit genişlikli kayıtlardan oluşan, sona eklenen ve bellek eşlemeli okunan dosya"""
+
+    def __init__(self, path: str, dtype: np.dtype):
+        self.path = path
+        self.dtype = dtype
+        self.count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        self._map: Optional[np.memmap] = None
+        self._map_count = 0
+        self._map_inode = 0  # kırpma dosyayı değiştirince eski eşleme bırakılır
+
+    def last(self) -> Optional[np.void]:
+        """Son kaydı diskten okur"""
+        if not self.count:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek((self.count - 1) * self.dtype.itemsize)
+            return np.frombuffer(f.read(self.dtype.itemsize), dtype=self.dtype)[0].copy()
+
+    def append(self, record: np.ndarray) -> None:
+        """Kaydı dosyanın sonuna ekler"""
+        with open(self.path, 'ab') as f:
+            f.write(record.tobytes())
+        self.count += 1
+
+    def replace_last(self, record: np.ndarray) -> None:
+        """Henüz kapanmamış son mumu yerinde günceller"""
+        with open(self.path, 'r+b') as f:
+            f.seek((self.count - 1) * self.dtype.itemsize)
+            f.write(record.tobytes())
+
+    def refresh(self) -> None:
+        """Başka bir sürecin eklediği (veya kırptığı) kayıtları görmek için sayıyı dosyadan yeniler"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.count = 0
+            return
+        self.count = stat.st_size // self.dtype.itemsize
+        if stat.st_ino != self._map_inode:
+            self._map = None
+
+    def view(self) -> np.ndarray:
+        """Tüm kayıtları kopyalamadan (memmap) döndürür"""
+        if not self.count:
+            return np.zeros(0, dtype=self.dtype)
+        if self._map is None or self._map_count != self.count:
+            # Dosya büyüdükçe yeniden eşle; eski eşlemeyi tutan görünümler geçerli kalır.
+            # Boy açılan dosyadan alınır: sayı okunduktan sonra kırpma dosyayı kısaltmış olabilir
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                count = min(self.count, stat.st_size // self.dtype.itemsize)
+                if not count:
+                    return np.zeros(0, dtype=self.dtype)
+                self._map = np.memmap(f, dtype=self.dtype, mode='r', shape=(count,))
+                self._map_inode = stat.st_ino
+            self._map_count = count
+        return self._map
+
+    def drop_before(self, ts: float) -> int:
+        """ts'den eski kayıtları atar; kalanlar yeni dosyaya yazılıp atomik olarak yer değiştirir"""
+        data = self.view()
+        dropped = int(np.searchsorted(data['ts'], ts, side='left'))
+        if not dropped:
+            return 0
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data[dropped:].tobytes())
+        # Okuyucuların elindeki eski eşleme eski dosyayı göstermeye devam eder
+        os.replace(tmp_path, self.path)
+        self.count -= dropped
+        self._map = None
+        return dropped
+
+class CoinHistory:
+    """Bir coinin ham kayıtları ve OHLC serileri"""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.raw = SeriesFile(os.path.join(directory, f"{RAW}.bin"), TICK_DTYPE)
+        self.rollups = {
+            name: SeriesFile(os.path.join(directory, f"{name}.bin"), BAR_DTYPE) for name in ROLLUPS
+        }
+        last_tick = self.raw.last()
+        self.last_ts = float(last_tick['ts']) if last_tick is not None else 0.0
+
+        # Açık (henüz kapanmamış) mumlar; yeniden başlatmada diskteki son mumdan devam edilir
+        self._open: Dict[str, Optional[np.ndarray]] = {}
+        for name, series in self.rollups.items():
+            last = series.last()
+            self._open[name] = np.array([last], dtype=BAR_DTYPE) if last is not None else None
+
+    def add(self, ts: float, price: float, volume: float) -> bool:
+        """Yeni fiyatı ham seriye ekler ve tüm mumları günceller"""
+        if ts <= self.last_ts:
+            return False
+
+        self.raw.append(np.array([(ts, price, volume)], dtype=TICK_DTYPE))
+
+        for name, width in ROLLUPS.items():
+            bucket = ts - ts % width
+            series = self.rollups[name]
+            bar = self._open[name]
+
+            if bar is not None and bar['ts'][0] == bucket:
+                bar['high'] = max(bar['high'][0], price)
+                bar['low'] = min(bar['low'][0], price)
+                bar['close'] = price
+                bar['volume'] = volume
+                series.replace_last(bar)
+            else:
+                bar = np.array([(bucket, price, price, price, price, volume)], dtype=BAR_DTYPE)
+                series.append(bar)
+                self._open[name] = bar
+
+        self.last_ts = ts
+        return True
+
+    def compact(self, now: float, retention: Dict[str, float]) -> int:
+        """Saklama süresi dolan kayıtları (seri adı -> gün) dosyalardan atar"""
+        dropped = 0
+        for name, days in retention.items():
+            if days <= 0:
+                continue
+            series = self.raw if name == RAW else self.rollups[name]
+            dropped += series.drop_before(now - days * 24 * 60 * 60)
+            if name != RAW and not series.count:
+                self._open[name] = None  # açık mum da silindi, sıradaki fiyat yeni mum açar
+        return dropped
+
+class HistoryStore:
+    """Piyasa anlık görüntülerinden beslenen, coin başına dosyalardan oluşan fiyat geçmişi"""
+
+    def __init__(self, root: str = HISTORY_DIR, top_n: int = HISTORY_TOP_N, readonly: bool = False,
+                 retention: Dict[str, float] = HISTORY_RETENTION_DAYS,
+                 compact_interval: float = HISTORY_COMPACT_INTERVAL):
+        self.root = root
+        self.top_n = top_n
+        self.readonly = readonly  # shard işçileri yalnızca okur, dosyalara koordinatör yazar
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self.version = 0  # her kayıtta artar (grafik önbelleği anahtarı için)
+        self._coins: Dict[str, CoinHistory] = {}
+        self._lock = threading.Lock()  # coin açma ve yazma işlemleri için
+        self._compacted_at = 0.0
+
+    def _coin(self, coin_id: str, create: bool = False) -> Optional[CoinHistory]:
+        """Coinin geçmişini döndürür, gerekirse diskten açar"""
+        history = self._coins.get(coin_id)
+        if history is None:
+            directory = os.path.join(self.root, _SAFE_ID.sub('_', coin_id))
+            if not create and not os.path.isdir(directory):
+                return None
+            history = self._coins[coin_id] = CoinHistory(directory)
+        return history
+
+    def tracked_ids(self, snapshot) -> List[str]:
+        """Geçmişi tutulan coinler: piyasa değerine göre ilk N ve alias listesindekiler"""
+        ids = [snapshot.ids[row] for row in snapshot.top_k('market_cap', self.top_n)]
+        ids.extend(coin_id for coin_id in set(CRYPTO_ALIASES.values()) if coin_id in snapshot.index)
+        return list(dict.fromkeys(ids))
+
+    def record(self, snapshot) -> int:
+        """Anlık görüntüdeki fiyatları diske yazar, yazılan coin sayısını döndürür"""
+        prices = snapshot.columns['price']
+        volumes = snapshot.columns['volume']
+        ts = float(snapshot.updated_at)
+        written = 0
+
+        with self._lock:
+            for coin_id in self.tracked_ids(snapshot):
+                row = snapshot.index[coin_id]
+                price = prices[row]
+                if np.isnan(price):
+                    continue
+                volume = 0.0 if np.isnan(volumes[row]) else float(volumes[row])
+                if self._coin(coin_id, create=True).add(ts, float(price), volume):
+                    written += 1
+            self.version += 1
+
+            if ts - self._compacted_at >= self.compact_interval:
+                self._compacted_at = ts
+                self.compact(ts)
+
+        return written
+
+    def compact(self, now: float) -> int:
+        """Tüm coin dizinlerinde saklama süresi dolan kayıtları atar (kilit tutulurken çağrılır)"""
+        if not self.retention or not os.path.isdir(self.root):
+            return 0
+
+        started = time.perf_counter()
+        loaded = {os.path.dirname(history.raw.path): history for history in self._coins.values()}
+        dropped = 0
+        for entry in os.scandir(self.root):
+            if entry.is_dir():
+                # Artık izlenmeyen coinlerin dosyaları da kırpılır
+                history = loaded.get(entry.path) or CoinHistory(entry.path)
+                dropped += history.compact(now, self.retention)
+
+        if dropped:
+            logger.info(f"History compaction dropped {dropped} expired records in {time.perf_counter() - started:.2f}s")
+        return dropped
+
+    async def on_snapshot(self, snapshot) -> None:
+        """Piyasa anlık görüntüsü dinleyicisi; disk yazımı olay döngüsünü bloklamaz"""
+        started = time.perf_counter()
+        written = await asyncio.to_thread(self.record, snapshot)
+        logger.debug(f"History recorded {written} coins in {time.perf_counter() - started:.3f}s")
+
+    def series(self, coin_id: str, resolution: str) -> np.ndarray:
+        """Coinin bir serisini kopyalamadan döndürür"""
+        history = self._coins.get(coin_id)
+        if history is None:
+            # Yeniden başlatmadan sonra ilk kayıttan önce okunursa diskten aç
+            with self._lock:
+                history = self._coin(coin_id)
+        if history is None:
+            return np.zeros(0, dtype=TICK_DTYPE if resolution == RAW else BAR_DTYPE)
+
+        source = history.raw if resolution == RAW else history.rollups[resolution]
+        if self.readonly:
+            source.refresh()
+        return source.view()
+
+    def query(self, coin_id: str, start: float, end: Optional[float] = None,
+              resolution: Optional[str] = None) -> Tuple[str, np.ndarray]:
+        """[start, end] aralığındaki mumları döndürür; çözünürlük verilmezse nokta sayısına göre seçilir"""
+        end = time.time() if end is None else end
+        if resolution is None:
+            resolution = pick_resolution(end - start)
+
+        data = self.series(coin_id, resolution)
+        timestamps = data['ts']
+        first = int(np.searchsorted(timestamps, start - ROLLUPS.get(resolution, 0) + 1e-9, side='left'))
+        last = int(np.searchsorted(timestamps, end, side='right'))
+        return resolution, data[first:last]
+
+def pick_resolution(span: float, max_points: int = HISTORY_MAX_POINTS) -> str:
+    """Aralığı en fazla max_points mumla gösterecek en ince çözünürlüğü seçer"""
+    for name, width in ROLLUPS.items():
+        if span / width <= max_points:
+            return name
+    return '1d'
+
+def summarize(bars: np.ndarray) -> Optional[Dict]:
+    """Mumlardan açılış, kapanış, en yüksek, en düşük ve değişim özetini çıkarır"""
+    if not len(bars):
+        return None
+
+    first_open = float(bars['open'][0])
+    last_close = float(bars['close'][-1])
+    return {
+        'start': float(bars['ts'][0]),
+        'end': float(bars['ts'][-1]),
+        'open': first_open,
+        'close': last_close,
+        'high': float(bars['high'].max()),
+        'low': float(bars['low'].min()),
+        'change': (last_close - first_open) / first_open * 100 if first_open else 0.0,
+        'points': len(bars)
+    }
+
+# '/gecmis btc 7g' gibi dönemler: s=saat, g=gün, h=hafta, a=ay
+_PERIOD = re.compile(r'^(\d+)\s*([sgha])$')
+PERIOD_UNITS = {
+    's': 60 * 60,
+    'g': 24 * 60 * 60,
+    'h': 7 * 24 * 60 * 60,
+    'a': 30 * 24 * 60 * 60
+}
+
+def parse_period(text: str) -> Optional[float]:
+    """'7g', '24s', '2h', '3a' biçimindeki dönemi saniyeye çevirir"""
+    match = _PERIOD.match(text.strip().lower())
+    if not match:
+        return None
+    amount = int(match.group(1))
+    if amount <= 0:
+        return None
+    return amount * PERIOD_UNITS[match.group(2)]
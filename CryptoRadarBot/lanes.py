@@ -0,0 +1,257 @@
+"""
+Anahtar bazlı sıralı işleme şeritleri
+Per-key sequential lanes with a global concurrency limit and backpressure
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+from telegram.ext import BaseUpdateProcessor
+from config import (
+    UPDATE_CONCURRENCY,
+    UPDATE_MAX_PENDING,
+    USER_MAX_QUEUED,
+    USER_RATE,
+    USER_BURST,
+    USER_IDLE_TTL,
+    USER_NOTICE_INTERVAL,
+    MESSAGES,
+    METRICS_ENABLED
+)
+from metrics import UPDATES_DROPPED
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class KeyedLanes:
+    """Aynı anahtarın işlerini sırayla, farklı anahtarlarınkini eşzamanlı çalıştırır"""
+
+    def __init__(self, handler: Callable[[Any], Awaitable], concurrency: int, max_pending: int,
+                 max_per_key: Optional[int] = None, key_rate: Optional[float] = None,
+                 key_burst: float = 1, idle_ttl: float = 600.0):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.max_per_key = max_per_key  # anahtar başına sırada bekleyebilecek en fazla iş
+        self.key_rate = key_rate  # anahtar başına saniyede kabul edilen iş (sel koruması)
+        self.key_burst = key_burst
+        self.idle_ttl = idle_ttl  # bu süre boyunca iş göndermeyen anahtarın kovası silinir
+        self.pending = 0  # kuyrukta bekleyen veya işlenen toplam iş
+        self.processed = 0
+        self.dropped = 0  # anahtar sınırına takılıp reddedilen işler
+        self._limit = asyncio.Semaphore(concurrency)  # aynı anda çalışan en fazla iş
+        self._slots = asyncio.Semaphore(max_pending)  # dolunca submit bekler (geri basınç)
+        self._lanes: Dict[Hashable, Deque[Any]] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._buckets: OrderedDict = OrderedDict()  # anahtar -> TokenBucket, en eski kullanılan başta
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        """Aktif şerit sayısı"""
+        return len(self._lanes)
+
+    def stats(self) -> Dict:
+        """Şerit istatistiklerini döndürür"""
+        return {
+            'lanes': len(self._lanes),
+            'tracked_keys': len(self._buckets),
+            'pending': self.pending,
+            'processed': self.processed,
+            'dropped': self.dropped
+        }
+
+    def _admit(self, key: Hashable) -> bool:
+        """Anahtarın sıra ve hız sınırlarını kontrol eder"""
+        lane = self._lanes.get(key)
+        if self.max_per_key is not None and lane is not None and len(lane) >= self.max_per_key:
+            return False
+        if not self.key_rate:
+            return True
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.key_rate, self.key_burst)
+        else:
+            self._buckets.move_to_end(key)
+        self._sweep(now)
+        return bucket.try_take(now=now)
+
+    def _sweep(self, now: float) -> None:
+        """Uzun süredir iş göndermeyen anahtarların kovalarını siler (bellek sınırı)"""
+        expired = now - self.idle_ttl
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket.updated > expired:
+                break
+            del self._buckets[key]
+
+    async def submit(self, key: Hashable, item: Any) -> bool:
+        """İşi anahtarın şeridine ekler; bekleyen iş sınırı doluysa yer açılana kadar bekler.
+        Anahtarın sırası doluysa veya hız sınırını aştıysa işi reddedip False döndürür"""
+        if not self._admit(key):
+            self.dropped += 1
+            return False
+
+        await self._slots.acquire()
+        self.pending += 1
+        self._idle.clear()
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+        lane.append(item)
+
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._drain(key))
+        return True
+
+    async def _drain(self, key: Hashable) -> None:
+        """Şeritteki işleri sırayla çalıştırır, şerit boşalınca kapanır"""
+        lane = self._lanes[key]
+        try:
+            while lane:
+                item = lane.popleft()
+                try:
+                    async with self._limit:
+                        await self.handler(item)
+                except Exception as e:
+                    logger.error(f"Error processing item for lane {key}: {e}")
+                finally:
+                    self.processed += 1
+                    self._release()
+        finally:
+            # İptal edilirse şeritte kalan işlerin yerini de boşalt
+            for _ in range(len(lane)):
+                self._release()
+            lane.clear()
+            del self._lanes[key]
+            del self._tasks[key]
+
+    def _release(self) -> None:
+        """Tamamlanan işin yerini boşaltır"""
+        self.pending -= 1
+        self._slots.release()
+        if not self.pending:
+            self._idle.set()
+
+    async def join(self, timeout: Optional[float] = None) -> None:
+        """Bekleyen tüm işler bitene kadar bekler"""
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def close(self) -> None:
+        """Çalışan şeritleri iptal eder"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+class UserLaneProcessor(BaseUpdateProcessor):
+    """PTB güncelleme işlemcisi: aynı kullanıcının güncellemeleri sırayla, farklı kullanıcılarınki
+    eşzamanlı işlenir; kullanıcı başına sıra ve hız sınırı sel mesajlarını düşürür"""
+
+    def __init__(self, concurrency: int = UPDATE_CONCURRENCY, max_pending: int = UPDATE_MAX_PENDING,
+                 max_per_user: int = USER_MAX_QUEUED, rate: float = USER_RATE,
+                 burst: float = USER_BURST, idle_ttl: float = USER_IDLE_TTL,
+                 notice_interval: float = USER_NOTICE_INTERVAL):
+        # PTB semaforu bekleyen güncellemeleri sınırlar, eşzamanlılığı şeritler belirler
+        super().__init__(max_pending)
+        self.lanes = KeyedLanes(self._run, concurrency, max_pending, max_per_user, rate, burst, idle_ttl)
+        self.notice_interval = notice_interval
+        self._noticed: Dict[Hashable, float] = {}  # anahtar -> son uyarı zamanı, eklenme (zaman) sırasıyla
+        self._notices: Set[asyncio.Task] = set()
+        # application.update_queue sınırsızdır; enqueue ile bırakılıp henüz bitmemiş güncellemeleri sınırlar
+        self._handoff = asyncio.Semaphore(max_pending)
+        self._handed_off: Set[int] = set()  # enqueue ile bırakılan güncellemelerin id()'leri
+
+    @staticmethod
+    def lane_key(update: object) -> Hashable:
+        """Güncellemenin şerit anahtarı: kullanıcı, yoksa sohbet kimliği"""
+        user = getattr(update, 'effective_user', None)
+        if user is not None:
+            return user.id
+        chat = getattr(update, 'effective_chat', None)
+        if chat is not None:
+            return chat.id
+        return getattr(update, 'update_id', id(update))
+
+    async def wait_for_capacity(self) -> None:
+        """Bekleyen güncelleme sınırında yer açılana kadar bekler (yer ayırmaz)"""
+        async with self._handoff:
+            pass
+
+    async def enqueue(self, update: object, update_queue: asyncio.Queue) -> None:
+        """Güncellemeyi bekleyen güncelleme sınırında yer açılınca PTB kuyruğuna bırakır.
+        Webhook ve shard işçileri böylece geri basıncı kendi sınırlı kuyruklarına taşır"""
+        await self._handoff.acquire()
+        self._handed_off.add(id(update))
+        update_queue.put_nowait(update)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Güncellemeyi kullanıcının şeridine ekler ve işlenmesini bekler"""
+        try:
+            done = asyncio.get_running_loop().create_future()
+            key = self.lane_key(update)
+            if not await self.lanes.submit(key, (coroutine, done)):
+                coroutine.close()
+                if METRICS_ENABLED:
+                    UPDATES_DROPPED.inc()
+                logger.debug(f"Dropped update from {key}: per-user limit exceeded")
+                self._notify_dropped(key, update)
+                return
+            await done
+        finally:
+            if id(update) in self._handed_off:
+                self._handed_off.discard(id(update))
+                self._handoff.release()
+
+    def _notify_dropped(self, key: Hashable, update: object) -> None:
+        """Sınıra takılan kullanıcıya pencere başına bir kez uyarı gönderir (beklemeden)"""
+        now = time.monotonic()
+        while self._noticed:
+            oldest, noticed_at = next(iter(self._noticed.items()))
+            if now - noticed_at < self.notice_interval:
+                break
+            del self._noticed[oldest]
+
+        message = getattr(update, 'effective_message', None)
+        if key in self._noticed or message is None:
+            return
+
+        self._noticed[key] = now
+        task = asyncio.create_task(self._send_notice(message))
+        self._notices.add(task)
+        task.add_done_callback(self._notices.discard)
+
+    @staticmethod
+    async def _send_notice(message) -> None:
+        """Hız sınırı uyarısını gönderir"""
+        try:
+            await message.reply_text(MESSAGES['rate_limited'])
+        except Exception as e:
+            logger.debug(f"Could not send rate limit notice: {e}")
+
+    async def _run(self, item) -> None:
+        """Şeritten gelen güncellemeyi işler"""
+        coroutine, done = item
+        try:
+            await coroutine
+        finally:
+            if not done.done():
+                done.set_result(None)
+
+    async def initialize(self) -> None:
+        """Başlatılacak kaynak yok"""
+
+    async def shutdown(self) -> None:
+        """Bekleyen güncellemeleri bitirir, kalanları iptal eder"""
+        try:
+            await self.lanes.join(timeout=10)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.lanes.pending} pending updates on shutdown")
+        await self.lanes.close()
+        for task in list(self._notices):
+            task.cancel()
@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+"""
+Yük testi
+Offline load test: fake Telegram Bot API and CoinGecko servers driving main.py or bot.py
+
+Örnek:
+    python loadtest.py --target main --users 2000 --messages 5
+    python loadtest.py --target main --shards 4 --tg-global-rate 100000
+    python loadtest.py --target bot --cg-latency 0.2 --cg-429-rate 0.05 --compare data/loadtest/eski.json
+    python loadtest.py --target sender --users 50 --messages 6 --tg-429-rate 0.05
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from aiohttp import web
+
+logger = logging.getLogger('loadtest')
+
+TOKEN = 'loadtest:TOKEN'
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Kripto Radar', 'username': 'kripto_radar_bot'}
+
+# Gönderilen mesaj türleri ve ağırlıkları
+MESSAGE_MIX = {
+    'fiyat': 35,
+    'top10': 15,
+    'ara': 15,
+    'yukselenler': 15,
+    'metin': 20
+}
+
+# bot.py'de /top10 ve /ara yok, yanıtsız kalıp ölçümü bozmasınlar
+LEGACY_MESSAGE_MIX = {
+    'fiyat': 50,
+    'yukselenler': 20,
+    'metin': 30
+}
+
+# Son yanıt sayılmayan ara mesajlar
+PLACEHOLDERS = ("⏳", "🔍 Fiyat bilgisi getiriliyor")
+
+# Sohbete mesaj gönderen Bot API yöntemleri (hız sınırına tabi)
+SEND_METHODS = ('sendMessage', 'editMessageText', 'sendPhoto')
+
+# Gönderim anı sunucuya varışta ölçülür; yerel ağ gecikmesindeki oynama kadar pay bırakılır
+ARRIVAL_JITTER = 0.02
+
+def _free_port() -> int:
+    """Boş bir TCP portu bulur"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Milisaniye cinsinden p50/p90/p99/max"""
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': round(ordered[-1] * 1000, 2)}
+
+def max_in_window(times: List[float], window: float) -> int:
+    """Sıralı zamanlardan herhangi bir `window` saniyelik aralığa düşen en fazla olay sayısı"""
+    best = start = 0
+    for end, at in enumerate(times):
+        while at - times[start] >= window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+def send_rate_report(deliveries: List[Tuple[float, int]], window: float = 1.0) -> Dict[str, int]:
+    """Gönderimlerin genel ve sohbet başına herhangi bir pencerede ulaştığı en yüksek sayılar"""
+    by_chat: Dict[int, List[float]] = defaultdict(list)
+    for at, chat_id in sorted(deliveries):
+        by_chat[chat_id].append(at)
+    window -= ARRIVAL_JITTER
+    return {
+        'global': max_in_window(sorted(at for at, _ in deliveries), window),
+        'per_chat': max((max_in_window(times, window) for times in by_chat.values()), default=0)
+    }
+
+def _git_commit() -> str:
+    """Çalışılan commit'in kısa kimliği"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+async def _read_params(request: web.Request) -> Dict:
+    """Sorgu, form (python-telegram-bot) veya JSON (TelegramSender) gövdesindeki parametreler"""
+    params = dict(request.query)
+    if request.body_exists:  # gövde önceden okunduysa da (önbellekten) okunur
+        if request.content_type == 'application/json':
+            params.update(await request.json())
+        else:
+            params.update(await request.post())
+    return params
+
+class FakeTelegram:
+    """getUpdates ile sentetik güncellemeleri veren, giden mesajları kaydeden Bot API taklidi"""
+
+    def __init__(self, latency: float = 0.0, rate_429: float = 0.0):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.calls: Counter = Counter()
+        self.injected_429 = 0
+        self.deliveries: List[Tuple[float, int]] = []  # (varış anı, chat_id), 429 alanlar dahil her deneme
+        self.on_message = None  # (chat_id, text) -> None
+        self._updates: Deque[Dict] = deque()
+        self._has_updates = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id = 1
+
+    def push(self, chat_id: int, text: str) -> None:
+        """Kullanıcıdan gelmiş gibi bir mesaj güncellemesi kuyruğa ekler"""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        user = {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'}
+        message = {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private', 'first_name': user['first_name']},
+            'from': user,
+            'text': text
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        self._updates.append({'update_id': update_id, 'message': message})
+        self._has_updates.set()
+
+    def build_app(self) -> web.Application:
+        """aiohttp uygulamasını oluşturur"""
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Bot API yöntemlerini yanıtlar"""
+        method = request.match_info['method']
+        params = await _read_params(request)
+        self.calls[method] += 1
+        if method in SEND_METHODS:
+            self.deliveries.append((time.monotonic(), int(params['chat_id'])))
+
+        if method == 'getUpdates':
+            return web.json_response({'ok': True, 'result': await self._get_updates(params)})
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method in SEND_METHODS:
+            if self.rate_429 and random.random() < self.rate_429:
+                self.injected_429 += 1
+                return web.json_response({
+                    'ok': False, 'error_code': 429, 'description': 'Too Many Requests: retry after 1',
+                    'parameters': {'retry_after': 1}
+                }, status=429)
+            return web.json_response({'ok': True, 'result': self._message(method, params)})
+
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': BOT_USER})
+        return web.json_response({'ok': True, 'result': True})
+
+    async def _get_updates(self, params: Dict) -> List[Dict]:
+        """Onaylananları atıp bekleyen güncellemeleri döndürür; yoksa kısa süre bekler"""
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+
+        if not self._updates:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), min(float(params.get('timeout') or 0), 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+        return [update for _, update in zip(range(limit), self._updates)]
+
+    def _message(self, method: str, params: Dict) -> Dict:
+        """Gönderilen veya düzenlenen mesajı kaydeder ve Message nesnesi döndürür"""
+        chat_id = int(params['chat_id'])
+        text = params.get('text') or params.get('caption') or ''
+        message_id = int(params.get('message_id') or 0)
+        if not message_id:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+
+        if self.on_message:
+            self.on_message(chat_id, text)
+
+        message = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': text
+        }
+        if method == 'sendPhoto':
+            message['photo'] = [{'file_id': f'photo{message_id}', 'file_unique_id': f'u{message_id}',
+                                 'width': 800, 'height': 400}]
+        return message
+
+class FakeCoinGecko:
+    """Sabit bir coin evreninden coins/markets, simple/price, search ve diğer yanıtları üreten taklit"""
+
+    def __init__(self, aliases: Dict[str, str], coins: int = 1200, latency: float = 0.0,
+                 error_rate: float = 0.0, rate_429: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.calls: Counter = Counter()
+        self.injected_errors = 0
+        self.injected_429 = 0
+
+        ids = list(dict.fromkeys(aliases.values()))
+        ids.extend(f'coin-{i}' for i in range(coins - len(ids)))
+        self.coins = []
+        for rank, coin_id in enumerate(ids, 1):
+            price = 60000 / rank ** 1.5
+            self.coins.append({
+                'id': coin_id,
+                'symbol': coin_id.replace('coin-', 'c')[:5],
+                'name': coin_id.replace('-', ' ').title(),
+                'current_price': price,
+                'market_cap': price * 2e7,
+                'total_volume': price * 4e5,
+                'market_cap_rank': rank
+            })
+        self.by_id = {coin['id']: coin for coin in self.coins}
+
+    def build_app(self) -> web.Application:
+        """aiohttp uygulamasını oluşturur"""
+        app = web.Application()
+        app.router.add_get('/api/v3/{endpoint:.+}', self.handle)
+        return app
+
+    def _tick(self, coin: Dict) -> Dict:
+        """Coinin fiyatını küçük bir rastgele adımla günceller"""
+        coin['current_price'] *= 1 + random.uniform(-0.002, 0.002)
+        for window in ('1h', '24h', '7d'):
+            coin[f'price_change_percentage_{window}_in_currency'] = random.uniform(-12, 12)
+        coin['last_updated'] = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+        return coin
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """CoinGecko v3 endpoint'lerini yanıtlar"""
+        endpoint = request.match_info['endpoint']
+        params = request.query
+        label = endpoint if not endpoint.startswith('coins/') or endpoint in ('coins/markets', 'coins/list') else 'coins/:id'
+        self.calls[label] += 1
+
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if self.rate_429 and random.random() < self.rate_429:
+            self.injected_429 += 1
+            return web.json_response({'status': {'error_code': 429}}, status=429, headers={'Retry-After': '1'})
+        if self.error_rate and random.random() < self.error_rate:
+            self.injected_errors += 1
+            return web.json_response({'error': 'injected'}, status=503)
+
+        if endpoint == 'coins/markets':
+            return web.json_response(self._markets(params))
+        if endpoint == 'simple/price':
+            return web.json_response(self._prices(params.get('ids', '').split(',')))
+        if endpoint == 'search':
+            query = params.get('query', '').lower()
+            found = [coin for coin in self.coins if query in coin['id'] or query in coin['symbol']][:25]
+            return web.json_response({'coins': [
+                {key: coin[key] for key in ('id', 'name', 'symbol', 'market_cap_rank')} for coin in found
+            ]})
+        if endpoint == 'coins/list':
+            return web.json_response([{key: coin[key] for key in ('id', 'symbol', 'name')} for coin in self.coins])
+        if endpoint == 'exchange_rates':
+            return web.json_response({'rates': {'usd': {'value': 65000.0}, 'try': {'value': 65000.0 * 34.2}}})
+
+        coin = self.by_id.get(endpoint.split('/', 1)[-1])
+        if coin is None:
+            return web.json_response({'error': 'coin not found'}, status=404)
+        return web.json_response({
+            'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name'],
+            'market_data': {'current_price': {'usd': coin['current_price']}}
+        })
+
+    def _markets(self, params) -> List[Dict]:
+        """coins/markets sayfası veya ids ile seçilen coinler"""
+        if params.get('ids'):
+            selected = [self.by_id[coin_id] for coin_id in params['ids'].split(',') if coin_id in self.by_id]
+        else:
+            per_page = int(params.get('per_page', 100))
+            page = int(params.get('page', 1))
+            selected = self.coins[(page - 1) * per_page:page * per_page]
+        return [dict(self._tick(coin)) for coin in selected]
+
+    def _prices(self, ids: List[str]) -> Dict:
+        """simple/price yanıtı"""
+        result = {}
+        for coin_id in ids:
+            coin = self.by_id.get(coin_id)
+            if coin is None:
+                continue
+            price = coin['current_price']
+            result[coin_id] = {
+                'usd': price, 'try': price * 34.2,
+                'usd_24h_change': random.uniform(-12, 12), 'try_24h_change': random.uniform(-12, 12),
+                'usd_market_cap': coin['market_cap'], 'try_market_cap': coin['market_cap'] * 34.2,
+                'usd_24h_vol': coin['total_volume'], 'try_24h_vol': coin['total_volume'] * 34.2,
+                'last_updated_at': int(time.time())
+            }
+        return result
+
+class LoadDriver:
+    """Sentetik kullanıcıları çalıştırır, her mesajın son yanıtına kadar geçen süreyi ölçer"""
+
+    def __init__(self, telegram: FakeTelegram, aliases: Dict[str, str], users: int, messages: int,
+                 think: float, ramp: float, mix: Dict[str, int] = MESSAGE_MIX):
+        self.telegram = telegram
+        self.mix = mix
+        self.aliases = list(aliases)
+        self.users = users
+        self.messages = messages
+        self.think = think
+        self.ramp = ramp
+        self.sent = 0
+        self.placeholders = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self._pending: Dict[int, Deque[Tuple[float, str]]] = defaultdict(deque)
+        self._outstanding = 0
+        self._drained = asyncio.Event()
+        telegram.on_message = self.on_message
+
+    def _next_message(self) -> Tuple[str, str]:
+        """Ağırlıklı karışımdan bir mesaj seçer"""
+        kind = random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        alias = random.choice(self.aliases)
+        if kind == 'fiyat':
+            return kind, f'/fiyat {alias}'
+        if kind == 'ara':
+            return kind, f'/ara {alias[:3]}'
+        if kind == 'metin':
+            return kind, alias
+        return kind, f'/{kind}'
+
+    def on_message(self, chat_id: int, text: str) -> None:
+        """Bota giden mesajı, kullanıcının en eski bekleyen isteğiyle eşleştirir"""
+        if text.startswith(PLACEHOLDERS):
+            self.placeholders += 1
+            return
+        pending = self._pending.get(chat_id)
+        if not pending:
+            return
+        sent_at, kind = pending.popleft()
+        self.latencies[kind].append(time.perf_counter() - sent_at)
+        self._outstanding -= 1
+        if not self._outstanding:
+            self._drained.set()
+
+    async def _user(self, chat_id: int) -> None:
+        """Bir kullanıcının mesajlarını düşünme süreleriyle gönderir"""
+        await asyncio.sleep(random.uniform(0, self.ramp))
+        for _ in range(self.messages):
+            kind, text = self._next_message()
+            self._pending[chat_id].append((time.perf_counter(), kind))
+            self._outstanding += 1
+            self._drained.clear()
+            self.sent += 1
+            self.telegram.push(chat_id, text)
+            await asyncio.sleep(random.expovariate(1 / self.think) if self.think else 0)
+
+    async def run(self, drain_timeout: float) -> float:
+        """Tüm kullanıcıları çalıştırır ve yanıtların bitmesini bekler; geçen süreyi döndürür"""
+        started = time.perf_counter()
+        await asyncio.gather(*(self._user(1000 + i) for i in range(self.users)))
+        if self._outstanding:
+            try:
+                await asyncio.wait_for(self._drained.wait(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self._outstanding} messages still unanswered after {drain_timeout}s")
+        return time.perf_counter() - started
+
+    @property
+    def unanswered(self) -> int:
+        """Yanıtı gelmeyen mesaj sayısı"""
+        return self._outstanding
+
+async def _start_site(app: web.Application, port: int) -> web.AppRunner:
+    """Uygulamayı yerel portta başlatır"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+async def _run_main_target() -> Callable[[], Awaitable[None]]:
+    """main.py uygulamasını polling ile başlatır; durdurma fonksiyonunu döndürür"""
+    import main
+    application = main.build_application()
+    await application.initialize()
+    await main.post_init(application)
+    await application.start()
+    await application.updater.start_polling(poll_interval=0, timeout=1)
+
+    async def stop() -> None:
+        await application.updater.stop()
+        await application.stop()
+        await main.post_shutdown(application)
+        await application.shutdown()
+    return stop
+
+async def _run_sharded_target(shards: int) -> Callable[[], Awaitable[None]]:
+    """main.py'yi koordinatör ve `shards` işçi süreciyle başlatır; durdurma fonksiyonunu döndürür"""
+    from sharding import ShardCoordinator
+    coordinator = ShardCoordinator(shards, mode='polling')
+    await coordinator.start()
+    return coordinator.stop
+
+async def _run_bot_target() -> Callable[[], Awaitable[None]]:
+    """Eski bot.py'yi başlatır; durdurma fonksiyonunu döndürür"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'bot.py')
+    spec = importlib.util.spec_from_file_location('legacy_bot', path)
+    legacy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(legacy)
+    task = asyncio.create_task(legacy._run_bot(legacy.SimpleCryptoBot(TOKEN)))
+
+    async def stop() -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return stop
+
+async def run_send_burst(args: argparse.Namespace, telegram: FakeTelegram) -> Dict:
+    """TelegramSender'a tek seferde `users` x `messages` mesaj verir; sınırları sahte sunucuya varışlardan doğrular"""
+    from config import (
+        BOT_TOKEN,
+        TELEGRAM_API_BASE,
+        TELEGRAM_GLOBAL_RATE,
+        TELEGRAM_GLOBAL_BURST,
+        TELEGRAM_CHAT_RATE,
+        TELEGRAM_CHAT_BURST
+    )
+    from telegram_sender import TelegramSender
+
+    sender = TelegramSender(f"{TELEGRAM_API_BASE}{BOT_TOKEN}")
+    chats = [1000 + i for i in range(args.users)]
+    started = time.perf_counter()
+    try:
+        results = await asyncio.wait_for(asyncio.gather(
+            *(sender.send_message(chat_id, f'burst {number}', parse_mode=None)
+              for number in range(args.messages) for chat_id in chats),
+            return_exceptions=True
+        ), args.drain_timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Burst not delivered after {args.drain_timeout}s")
+        results = []
+    finally:
+        await sender.stop()
+    elapsed = time.perf_counter() - started
+
+    # Kova kapasitesi + bir saniyelik dolum: herhangi bir 1 sn içinde gidebilecek en fazla mesaj
+    limits = {
+        'global': int(TELEGRAM_GLOBAL_BURST + TELEGRAM_GLOBAL_RATE),
+        'per_chat': int(TELEGRAM_CHAT_BURST + TELEGRAM_CHAT_RATE)
+    }
+    observed = send_rate_report(telegram.deliveries)
+    delivered = sum(1 for result in results if isinstance(result, dict) and result.get('ok'))
+    return {
+        'commit': _git_commit(),
+        'target': args.target,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'messages_sent': len(chats) * args.messages,
+        'messages_delivered': delivered,
+        'duration_s': round(elapsed, 3),
+        'messages_per_s': round(delivered / elapsed, 2) if elapsed else None,
+        'max_per_second': observed,
+        'limits_per_second': limits,
+        'limits_ok': all(observed[key] <= limits[key] for key in limits),
+        'retried': sender.retried,
+        'telegram_calls': dict(telegram.calls),
+        'telegram_injected_429': telegram.injected_429,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+async def run(args: argparse.Namespace, telegram_port: int, coingecko_port: int) -> Dict:
+    """Sahte sunucuları ve botu başlatır, yükü uygular ve raporu döndürür"""
+    from config import CRYPTO_ALIASES
+
+    telegram = FakeTelegram(args.tg_latency, args.tg_429_rate)
+    if args.target == 'sender':
+        runner = await _start_site(telegram.build_app(), telegram_port)
+        try:
+            return await run_send_burst(args, telegram)
+        finally:
+            await runner.cleanup()
+
+    coingecko = FakeCoinGecko(CRYPTO_ALIASES, args.coins, args.cg_latency, args.cg_error_rate, args.cg_429_rate)
+    runners = [
+        await _start_site(telegram.build_app(), telegram_port),
+        await _start_site(coingecko.build_app(), coingecko_port)
+    ]
+
+    if args.target == 'bot':
+        stop = await _run_bot_target()
+    elif args.shards > 1:
+        stop = await _run_sharded_target(args.shards)
+    else:
+        stop = await _run_main_target()
+    try:
+        # Anlık görüntünün ilk yüklemesini bekle (üretimde bot çoğu zaman sıcak çalışır)
+        await asyncio.sleep(args.warmup)
+        upstream_before = Counter(coingecko.calls)
+
+        mix = MESSAGE_MIX if args.target == 'main' else LEGACY_MESSAGE_MIX
+        driver = LoadDriver(telegram, CRYPTO_ALIASES, args.users, args.messages, args.think, args.ramp, mix)
+        elapsed = await driver.run(args.drain_timeout)
+    finally:
+        await stop()
+        for runner in runners:
+            await runner.cleanup()
+
+    all_latencies = [value for values in driver.latencies.values() for value in values]
+    answered = len(all_latencies)
+    return {
+        'commit': _git_commit(),
+        'target': args.target,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'messages_sent': driver.sent,
+        'messages_answered': answered,
+        'unanswered': driver.unanswered,
+        'placeholders': driver.placeholders,
+        'duration_s': round(elapsed, 3),
+        'messages_per_s': round(answered / elapsed, 2) if elapsed else None,
+        'latency_ms': _percentiles(all_latencies),
+        'latency_ms_by_kind': {kind: _percentiles(values) for kind, values in sorted(driver.latencies.items())},
+        'upstream_calls': dict(Counter(coingecko.calls) - upstream_before),
+        'upstream_injected': {'errors': coingecko.injected_errors, '429': coingecko.injected_429},
+        'telegram_calls': dict(telegram.calls),
+        'telegram_injected_429': telegram.injected_429,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """İki rapor arasındaki verim ve gecikme farklarını satırlar halinde verir"""
+    lines = [f"Compared with {baseline.get('commit')} ({baseline.get('target')}):"]
+
+    def delta(name: str, new: Optional[float], old: Optional[float], lower_is_better: bool) -> None:
+        if new is None or old is None or not old:
+            return
+        change = (new - old) / old * 100
+        better = change < 0 if lower_is_better else change > 0
+        lines.append(f"  {name:<22} {old:>10} -> {new:>10} ({change:+.1f}%{'' if better or not change else ', worse'})")
+
+    delta('messages_per_s', report['messages_per_s'], baseline.get('messages_per_s'), False)
+    for key in ('p50', 'p90', 'p99'):
+        delta(f'latency {key} ms', report['latency_ms'][key], baseline.get('latency_ms', {}).get(key), True)
+    delta('upstream calls', sum(report['upstream_calls'].values()),
+          sum(baseline.get('upstream_calls', {}).values()), True)
+    delta('telegram sends', report['telegram_calls'].get('sendMessage', 0) + report['telegram_calls'].get('editMessageText', 0),
+          baseline.get('telegram_calls', {}).get('sendMessage', 0) + baseline.get('telegram_calls', {}).get('editMessageText', 0), True)
+    delta('max_rss_mb', report['max_rss_mb'], baseline.get('max_rss_mb'), True)
+    return lines
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Komut satırı seçenekleri"""
+    parser = argparse.ArgumentParser(description='Kripto Radar offline load test')
+    parser.add_argument('--target', choices=('main', 'bot', 'sender'), default='main',
+                        help='main.py (PTB), legacy bot.py, or a TelegramSender burst that checks send limits')
+    parser.add_argument('--shards', type=int, default=1, help='worker processes for --target main (SHARD_COUNT)')
+    parser.add_argument('--users', type=int, default=2000, help='synthetic users')
+    parser.add_argument('--messages', type=int, default=5, help='messages per user')
+    parser.add_argument('--think', type=float, default=2.0, help='mean seconds between a user\'s messages')
+    parser.add_argument('--ramp', type=float, default=5.0, help='seconds over which users start')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds to wait for the first snapshot')
+    parser.add_argument('--drain-timeout', type=float, default=60.0, help='seconds to wait for the last replies')
+    parser.add_argument('--coins', type=int, default=1200, help='coins served by the fake CoinGecko')
+    parser.add_argument('--cg-latency', type=float, default=0.05, help='mean CoinGecko latency (s)')
+    parser.add_argument('--cg-error-rate', type=float, default=0.0, help='share of CoinGecko 503 responses')
+    parser.add_argument('--cg-429-rate', type=float, default=0.0, help='share of CoinGecko 429 responses')
+    parser.add_argument('--cg-calls-per-minute', type=int, default=None, help='override COINGECKO_CALLS_PER_MINUTE')
+    parser.add_argument('--tg-latency', type=float, default=0.03, help='Telegram Bot API latency (s)')
+    parser.add_argument('--tg-429-rate', type=float, default=0.0, help='share of Telegram 429 responses')
+    parser.add_argument('--tg-global-rate', type=float, default=None, help='override TELEGRAM_GLOBAL_RATE (msg/s)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    parser.add_argument('--output', default=None, help='report path (default data/loadtest/<target>-<commit>-<time>.json)')
+    parser.add_argument('--compare', default=None, help='previous report to compare against')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ortamı sahte sunuculara yönlendirir, testi çalıştırır ve raporu yazar"""
+    args = parse_args(argv)
+    random.seed(args.seed)
+
+    # config modülü ortam değişkenlerini içe aktarılırken okur; bot modülleri bundan sonra yüklenmeli
+    telegram_port, coingecko_port = _free_port(), _free_port()
+    os.environ.update({
+        'TELEGRAM_BOT_TOKEN': TOKEN,
+        'TELEGRAM_API_BASE': f'http://127.0.0.1:{telegram_port}/bot',
+        'COINGECKO_API_BASE': f'http://127.0.0.1:{coingecko_port}/api/v3',
+        'CRYPTO_RADAR_DATA_DIR': tempfile.mkdtemp(prefix='cryptoradar-loadtest-'),
+        'BOT_MODE': 'polling'
+    })
+    if args.cg_calls_per_minute:
+        os.environ['COINGECKO_CALLS_PER_MINUTE'] = str(args.cg_calls_per_minute)
+    if args.tg_global_rate:
+        os.environ['TELEGRAM_GLOBAL_RATE'] = str(args.tg_global_rate)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    report = asyncio.run(run(args, telegram_port, coingecko_port))
+
+    output = args.output or os.path.join(
+        'data', 'loadtest', f"{args.target}-{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.target == 'sender':
+        summary = ('target', 'messages_sent', 'messages_delivered', 'messages_per_s', 'max_per_second',
+                   'limits_per_second', 'limits_ok', 'retried', 'telegram_injected_429')
+    else:
+        summary = ('target', 'messages_sent', 'messages_answered', 'unanswered', 'messages_per_s',
+                   'latency_ms', 'upstream_calls', 'telegram_calls', 'max_rss_mb')
+    print(json.dumps({key: report[key] for key in summary}, indent=2, ensure_ascii=False))
+    print(f"Report written to {output}")
+
+    if args.compare and args.target != 'sender':
+        with open(args.compare, encoding='utf-8') as f:
+            print('\n'.join(compare(report, json.load(f))))
+
+    if args.target == 'sender' and not report['limits_ok']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Olay döngüsü izleyicisi
+Debug-mode detector for callbacks that block the asyncio event loop
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from config import LOOP_BLOCK_THRESHOLD, LOOP_MONITOR_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class LoopBlockMonitor:
+    """Olay döngüsünü eşik süresinden uzun süre tutan çağrıları loglar"""
+
+    def __init__(self, threshold: float = LOOP_BLOCK_THRESHOLD, interval: float = LOOP_MONITOR_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.blocked_events = 0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """İzlemeyi başlatır"""
+        loop = loop or asyncio.get_running_loop()
+
+        # asyncio debug modu yavaş callback'leri hangi handle olduğuyla birlikte loglar
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.threshold
+
+        if self._task is None:
+            self._task = loop.create_task(self._watch(loop))
+            logger.info(f"Loop block monitor started (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        """İzlemeyi durdurur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Uyku süresindeki gecikmeden döngünün bloklandığını tespit eder"""
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+
+            if lag > self.threshold:
+                self.blocked_events += 1
+                self.max_lag = max(self.max_lag, lag)
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
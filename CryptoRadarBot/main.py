@@ -6,10 +6,39 @@ Turkish Cryptocurrency Tracking Telegram Bot - Main file
 
 import logging
 import asyncio
+import signal
 from telegram import Update
+from telegram.constants import ParseMode
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from config import BOT_TOKEN
+from config import (
+    BOT_TOKEN,
+    LOOP_DEBUG,
+    TELEGRAM_API_BASE,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    DROP_PENDING_UPDATES,
+    METRICS_ENABLED,
+    METRICS_PORT,
+    SHARD_COUNT,
+    SHARD_CATALOG_POLL
+)
 from bot_handlers import BotHandlers
+from crypto_api import get_crypto_api, close_crypto_api, get_cache_stats, get_breaker_stats
+from utils import get_render_cache_stats
+from metrics import Gauge, MetricsServer
+from loop_monitor import LoopBlockMonitor
+from market_snapshot import MarketPoller
+from coin_catalog import CatalogRefresher
+from warm_start import Checkpointer, restore_checkpoint
+from alerts import AlertEngine, AlertStore
+from history import HistoryStore
+from charts import ChartService
+from webhook import WebhookServer
+from lanes import UserLaneProcessor
+from telegram_sender import TelegramSender, SenderRateLimiter
+from rate_limiter import PRIORITY_BACKGROUND
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -27,39 +56,223 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
             "⚠️ Bir hata oluştu. Lütfen daha sonra tekrar deneyin."
         )
 
+def register_gauges(application: Application) -> None:
+    """Önbellek isabet oranlarını ve kuyruk boylarını /metrics'te yayınlar"""
+    sender = application.bot_data['telegram_sender']
+    charts = application.bot_data['charts']
+    lanes = application.update_processor.lanes
+    
+    Gauge('cryptoradar_response_cache_hit_ratio', 'CoinGecko yanıt önbelleği isabet oranı',
+          lambda: get_cache_stats()['hit_ratio'])
+    Gauge('cryptoradar_render_cache_hit_ratio', 'Hazır mesaj önbelleği isabet oranı',
+          lambda: get_render_cache_stats()['hit_ratio'])
+    Gauge('cryptoradar_chart_cache_hit_ratio', 'Grafik PNG önbelleği isabet oranı',
+          lambda: charts.stats()['images']['hit_ratio'])
+    Gauge('cryptoradar_coingecko_open_circuits', 'Açık veya yarı açık CoinGecko devre kesicileri',
+          lambda: sum(stats['state'] != 'closed' for stats in get_breaker_stats().values()))
+    Gauge('cryptoradar_updates_pending', 'Kullanıcı şeritlerinde bekleyen güncellemeler', lambda: lanes.pending)
+    Gauge('cryptoradar_telegram_queue', 'Gönderim kuyruğundaki mesajlar', lambda: len(sender))
+    Gauge('cryptoradar_telegram_retried', 'Yeniden denenen Telegram gönderimleri', lambda: sender.retried)
+
+async def post_init(application: Application) -> None:
+    """Uygulama başlarken paylaşılan kaynakları açar"""
+    api = await get_crypto_api()
+    logger.info("Shared CoinGecko session opened")
+    
+    # Alarmlar her yeni anlık görüntüde değerlendirilir
+    alert_engine = application.bot_data['alert_engine']
+    await alert_engine.load()
+    sender = application.bot_data['telegram_sender']
+    alert_engine.set_notifier(
+        lambda chat_id, text: sender.send_message(chat_id, text, parse_mode=ParseMode.MARKDOWN, priority=PRIORITY_BACKGROUND)
+    )
+    
+    # Shard işçisinde piyasa verisini, kataloğu ve geçmişi koordinatör getirir; işçi yalnızca okur
+    shard = application.bot_data.get('shard')
+    if shard is None:
+        # Son kontrol noktası ilk yenilemeye kadar yanıt verir; açılışta CoinGecko'ya yüklenilmez
+        restore_checkpoint()
+        checkpointer = Checkpointer()
+        checkpointer.start()
+        application.bot_data['checkpointer'] = checkpointer
+        
+        poller = MarketPoller(api)
+        poller.add_listener(application.bot_data['history'].on_snapshot)
+    else:
+        poller = shard.follower
+    poller.add_listener(alert_engine.on_snapshot)
+    poller.start()
+    application.bot_data['market_poller'] = poller
+    
+    # Coin kataloğu ve arama indeksi arka planda hazırlanır, o zamana kadar alias'lar kullanılır
+    if shard is None:
+        catalog_refresher = CatalogRefresher(api)
+    else:
+        catalog_refresher = CatalogRefresher(api, interval=SHARD_CATALOG_POLL, download=False)
+    catalog_refresher.start()
+    application.bot_data['catalog_refresher'] = catalog_refresher
+    
+    if LOOP_DEBUG:
+        monitor = LoopBlockMonitor()
+        monitor.start()
+        application.bot_data['loop_monitor'] = monitor
+    
+    if METRICS_ENABLED:
+        register_gauges(application)
+        # Her shard işçisi kendi portunda yayınlar (METRICS_PORT + 1 + sıra)
+        metrics_server = MetricsServer(port=METRICS_PORT if shard is None else METRICS_PORT + 1 + shard.index)
+        await metrics_server.start()
+        application.bot_data['metrics_server'] = metrics_server
+
+async def post_shutdown(application: Application) -> None:
+    """Uygulama kapanırken paylaşılan kaynakları kapatır"""
+    poller = application.bot_data.pop('market_poller', None)
+    if poller:
+        await poller.stop()
+    
+    catalog_refresher = application.bot_data.pop('catalog_refresher', None)
+    if catalog_refresher:
+        await catalog_refresher.stop()
+    
+    checkpointer = application.bot_data.pop('checkpointer', None)
+    if checkpointer:
+        await checkpointer.stop()
+    
+    monitor = application.bot_data.pop('loop_monitor', None)
+    if monitor:
+        await monitor.stop()
+    
+    metrics_server = application.bot_data.pop('metrics_server', None)
+    if metrics_server:
+        await metrics_server.stop()
+    
+    await close_crypto_api()
+    logger.info("Shared CoinGecko session closed")
+    
+    sender = application.bot_data.pop('telegram_sender', None)
+    if sender:
+        await sender.stop()
+    
+    alert_engine = application.bot_data.pop('alert_engine', None)
+    if alert_engine:
+        alert_engine.store.close()
+    
+    charts = application.bot_data.pop('charts', None)
+    if charts:
+        charts.stop()
+
+def build_application() -> Application:
+    """Bot uygulamasını oluşturur ve handler'ları kaydeder"""
+    # Yanıtlar ve alarm bildirimleri aynı genel ve sohbet bazlı hız sınırlarını paylaşır
+    sender = TelegramSender(f"{TELEGRAM_API_BASE}{BOT_TOKEN}")
+    
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .base_url(TELEGRAM_API_BASE)
+        .rate_limiter(SenderRateLimiter(sender))
+        .concurrent_updates(UserLaneProcessor())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    application.bot_data['telegram_sender'] = sender
+    
+    # Alarm motoru, fiyat geçmişi, grafikler ve handler sınıfını başlat
+    alert_engine = AlertEngine(AlertStore())
+    application.bot_data['alert_engine'] = alert_engine
+    history = HistoryStore()
+    application.bot_data['history'] = history
+    charts = ChartService(history)
+    application.bot_data['charts'] = charts
+    handlers = BotHandlers(alert_engine, history, charts)
+    
+    # Komut handler'larını ekle
+    application.add_handler(CommandHandler("start", handlers.start_command))
+    application.add_handler(CommandHandler("help", handlers.help_command))
+    application.add_handler(CommandHandler("fiyat", handlers.price_command))
+    application.add_handler(CommandHandler("btc", handlers.btc_command))
+    application.add_handler(CommandHandler("eth", handlers.eth_command))
+    application.add_handler(CommandHandler("top10", handlers.top10_command))
+    application.add_handler(CommandHandler("ara", handlers.search_command))
+    application.add_handler(CommandHandler("yukselenler", handlers.top_gainers_command))
+    application.add_handler(CommandHandler("dusenler", handlers.top_losers_command))
+    application.add_handler(CommandHandler("hacim", handlers.volume_leaders_command))
+    application.add_handler(CommandHandler("gecmis", handlers.history_command))
+    application.add_handler(CommandHandler("grafik", handlers.chart_command))
+    application.add_handler(CommandHandler("alarm", handlers.alarm_command))
+    application.add_handler(CommandHandler("alarmlar", handlers.alarms_command))
+    application.add_handler(CommandHandler("alarmsil", handlers.alarm_delete_command))
+    
+    # Metin mesajları için handler
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.handle_text))
+    
+    # Hata handler'ını ekle
+    application.add_error_handler(error_handler)
+    
+    return application
+
+async def run_webhook(application: Application) -> None:
+    """Botu aiohttp webhook sunucusu ile çalıştırır"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    
+    async def process(data: dict) -> None:
+        # Yalnızca ayrıştırıp kuyruğa bırakır; webhook işçisi işleyicinin bitmesini beklemez.
+        # Güncellemeler polling ile aynı yoldan, kullanıcı şeritlerinden geçer. Bekleyen güncelleme
+        # sınırı doluysa işçi burada bekler, webhook kuyruğu dolunca Telegram'a 503 döner
+        update = Update.de_json(data, application.bot)
+        await application.update_processor.enqueue(update, application.update_queue)
+    
+    server = WebhookServer(process)
+    
+    await application.initialize()
+    await post_init(application)
+    await application.start()
+    try:
+        await server.start()
+        if WEBHOOK_URL:
+            await application.bot.set_webhook(
+                f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET or None,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=DROP_PENDING_UPDATES
+            )
+            logger.info("Webhook registered with Telegram")
+        
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        await application.stop()
+        await post_shutdown(application)
+        await application.shutdown()
+
 def main():
     """Ana fonksiyon - Botu başlatır"""
     try:
-        # Bot uygulamasını oluştur
-        application = Application.builder().token(BOT_TOKEN).build()
+        if SHARD_COUNT > 1:
+            # Tek giriş noktası güncellemeleri chat_id'ye göre işçi süreçlere dağıtır
+            from sharding import run_sharded
+            logger.info(f"🚀 Kripto Radar Botu {SHARD_COUNT} işçiyle başlatılıyor ({BOT_MODE})...")
+            asyncio.run(run_sharded(SHARD_COUNT))
+            return
         
-        # Handler sınıfını başlat
-        handlers = BotHandlers()
-        
-        # Komut handler'larını ekle
-        application.add_handler(CommandHandler("start", handlers.start_command))
-        application.add_handler(CommandHandler("help", handlers.help_command))
-        application.add_handler(CommandHandler("fiyat", handlers.price_command))
-        application.add_handler(CommandHandler("btc", handlers.btc_command))
-        application.add_handler(CommandHandler("eth", handlers.eth_command))
-        application.add_handler(CommandHandler("top10", handlers.top10_command))
-        application.add_handler(CommandHandler("ara", handlers.search_command))
-        application.add_handler(CommandHandler("yukselenler", handlers.top_gainers_command))
-        
-        # Metin mesajları için handler
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.handle_text))
-        
-        # Hata handler'ını ekle
-        application.add_error_handler(error_handler)
+        # Bot uygulamasını oluştur
+        application = build_application()
         
-        logger.info("🚀 Kripto Radar Botu başlatılıyor...")
+        logger.info(f"🚀 Kripto Radar Botu başlatılıyor ({BOT_MODE})...")
         
         # Botu çalıştır
-        application.run_polling(drop_pending_updates=True)
+        if BOT_MODE == "webhook":
+            asyncio.run(run_webhook(application))
+        else:
+            application.run_polling(drop_pending_updates=DROP_PENDING_UPDATES)
         
     except Exception as e:
         logger.error(f"Bot başlatılırken hata oluştu: {e}")
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
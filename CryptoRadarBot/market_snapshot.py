@@ -0,0 +1,268 @@
+"""
+Piyasa verisi anlık görüntüsü
+Background market snapshot poller serving reads from memory
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from config import (
+    CRYPTO_ALIASES,
+    SNAPSHOT_TOP_N,
+    SNAPSHOT_PAGE_SIZE,
+    SNAPSHOT_REFRESH_INTERVAL,
+    SNAPSHOT_MAX_AGE
+)
+
+logger = logging.getLogger(__name__)
+
+# Sayısal sütunlar ve coins/markets yanıtındaki karşılıkları
+NUMERIC_FIELDS = {
+    'price': 'current_price',
+    'change_1h': 'price_change_percentage_1h_in_currency',
+    'change_24h': 'price_change_percentage_24h_in_currency',
+    'change_7d': 'price_change_percentage_7d_in_currency',
+    'volume': 'total_volume',
+    'market_cap': 'market_cap',
+    'rank': 'market_cap_rank'
+}
+
+class MarketSnapshot:
+    """coins/markets verisinin sütun bazlı (NumPy) bellek içi kopyası"""
+
+    restored = False  # kontrol noktasından yüklendiyse True (ilk yenilemeye kadar eski olsa da kullanılır)
+
+    def __init__(self, ids: List[str], symbols: List[str], names: List[str],
+                 columns: Dict[str, np.ndarray], try_rate: Optional[float],
+                 updated_at: float, version: int):
+        self.ids = ids
+        self.symbols = symbols
+        self.names = names
+        self.columns = columns
+        self.index = {coin_id: row for row, coin_id in enumerate(ids)}
+        self.try_rate = try_rate  # 1 USD kaç TL
+        self.updated_at = updated_at
+        self.version = version
+
+    @classmethod
+    def from_markets(cls, coins: List[Dict], try_rate: Optional[float],
+                     updated_at: float, version: int) -> 'MarketSnapshot':
+        """coins/markets satırlarından anlık görüntü oluşturur"""
+        columns = {}
+        for field, key in NUMERIC_FIELDS.items():
+            values = [coin.get(key) for coin in coins]
+            columns[field] = np.array(
+                [np.nan if value is None else value for value in values], dtype=np.float64
+            )
+
+        # Bazı yanıtlarda 24s değişim yalnızca eski alanda gelir
+        missing = np.isnan(columns['change_24h'])
+        if missing.any():
+            fallback = [coins[row].get('price_change_percentage_24h') for row in np.flatnonzero(missing)]
+            # 0.0 geçerli bir değişimdir, yalnızca eksik değer NaN olur
+            columns['change_24h'][missing] = [np.nan if value is None else value for value in fallback]
+
+        return cls(
+            [coin['id'] for coin in coins],
+            [coin.get('symbol') or '' for coin in coins],
+            [coin.get('name') or '' for coin in coins],
+            columns,
+            try_rate,
+            updated_at,
+            version
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def age(self) -> float:
+        """Anlık görüntünün yaşını saniye olarak döndürür"""
+        return time.time() - self.updated_at
+
+    def _value(self, field: str, row: int) -> Optional[float]:
+        """Hücre değerini döndürür, NaN ise None"""
+        value = self.columns[field][row]
+        return None if np.isnan(value) else float(value)
+
+    def row(self, row: int) -> Dict:
+        """Satırı coins/markets biçiminde sözlük olarak döndürür"""
+        coin = {'id': self.ids[row], 'symbol': self.symbols[row], 'name': self.names[row]}
+        for field, key in NUMERIC_FIELDS.items():
+            coin[key] = self._value(field, row)
+        coin['price_change_percentage_24h'] = coin['price_change_percentage_24h_in_currency']
+        coin['last_updated_at'] = int(self.updated_at)
+        return coin
+
+    def rows(self, rows) -> List[Dict]:
+        """Birden fazla satırı sözlük listesi olarak döndürür"""
+        return [self.row(int(row)) for row in rows]
+
+    def get_price(self, coin_id: str) -> Optional[Dict]:
+        """Coin verisini simple/price yanıtı biçiminde döndürür"""
+        row = self.index.get(coin_id)
+        if row is None:
+            return None
+
+        usd_price = self._value('price', row)
+        if usd_price is None:
+            return None
+
+        return {
+            'usd': usd_price,
+            'try': usd_price * self.try_rate if self.try_rate else 0,
+            'usd_24h_change': self._value('change_24h', row) or 0,
+            'usd_market_cap': self._value('market_cap', row) or 0,
+            'usd_24h_vol': self._value('volume', row) or 0,
+            'last_updated_at': int(self.updated_at)
+        }
+
+    def top_k(self, field: str, k: int, descending: bool = True, min_volume: float = 0) -> np.ndarray:
+        """Bir sütuna göre ilk k satırın indekslerini sıralı döndürür (tam sıralama yapmadan)"""
+        values = self.columns[field]
+        mask = ~np.isnan(values)
+        if min_volume:
+            mask &= self.columns['volume'] >= min_volume
+
+        candidates = np.flatnonzero(mask)
+        if k <= 0 or not len(candidates):
+            return candidates[:0]
+
+        keys = values[candidates]
+        if descending:
+            keys = -keys
+
+        # Önce argpartition ile ilk k'yı ayır, sonra yalnızca onları sırala
+        if k < len(candidates):
+            selected = np.argpartition(keys, k - 1)[:k]
+        else:
+            selected = np.arange(len(candidates))
+
+        return candidates[selected[np.argsort(keys[selected], kind='stable')]]
+
+    def top(self, limit: int) -> List[Dict]:
+        """Piyasa değerine göre ilk N coini döndürür"""
+        return self.rows(self.top_k('market_cap', limit))
+
+    def top_gainers(self, window: str = '1h', limit: int = 5, min_volume: float = 0) -> List[Dict]:
+        """Verilen aralıkta en çok yükselen coinleri döndürür"""
+        return self.rows(self.top_k(f'change_{window}', limit, min_volume=min_volume))
+
+    def top_losers(self, window: str = '1h', limit: int = 5, min_volume: float = 0) -> List[Dict]:
+        """Verilen aralıkta en çok düşen coinleri döndürür"""
+        return self.rows(self.top_k(f'change_{window}', limit, descending=False, min_volume=min_volume))
+
+    def volume_leaders(self, limit: int = 10) -> List[Dict]:
+        """24 saatlik işlem hacmi en yüksek coinleri döndürür"""
+        return self.rows(self.top_k('volume', limit))
+
+# Okuyucuların kullandığı güncel anlık görüntü
+_current: Optional[MarketSnapshot] = None
+
+def get_snapshot(max_age: float = SNAPSHOT_MAX_AGE) -> Optional[MarketSnapshot]:
+    """Yeterince taze anlık görüntüyü döndürür, yoksa None"""
+    if _current is None or _current.age() > max_age:
+        return None
+    return _current
+
+def set_snapshot(snapshot: Optional[MarketSnapshot]) -> None:
+    """Güncel anlık görüntüyü değiştirir"""
+    global _current
+    _current = snapshot
+
+class MarketPoller:
+    """coins/markets verisini sabit aralıkla yenileyen arka plan görevi"""
+
+    def __init__(self, api, top_n: int = SNAPSHOT_TOP_N, interval: float = SNAPSHOT_REFRESH_INTERVAL):
+        self.api = api
+        self.top_n = top_n
+        self.interval = interval
+        self.version = 0
+        self._listeners: List[Callable] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable) -> None:
+        """Her yeni anlık görüntüde çağrılacak fonksiyonu ekler (senkron veya async)"""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Yenileme döngüsünü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Market poller started (top {self.top_n}, every {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Yenileme döngüsünü durdurur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ana yenileme döngüsü"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Market snapshot refresh failed: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> Optional[MarketSnapshot]:
+        """Piyasa verisini çekip yeni anlık görüntüyü yayınlar"""
+        started = time.monotonic()
+        coins: List[Dict] = []
+        per_page = min(SNAPSHOT_PAGE_SIZE, self.top_n)
+        page = 1
+
+        while len(coins) < self.top_n:
+            data = await self.api.get_market_page(page, per_page)
+            if not data:
+                break
+
+            coins.extend(data)
+            if len(data) < per_page:
+                break
+            page += 1
+
+        if not coins:
+            logger.warning("Market snapshot refresh returned no data, keeping previous snapshot")
+            return None
+
+        coins = coins[:self.top_n]
+
+        # Top N dışında kalan, alias listesindeki coinleri ayrıca getir
+        known_ids = {coin['id'] for coin in coins}
+        missing_ids = sorted(set(CRYPTO_ALIASES.values()) - known_ids)
+        if missing_ids:
+            extra = await self.api.get_market_page(1, len(missing_ids), ids=missing_ids)
+            if extra:
+                coins.extend(extra)
+
+        try_rate = await self.api.get_usd_try_rate()
+        if try_rate is None and _current is not None:
+            try_rate = _current.try_rate
+
+        self.version += 1
+        snapshot = MarketSnapshot.from_markets(coins, try_rate, time.time(), self.version)
+        set_snapshot(snapshot)
+
+        logger.info(
+            f"Market snapshot v{self.version} refreshed: {len(coins)} coins "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+        for listener in self._listeners:
+            try:
+                result = listener(snapshot)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Market snapshot listener failed: {e}")
+
+        return snapshot
@@ -0,0 +1,201 @@
+"""
+Metrikler
+In-process counters and latency histograms with a Prometheus text /metrics endpoint
+"""
+
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from aiohttp import web
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Tüm metrikler isimleriyle burada tutulur, /metrics bu sırayla yazılır
+_registry: Dict[str, 'Metric'] = {}
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    """Etiketleri {ad="değer",...} biçiminde yazar"""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Metric:
+    """Ortak metrik alanları; etiket değerleri demeti başına bir alt seri tutar"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple, object] = {}
+        _registry[name] = self
+
+    def render(self) -> List[str]:
+        """Metriği Prometheus metin biçiminde satırlara çevirir"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in sorted(self._series.items()):
+            lines.extend(self._render_series(values, series))
+        return lines
+
+    def _render_series(self, values: Tuple, series) -> List[str]:
+        """Tek bir seriyi satırlara çevirir"""
+        return [f"{self.name}{_format_labels(self.labels, values)} {series}"]
+
+class Counter(Metric):
+    """Yalnızca artan sayaç"""
+
+    kind = 'counter'
+
+    def inc(self, *values, amount: float = 1) -> None:
+        """Etiket değerleri verilen seriyi artırır"""
+        self._series[values] = self._series.get(values, 0) + amount
+
+    def value(self, *values) -> float:
+        """Serinin güncel değeri"""
+        return self._series.get(values, 0)
+
+class Gauge(Metric):
+    """Okunduğu anda fonksiyondan hesaplanan değer (önbellek oranları, kuyruk boyları)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, read: Callable[[], float]):
+        super().__init__(name, description)
+        self.read = read
+
+    def render(self) -> List[str]:
+        """Değeri okuyup tek satır yazar; okunamazsa metriği atlar"""
+        try:
+            value = float(self.read())
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} could not be read: {e}")
+            return []
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+class Histogram(Metric):
+    """Sabit sınırlı kova histogramı; gözlem başına bir ikili arama ve iki toplama.
+    Tek olay döngüsünden yazıldığı için kilit gerekmez"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.bounds = tuple(sorted(buckets))
+
+    def observe(self, value: float, *values) -> None:
+        """Gözlemi kovasına ekler"""
+        series = self._series.get(values)
+        if series is None:
+            # [kova sayıları..., +Inf sayısı, toplam]
+            series = self._series[values] = [0] * (len(self.bounds) + 1) + [0.0]
+        series[bisect_left(self.bounds, value)] += 1
+        series[-1] += value
+
+    def quantile(self, q: float, *values) -> Optional[float]:
+        """Kova sınırlarından yaklaşık yüzdelik (p50, p99) hesaplar"""
+        series = self._series.get(values)
+        if not series:
+            return None
+        counts = series[:-1]
+        total = sum(counts)
+        if not total:
+            return None
+        target = q * total
+        running = 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def _render_series(self, values: Tuple, series) -> List[str]:
+        """Birikimli kova, toplam ve sayı satırlarını yazar"""
+        lines = []
+        running = 0
+        for bound, count in zip(self.bounds + ('+Inf',), series):
+            running += count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {running}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {series[-1]}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {running}")
+        return lines
+
+def timed(histogram: Histogram, *values) -> Callable:
+    """Async fonksiyonun süresini histograma yazan dekoratör.
+    Metrikler kapalıysa fonksiyonu olduğu gibi döndürür (ek maliyet yok)"""
+    def decorator(func: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *values)
+        return wrapper
+    return decorator
+
+def render_metrics() -> str:
+    """Tüm metrikleri Prometheus metin biçiminde döndürür"""
+    lines: List[str] = []
+    for metric in _registry.values():
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# Sıcak yol metrikleri
+COMMAND_LATENCY = Histogram(
+    'cryptoradar_command_seconds', 'Bot komutlarının işlenme süresi', ['command']
+)
+COINGECKO_LATENCY = Histogram(
+    'cryptoradar_coingecko_request_seconds', 'CoinGecko HTTP isteklerinin süresi', ['endpoint']
+)
+COINGECKO_RESPONSES = Counter(
+    'cryptoradar_coingecko_responses_total', 'CoinGecko yanıtları (durum kodu, timeout veya error)',
+    ['endpoint', 'status']
+)
+COINGECKO_RETRIES = Counter(
+    'cryptoradar_coingecko_retries_total', 'Yeniden denenen CoinGecko istekleri', ['endpoint']
+)
+UPDATES_DROPPED = Counter(
+    'cryptoradar_updates_dropped_total', 'Kullanıcı sıra veya hız sınırına takılıp düşürülen güncellemeler'
+)
+TELEGRAM_RESPONSES = Counter(
+    'cryptoradar_telegram_responses_total', 'Telegram Bot API yanıtları (durum kodu veya error)',
+    ['method', 'status']
+)
+
+class MetricsServer:
+    """Metrikleri yerel bir aiohttp sunucusunda /metrics adresinden sunar"""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Prometheus metin biçiminde metrikleri döndürür"""
+        return web.Response(text=render_metrics(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self) -> None:
+        """HTTP sunucusunu başlatır"""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics server listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """HTTP sunucusunu kapatır"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
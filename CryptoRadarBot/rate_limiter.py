@@ -0,0 +1,135 @@
+"""
+Hız sınırlayıcı
+Token-bucket rate limiting with priority lanes and jittered backoff
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+from config import BACKOFF_BASE, BACKOFF_MAX
+
+# Öncelik şeritleri: küçük değer önce çalışır
+PRIORITY_INTERACTIVE = 0  # Kullanıcı komutları
+PRIORITY_BACKGROUND = 1  # Anlık görüntü, katalog gibi arka plan yenilemeleri
+
+class TokenBucket:
+    """Saniyede `rate` token dolan, en fazla `capacity` token tutan kova"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')  # kullanıcı başına binlerce kova tutulabilir
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """Geçen süreye göre token ekler"""
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def try_take(self, amount: float = 1.0, now: Optional[float] = None) -> bool:
+        """Yeterli token varsa harcar ve True döndürür"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def wait_time(self, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Token birikene kadar beklenmesi gereken süre (saniye)"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+class RateLimiter:
+    """Öncelik şeritli, Retry-After cezalarına uyan asenkron hız sınırlayıcı"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.throttled = 0  # Beklemek zorunda kalan istek sayısı
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Bir istek hakkı alınana kadar bekler"""
+        now = time.monotonic()
+        if not self._waiters and now >= self._blocked_until and self.bucket.try_take(now=now):
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.throttled += 1
+        self._schedule()
+        await future
+
+    def penalize(self, delay: float) -> None:
+        """Sunucu hız sınırı bildirdiğinde tüm istekleri `delay` saniye durdurur"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def blocked_for(self) -> float:
+        """Cezanın bitmesine kalan süre"""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def _schedule(self) -> None:
+        """Bir sonraki uyanmayı planlar"""
+        if self._timer is not None:
+            return
+
+        now = time.monotonic()
+        if now < self._blocked_until:
+            delay = self._blocked_until - now
+        else:
+            delay = self.bucket.wait_time(now=now)
+
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        """Token oldukça en öncelikli bekleyenleri serbest bırakır"""
+        self._timer = None
+        now = time.monotonic()
+
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if now < self._blocked_until or not self.bucket.try_take(now=now):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        if self._waiters:
+            self._schedule()
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Üstel artan, tam rastgele (full jitter) bekleme süresi"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After başlığını (saniye veya HTTP tarihi) saniyeye çevirir"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
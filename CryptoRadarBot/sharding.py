@@ -0,0 +1,478 @@
+"""
+Yatay ölçekleme
+Chat-sharded worker processes sharing one market snapshot and one rate-limit budget
+through local shared memory, fed by a single polling/webhook ingress
+"""
+
+import asyncio
+import ctypes
+import inspect
+import logging
+import multiprocessing
+import pickle
+import queue
+import signal
+import struct
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+import aiohttp
+from config import (
+    BOT_TOKEN,
+    BOT_MODE,
+    TELEGRAM_API_BASE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GLOBAL_BURST,
+    COINGECKO_CALLS_PER_MINUTE,
+    COINGECKO_BURST,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    DROP_PENDING_UPDATES,
+    SHARD_QUEUE_SIZE,
+    SHARD_SNAPSHOT_BYTES,
+    SHARD_SNAPSHOT_POLL
+)
+from market_snapshot import MarketSnapshot, MarketPoller, get_snapshot, set_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sohbet kimliğinin bulunduğu güncelleme alanları (Telegram Update nesnesi)
+_CHAT_FIELDS = ('message', 'edited_message', 'channel_post', 'edited_channel_post',
+                'my_chat_member', 'chat_member', 'chat_join_request')
+# Sohbeti olmayan güncellemelerde kullanıcı kimliğine bakılır
+_USER_FIELDS = ('callback_query', 'inline_query', 'chosen_inline_result',
+                'shipping_query', 'pre_checkout_query', 'poll_answer')
+
+# Paylaşılan hız kovalarının sırası (her kova iki double: token, son güncelleme)
+COINGECKO_BUCKET = 0
+TELEGRAM_BUCKET = 1
+
+def update_chat_id(update: Dict) -> Optional[int]:
+    """Ham güncellemenin ait olduğu sohbeti (yoksa kullanıcıyı) bulur"""
+    for field in _CHAT_FIELDS:
+        item = update.get(field)
+        if item and 'chat' in item:
+            return item['chat']['id']
+
+    for field in _USER_FIELDS:
+        item = update.get(field)
+        if not item:
+            continue
+        message = item.get('message')
+        if message and 'chat' in message:
+            return message['chat']['id']
+        user = item.get('from') or item.get('user')
+        if user:
+            return user['id']
+    return None
+
+def shard_for(chat_id: Optional[int], count: int) -> int:
+    """Sohbetin sahibi olan işçinin sırası; sohbetsiz güncellemeler ilk işçiye gider"""
+    if chat_id is None:
+        return 0
+    return chat_id % count
+
+class SharedTokenBucket:
+    """TokenBucket ile aynı arayüzde, durumu süreçler arası paylaşılan bellekte duran kova.
+    time.monotonic tüm süreçlerde aynı saati kullanır; kilit yalnızca birkaç işlem tutulur"""
+
+    def __init__(self, state, slot: int, rate: float, capacity: float, lock):
+        self.rate = rate
+        self.capacity = capacity
+        self._state = state  # ctypes double dizisi: [token, son güncelleme, ...]
+        self._offset = slot * 2
+        self._lock = lock
+
+    @staticmethod
+    def allocate(context, capacities: List[float]):
+        """Dolu kovalarla başlayan paylaşılan durum dizisini oluşturur (kova başına iki double)"""
+        now = time.monotonic()
+        initial = []
+        for capacity in capacities:
+            initial.extend((capacity, now))
+        return context.RawArray(ctypes.c_double, initial)
+
+    def _refill(self, now: float) -> None:
+        """Geçen süreye göre token ekler (kilit altında çağrılır)"""
+        updated = self._state[self._offset + 1]
+        if now > updated:
+            tokens = self._state[self._offset] + (now - updated) * self.rate
+            self._state[self._offset] = min(self.capacity, tokens)
+            self._state[self._offset + 1] = now
+
+    def try_take(self, amount: float = 1.0, now: Optional[float] = None) -> bool:
+        """Yeterli token varsa harcar ve True döndürür"""
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            if self._state[self._offset] >= amount:
+                self._state[self._offset] -= amount
+                return True
+            return False
+
+    def wait_time(self, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Token birikene kadar beklenmesi gereken süre (saniye)"""
+        with self._lock:
+            self._refill(time.monotonic() if now is None else now)
+            tokens = self._state[self._offset]
+        if tokens >= amount:
+            return 0.0
+        return (amount - tokens) / self.rate
+
+class SharedSnapshot:
+    """Anlık görüntüyü paylaşılan bellekte tutan tek yazarlı, çok okuyuculu alan (seqlock).
+    Yazar sırayı tek sayıya çekip yazar, sonra çift yapar; okuyucu iki okuma arasında
+    sıra değiştiyse ya da tekse yazımı yarım gördüğünü anlar ve sonraki turda tekrar dener"""
+
+    HEADER = struct.Struct('<QQ')  # sıra numarası, veri uzunluğu
+
+    def __init__(self, buffer):
+        self.buffer = buffer  # multiprocessing.RawArray(c_char)
+        self._view = memoryview(buffer).cast('B')
+        self._sequence = 0
+
+    def publish(self, snapshot: MarketSnapshot) -> bool:
+        """Anlık görüntüyü yazar (yalnızca koordinatör çağırır)"""
+        payload = pickle.dumps((
+            snapshot.ids, snapshot.symbols, snapshot.names, snapshot.columns,
+            snapshot.try_rate, snapshot.updated_at, snapshot.version, snapshot.restored
+        ), protocol=pickle.HIGHEST_PROTOCOL)
+
+        start = self.HEADER.size
+        if start + len(payload) > len(self._view):
+            logger.error(f"Snapshot of {len(payload)} bytes does not fit in shared memory, raise SHARD_SNAPSHOT_BYTES")
+            return False
+
+        self._sequence += 1
+        self.HEADER.pack_into(self._view, 0, self._sequence, 0)
+        self._view[start:start + len(payload)] = payload
+        self._sequence += 1
+        self.HEADER.pack_into(self._view, 0, self._sequence, len(payload))
+        return True
+
+    def sequence(self) -> int:
+        """Son yayının sıra numarası"""
+        return self.HEADER.unpack_from(self._view, 0)[0]
+
+    def read(self, after: int = 0) -> Optional[tuple]:
+        """`after` sırasından yeni, tutarlı bir anlık görüntü varsa (sıra, anlık görüntü) döndürür"""
+        sequence, length = self.HEADER.unpack_from(self._view, 0)
+        if sequence == after or sequence % 2 or not length:
+            return None
+
+        start = self.HEADER.size
+        payload = bytes(self._view[start:start + length])
+        if self.HEADER.unpack_from(self._view, 0)[0] != sequence:
+            return None  # okurken yenisi yazıldı
+
+        ids, symbols, names, columns, try_rate, updated_at, version, restored = pickle.loads(payload)
+        snapshot = MarketSnapshot(ids, symbols, names, columns, try_rate, updated_at, version)
+        snapshot.restored = restored
+        return sequence, snapshot
+
+class SnapshotFollower:
+    """İşçide MarketPoller'ın yerini alır: paylaşılan anlık görüntüyü izler ve dinleyicileri çağırır"""
+
+    def __init__(self, shared: SharedSnapshot, interval: float = SHARD_SNAPSHOT_POLL):
+        self.shared = shared
+        self.interval = interval
+        self.version = 0
+        self._sequence = 0
+        self._listeners: List[Callable] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable) -> None:
+        """Her yeni anlık görüntüde çağrılacak fonksiyonu ekler (senkron veya async)"""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """İzleme döngüsünü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """İzleme döngüsünü durdurur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Ana döngü"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Shared snapshot read failed: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> Optional[MarketSnapshot]:
+        """Yeni anlık görüntü yayınlandıysa alır ve dinleyicileri çağırır"""
+        result = self.shared.read(self._sequence)
+        if result is None:
+            return None
+
+        self._sequence, snapshot = result
+        self.version = snapshot.version
+        set_snapshot(snapshot)
+
+        for listener in self._listeners:
+            try:
+                result = listener(snapshot)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Market snapshot listener failed: {e}")
+
+        return snapshot
+
+class ShardContext(NamedTuple):
+    """İşçinin sırası, toplam işçi sayısı ve anlık görüntü kaynağı (bot_data['shard'])"""
+    index: int
+    count: int
+    follower: SnapshotFollower
+
+def run_worker(index: int, count: int, updates, snapshot_buffer, buckets, bucket_lock) -> None:
+    """İşçi sürecinin giriş noktası (spawn ile başlatılır)"""
+    # Ctrl+C tüm süreç grubuna gider; işçiler koordinatörün kapanış işaretini bekler.
+    # SIGTERM ise doğrudan işçiye de gelebilir (systemd, docker stop); _worker onu yakalayıp düzgün kapanır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker(index, count, updates, snapshot_buffer, buckets, bucket_lock))
+
+async def _worker(index: int, count: int, updates, snapshot_buffer, buckets, bucket_lock) -> None:
+    """Sahip olduğu sohbetlerin güncellemelerini tam bir bot uygulamasıyla işler"""
+    # main, handler'ları ve post_init'i tanımlar; döngüsel içe aktarmayı önlemek için burada yüklenir
+    import main
+    from telegram import Update
+    from crypto_api import share_rate_limit
+
+    # Yalnızca CoinGecko kotası paylaşılır. Yanıt önbelleği, SingleFlight ve PriceBatcher süreç
+    # başınadır: aynı anahtarı farklı işçilerdeki sohbetler isterse TTL başına en fazla işçi sayısı
+    # kadar istek gider. Piyasa verisi anlık görüntüden okunduğu için bu yalnızca listede olmayan
+    # coinlerin fiyat/detay sorgularını etkiler; sohbetler hep aynı işçiye düştüğünden tek
+    # kullanıcının tekrarları yine tek isteğe iner
+    share_rate_limit(SharedTokenBucket(
+        buckets, COINGECKO_BUCKET, COINGECKO_CALLS_PER_MINUTE / 60, COINGECKO_BURST, bucket_lock
+    ))
+
+    application = main.build_application()
+    application.bot_data['telegram_sender'].share_global_bucket(SharedTokenBucket(
+        buckets, TELEGRAM_BUCKET, TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_BURST, bucket_lock
+    ))
+    application.bot_data['shard'] = ShardContext(index, count, SnapshotFollower(SharedSnapshot(snapshot_buffer)))
+    application.bot_data['alert_engine'].owns = lambda chat_id: shard_for(chat_id, count) == index
+    application.bot_data['history'].readonly = True
+
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+
+    def request_stop() -> None:
+        # Koordinatörün işaretiyle aynı yol: sıradaki güncellemeler işlenir, sonra uygulama durdurulur.
+        # Kuyruk doluysa işaret konamaz; döngü bir sonraki güncellemede durur
+        logger.info(f"Shard {index + 1}/{count} received SIGTERM, shutting down")
+        try:
+            updates.put_nowait(None)
+        except queue.Full:
+            stopping.set()
+
+    loop.add_signal_handler(signal.SIGTERM, request_stop)
+
+    await application.initialize()
+    await main.post_init(application)
+    await application.start()
+    logger.info(f"Shard {index + 1}/{count} started")
+    processor = application.update_processor
+    try:
+        while True:
+            # Şeritlerde yer açılmadan süreçler arası kuyruktan alınmaz; o kuyruk dolunca koordinatör bekler
+            await processor.wait_for_capacity()
+            data = await loop.run_in_executor(None, updates.get)
+            if data is None or stopping.is_set():
+                break
+            # PTB'nin güncelleme döngüsü kullanıcı şeritlerinden geçirir
+            await processor.enqueue(Update.de_json(data, application.bot), application.update_queue)
+    finally:
+        await application.stop()
+        await main.post_shutdown(application)
+        await application.shutdown()
+        logger.info(f"Shard {index + 1}/{count} stopped")
+
+class ShardCoordinator:
+    """Tek giriş noktası: güncellemeleri alır ve sahibi olan işçiye yollar.
+    CoinGecko piyasa verisini, kataloğu ve fiyat geçmişini yalnızca koordinatör getirir/yazar,
+    işçiler anlık görüntüyü paylaşılan bellekten okur"""
+
+    def __init__(self, count: int, mode: str = BOT_MODE, queue_size: int = SHARD_QUEUE_SIZE):
+        self.count = count
+        self.mode = mode
+        self.api_url = f"{TELEGRAM_API_BASE}{BOT_TOKEN}"
+        self.routed = [0] * count
+        # fork yerine spawn: olay döngüsü ve açık oturumlar alt sürece kopyalanmaz
+        self._context = multiprocessing.get_context('spawn')
+        self.snapshot = SharedSnapshot(self._context.RawArray(ctypes.c_char, SHARD_SNAPSHOT_BYTES))
+        self._bucket_lock = self._context.Lock()
+        self._buckets = SharedTokenBucket.allocate(self._context, [COINGECKO_BURST, TELEGRAM_GLOBAL_BURST])
+        self._queues = [self._context.Queue(queue_size) for _ in range(count)]
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._poller: Optional[MarketPoller] = None
+        self._catalog_refresher = None
+        self._checkpointer = None
+        self._history = None
+        self._webhook = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ingress: Optional[asyncio.Task] = None
+        self._offset = 0
+
+    async def route(self, update: Dict) -> None:
+        """Güncellemeyi sahibi olan işçinin kuyruğuna koyar; kuyruk doluysa yer açılmasını bekler"""
+        shard = shard_for(update_chat_id(update), self.count)
+        target = self._queues[shard]
+        while True:
+            try:
+                target.put_nowait(update)
+                break
+            except queue.Full:
+                await asyncio.sleep(0.05)
+        self.routed[shard] += 1
+
+    async def start(self) -> None:
+        """Paylaşılan kaynakları, işçileri ve güncelleme alımını başlatır"""
+        from crypto_api import get_crypto_api, share_rate_limit
+        from coin_catalog import CatalogRefresher
+        from history import HistoryStore
+        from warm_start import Checkpointer, restore_checkpoint
+
+        share_rate_limit(SharedTokenBucket(
+            self._buckets, COINGECKO_BUCKET, COINGECKO_CALLS_PER_MINUTE / 60, COINGECKO_BURST, self._bucket_lock
+        ))
+        api = await get_crypto_api()
+
+        # Kontrol noktasındaki anlık görüntü işçilere ilk yenilemeden önce yayınlanır
+        if restore_checkpoint():
+            restored = get_snapshot(float('inf'))
+            if restored is not None:
+                self.snapshot.publish(restored)
+
+        for index, updates in enumerate(self._queues):
+            process = self._context.Process(
+                target=run_worker, name=f"shard-{index}",
+                args=(index, self.count, updates, self.snapshot.buffer, self._buckets, self._bucket_lock)
+            )
+            process.start()
+            self._processes.append(process)
+
+        self._history = HistoryStore()
+        self._poller = MarketPoller(api)
+        self._poller.add_listener(self.snapshot.publish)
+        self._poller.add_listener(self._history.on_snapshot)
+        self._poller.start()
+
+        self._catalog_refresher = CatalogRefresher(api)
+        self._catalog_refresher.start()
+
+        self._checkpointer = Checkpointer()
+        self._checkpointer.start()
+
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60))
+        if self.mode == "webhook":
+            await self._start_webhook()
+        else:
+            await self._call('deleteWebhook', {'drop_pending_updates': DROP_PENDING_UPDATES})
+            self._ingress = asyncio.create_task(self._poll())
+
+        logger.info(f"Shard coordinator started with {self.count} workers ({self.mode})")
+
+    async def _call(self, method: str, data: Dict) -> Dict:
+        """Telegram Bot API çağrısı"""
+        async with self._session.post(f"{self.api_url}/{method}", json=data) as response:
+            return await response.json()
+
+    async def _start_webhook(self) -> None:
+        """Webhook sunucusunu yönlendirici olarak başlatır"""
+        from webhook import WebhookServer
+
+        self._webhook = WebhookServer(self.route)
+        await self._webhook.start()
+        if WEBHOOK_URL:
+            data = {'url': f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}", 'drop_pending_updates': DROP_PENDING_UPDATES}
+            if WEBHOOK_SECRET:
+                data['secret_token'] = WEBHOOK_SECRET
+            logger.info(f"setWebhook: {await self._call('setWebhook', data)}")
+
+    async def _poll(self) -> None:
+        """getUpdates döngüsü: gelen güncellemeler sırayla yönlendirilir"""
+        while True:
+            try:
+                data = await self._call('getUpdates', {'offset': self._offset, 'timeout': 30})
+                for update in data.get('result', []) if data.get('ok') else []:
+                    self._offset = update['update_id'] + 1
+                    await self.route(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error getting updates: {e}")
+                await asyncio.sleep(5)
+
+    async def stop(self, timeout: float = 15.0) -> None:
+        """Alımı durdurur, işçilerin kuyruklarını bitirmesini bekler ve kaynakları kapatır"""
+        from crypto_api import close_crypto_api
+
+        if self._ingress is not None:
+            self._ingress.cancel()
+            try:
+                await self._ingress
+            except asyncio.CancelledError:
+                pass
+            self._ingress = None
+        if self._webhook is not None:
+            await self._webhook.stop()
+            self._webhook = None
+
+        # Kuyruk sırasına göre işaret en sona düşer, bekleyen güncellemeler önce işlenir
+        for updates in self._queues:
+            updates.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            await asyncio.to_thread(process.join, max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                # SIGTERM işçide düzgün kapanışı başlatır, takılan işçi ancak SIGKILL ile durur
+                logger.warning(f"{process.name} did not stop in time, killing")
+                process.kill()
+                await asyncio.to_thread(process.join)
+        self._processes.clear()
+
+        if self._poller is not None:
+            await self._poller.stop()
+        if self._catalog_refresher is not None:
+            await self._catalog_refresher.stop()
+        if self._checkpointer is not None:
+            await self._checkpointer.stop()
+        if self._session is not None:
+            await self._session.close()
+        await close_crypto_api()
+        logger.info(f"Shard coordinator stopped (routed {sum(self.routed)} updates: {self.routed})")
+
+    def stats(self) -> Dict:
+        """Yönlendirme ve süreç durumunu döndürür"""
+        return {
+            'routed': list(self.routed),
+            'alive': sum(process.is_alive() for process in self._processes),
+            'snapshot_sequence': self.snapshot.sequence()
+        }
+
+async def run_sharded(count: int) -> None:
+    """Koordinatörü çalıştırır, SIGINT/SIGTERM gelene kadar bekler"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    coordinator = ShardCoordinator(count)
+    await coordinator.start()
+    try:
+        await stop_event.wait()
+    finally:
+        await coordinator.stop()
@@ -0,0 +1,366 @@
+"""
+Telegram gönderim kuyruğu
+Outbound Telegram dispatcher with global/per-chat token buckets and 429 handling
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+import aiohttp
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from config import (
+    API_TIMEOUT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_GLOBAL_BURST,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_MAX_RETRIES,
+    METRICS_ENABLED
+)
+from rate_limiter import TokenBucket, PRIORITY_INTERACTIVE, backoff_delay
+from metrics import TELEGRAM_RESPONSES
+
+logger = logging.getLogger(__name__)
+
+# Bu kadar sohbet kovası birikince dolu (boşta) olanlar silinir
+_CHAT_BUCKET_PRUNE_SIZE = 10_000
+
+class OutboundMessage:
+    """Kuyruktaki tek bir Bot API çağrısı"""
+
+    __slots__ = ('method', 'payload', 'chat_id', 'priority', 'sequence', 'future', 'attempts', 'edit_key')
+
+    def __init__(self, method: Optional[str], payload: Optional[Dict], chat_id: Optional[Hashable],
+                 priority: int, sequence: int, edit_key: Optional[Tuple] = None):
+        self.method = method  # None ise yalnızca gönderim hakkı ayrılır (bkz. acquire)
+        self.payload = payload
+        self.chat_id = chat_id
+        self.priority = priority
+        self.sequence = sequence
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.attempts = 0
+        self.edit_key = edit_key
+
+class TelegramSender:
+    """Tek oturumla, öncelik sırasına ve Telegram hız sınırlarına uyarak mesaj gönderir"""
+
+    def __init__(self, api_url: str,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE, global_burst: float = TELEGRAM_GLOBAL_BURST,
+                 chat_rate: float = TELEGRAM_CHAT_RATE, group_rate: float = TELEGRAM_GROUP_RATE,
+                 chat_burst: float = TELEGRAM_CHAT_BURST, max_retries: int = TELEGRAM_MAX_RETRIES):
+        self.api_url = api_url
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.sent = 0
+        self.retried = 0
+        self.coalesced = 0  # birleştirilen düzenleme sayısı
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: Dict[Hashable, TokenBucket] = {}
+        self._blocked: Dict[Hashable, float] = {}  # 429 sonrası sohbetin bekleyeceği an
+        self._busy: Set[Hashable] = set()  # isteği süren sohbetler (sohbet içi sıra korunur)
+        self._queue: List[Tuple[int, int, OutboundMessage]] = []
+        self._edits: Dict[Tuple, OutboundMessage] = {}
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Kalıcı HTTP oturumunu döndürür"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
+            )
+        return self._session
+
+    def share_global_bucket(self, bucket) -> None:
+        """Genel gönderim sınırını süreçler arası paylaşılan kovaya bağlar (shard işçileri)"""
+        self._global = bucket
+
+    def start(self) -> None:
+        """Gönderim döngüsünü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Gönderim döngüsünü durdurur, bekleyen mesajları iptal eder ve oturumu kapatır"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+        for _, _, message in self._queue:
+            message.future.cancel()
+        self._queue.clear()
+        self._edits.clear()
+
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _enqueue(self, method: Optional[str], payload: Optional[Dict], chat_id: Optional[Hashable],
+                 priority: int, edit_key: Optional[Tuple] = None) -> OutboundMessage:
+        """Çağrıyı öncelik kuyruğuna ekler"""
+        message = OutboundMessage(method, payload, chat_id, priority, next(self._sequence), edit_key)
+        heapq.heappush(self._queue, (priority, message.sequence, message))
+        self.start()
+        self._wakeup.set()
+        return message
+
+    async def send_message(self, chat_id: Hashable, text: str, parse_mode: Optional[str] = 'Markdown',
+                           priority: int = PRIORITY_INTERACTIVE, **kwargs) -> Dict:
+        """sendMessage çağrısını kuyruğa ekler ve Bot API yanıtını döndürür"""
+        payload = {'chat_id': chat_id, 'text': text, **kwargs}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        return await self._enqueue('sendMessage', payload, chat_id, priority).future
+
+    async def edit_message_text(self, chat_id: Hashable, message_id: int, text: str,
+                                parse_mode: Optional[str] = 'Markdown',
+                                priority: int = PRIORITY_INTERACTIVE, **kwargs) -> Dict:
+        """editMessageText çağrısı; henüz gönderilmemiş düzenleme varsa yalnızca metnini günceller"""
+        payload = {'chat_id': chat_id, 'message_id': message_id, 'text': text, **kwargs}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+
+        edit_key = (chat_id, message_id)
+        pending = self._edits.get(edit_key)
+        if pending is not None and not pending.future.done():
+            # Aynı mesajın ara düzenlemelerini göndermeye gerek yok, son hali yeterli
+            pending.payload = payload
+            self.coalesced += 1
+            return await asyncio.shield(pending.future)
+
+        message = self._enqueue('editMessageText', payload, chat_id, priority, edit_key)
+        self._edits[edit_key] = message
+        return await asyncio.shield(message.future)
+
+    async def call(self, method: str, payload: Dict, priority: int = PRIORITY_INTERACTIVE) -> Dict:
+        """Herhangi bir Bot API çağrısını kuyruk üzerinden yapar"""
+        return await self._enqueue(method, payload, payload.get('chat_id'), priority).future
+
+    async def acquire(self, chat_id: Hashable, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """İsteği çağıranın kendisi gönderecekse sıra ve hız hakkı ayırır; sonunda release çağrılmalı"""
+        message = self._enqueue(None, None, chat_id, priority)
+        try:
+            await message.future
+        except asyncio.CancelledError:
+            if message.future.done() and not message.future.cancelled():
+                self.release(chat_id)
+            raise
+
+    def release(self, chat_id: Hashable, retry_after: float = 0) -> None:
+        """acquire ile ayrılan hakkı bırakır; 429 alındıysa sohbeti retry_after kadar bekletir"""
+        if retry_after:
+            self._block(chat_id, retry_after)
+        self._busy.discard(chat_id)
+        self._wakeup.set()
+
+    def _block(self, chat_id: Hashable, delay: float) -> None:
+        """Sohbete gönderimi delay saniye durdurur"""
+        self._blocked[chat_id] = max(self._blocked.get(chat_id, 0.0), time.monotonic() + delay)
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        """Sohbetin kovasını döndürür; gruplar (negatif id) daha düşük hızla sınırlanır"""
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _CHAT_BUCKET_PRUNE_SIZE:
+                self._prune_chat_buckets()
+            private = isinstance(chat_id, int) and chat_id > 0
+            bucket = TokenBucket(self.chat_rate if private else self.group_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune_chat_buckets(self) -> None:
+        """Dolmuş (bir süredir kullanılmayan) sohbet kovalarını siler"""
+        now = time.monotonic()
+        for chat_id, bucket in list(self._chats.items()):
+            if chat_id not in self._busy and bucket.wait_time(bucket.capacity, now=now) == 0:
+                del self._chats[chat_id]
+        for chat_id, until in list(self._blocked.items()):
+            if until <= now:
+                del self._blocked[chat_id]
+
+    def _chat_wait(self, chat_id: Optional[Hashable], now: float) -> Optional[float]:
+        """Sohbete gönderim için beklenecek süre; istek sürüyorsa None"""
+        if chat_id in self._busy:
+            return None
+
+        blocked = self._blocked.get(chat_id, 0.0) - now
+        if blocked > 0:
+            return blocked
+        if chat_id is None:
+            return 0.0
+        return self._chat_bucket(chat_id).wait_time(now=now)
+
+    async def _run(self) -> None:
+        """Ana döngü: gönderilebilecek mesajları başlatır, sonra ilk uygun ana kadar bekler"""
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self) -> Optional[float]:
+        """Öncelik sırasıyla, sohbeti ve genel kovası uygun olan mesajları gönderime başlatır"""
+        now = time.monotonic()
+        deferred = []
+        delay: Optional[float] = None
+
+        while self._queue:
+            global_wait = self._global.wait_time(now=now)
+            if global_wait > 0:
+                delay = global_wait if delay is None else min(delay, global_wait)
+                break
+
+            entry = heapq.heappop(self._queue)
+            message = entry[2]
+            if message.future.done():
+                continue
+
+            chat_wait = self._chat_wait(message.chat_id, now)
+            if chat_wait is None or chat_wait > 0:
+                # Aynı sohbetin sonraki mesajları da burada bekler, sohbet içi sıra bozulmaz
+                deferred.append(entry)
+                if chat_wait:
+                    delay = chat_wait if delay is None else min(delay, chat_wait)
+                continue
+
+            if not self._global.try_take(now=now):
+                # Paylaşılan kovayı bu arada başka bir süreç harcadıysa mesaj sırasında bekler
+                deferred.append(entry)
+                global_wait = self._global.wait_time(now=now)
+                delay = global_wait if delay is None else min(delay, global_wait)
+                break
+            if message.chat_id is not None:
+                self._chat_bucket(message.chat_id).try_take(now=now)
+                self._busy.add(message.chat_id)
+            self._start(message)
+
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        return delay
+
+    def _start(self, message: OutboundMessage) -> None:
+        """Mesajı gönderir ya da ayrılan hakkı çağırana teslim eder"""
+        if message.edit_key is not None and self._edits.get(message.edit_key) is message:
+            del self._edits[message.edit_key]
+
+        if message.method is None:
+            # Hak çağırana geçti, sohbet release çağrılana kadar meşgul kalır
+            message.future.set_result(None)
+            return
+
+        task = asyncio.create_task(self._deliver(message))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        """Mesajı gönderir; 429'da retry_after kadar, ağ hatalarında artan sürelerle yeniden dener"""
+        retry_after = 0.0
+        try:
+            session = await self._get_session()
+            async with session.post(f"{self.api_url}/{message.method}", json=message.payload) as response:
+                result = await response.json(content_type=None)
+            if METRICS_ENABLED:
+                TELEGRAM_RESPONSES.inc(message.method, str(response.status))
+
+            if response.status == 429 and message.attempts < self.max_retries:
+                retry_after = float((result.get('parameters') or {}).get('retry_after') or 1)
+                logger.warning(f"Telegram flood limit for chat {message.chat_id}, retrying in {retry_after}s")
+                self._requeue(message)
+                return
+
+            if response.status >= 500 and message.attempts < self.max_retries:
+                retry_after = backoff_delay(message.attempts)
+                self._requeue(message)
+                return
+
+            self.sent += 1
+            if not message.future.done():
+                message.future.set_result(result)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            if METRICS_ENABLED:
+                TELEGRAM_RESPONSES.inc(message.method, 'error')
+            if message.attempts < self.max_retries:
+                retry_after = backoff_delay(message.attempts)
+                logger.warning(f"Telegram {message.method} failed ({e}), retrying in {retry_after:.1f}s")
+                self._requeue(message)
+            elif not message.future.done():
+                message.future.set_exception(e)
+
+        finally:
+            self.release(message.chat_id, retry_after)
+
+    def _requeue(self, message: OutboundMessage) -> None:
+        """Mesajı ilk sırasıyla kuyruğa geri koyar"""
+        message.attempts += 1
+        self.retried += 1
+        heapq.heappush(self._queue, (message.priority, message.sequence, message))
+
+class SenderRateLimiter(BaseRateLimiter):
+    """python-telegram-bot isteklerini TelegramSender'ın kovalarından geçirir"""
+
+    def __init__(self, sender: TelegramSender, max_retries: int = TELEGRAM_MAX_RETRIES):
+        self.sender = sender
+        self.max_retries = max_retries
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def process_request(self, callback, args, kwargs, endpoint: str, data: Dict[str, Any],
+                              rate_limit_args: Optional[int]) -> Any:
+        """Sohbete giden istekleri sıraya sokar; getUpdates gibi sohbetsiz istekler doğrudan geçer"""
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+
+        priority = rate_limit_args if rate_limit_args is not None else PRIORITY_INTERACTIVE
+        for attempt in range(self.max_retries + 1):
+            await self.sender.acquire(chat_id, priority)
+            retry_after = 0.0
+            try:
+                result = await callback(*args, **kwargs)
+                if METRICS_ENABLED:
+                    TELEGRAM_RESPONSES.inc(endpoint, '200')
+                return result
+            except RetryAfter as e:
+                if METRICS_ENABLED:
+                    TELEGRAM_RESPONSES.inc(endpoint, '429')
+                if attempt == self.max_retries:
+                    raise
+                retry_after = float(e.retry_after)
+                logger.warning(f"Telegram flood limit on {endpoint} for chat {chat_id}, retrying in {retry_after}s")
+            finally:
+                self.sender.release(chat_id, retry_after)
+
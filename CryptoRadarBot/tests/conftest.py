@@ -0,0 +1,14 @@
+"""
+Test ayarları
+config.py'nin istediği ortam değişkenleri ve modül arama yolu
+"""
+
+import os
+import sys
+import tempfile
+
+# config.py içe aktarılırken token zorunludur; veriler geçici dizine yazılır
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test:TOKEN")
+os.environ.setdefault("CRYPTO_RADAR_DATA_DIR", tempfile.mkdtemp(prefix="crypto_radar_test_"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
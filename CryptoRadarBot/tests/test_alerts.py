@@ -0,0 +1,98 @@
+"""
+AlertEngine testleri
+"""
+
+import asyncio
+import gc
+from types import SimpleNamespace
+
+from alerts import ABOVE, BELOW, Alert, AlertEngine, AlertStore, CoinAlertBook, is_triggered
+
+def test_is_triggered_matches_book_bounds():
+    assert is_triggered(ABOVE, 100.0, 100.0)
+    assert not is_triggered(ABOVE, 100.0, 99.9)
+    assert is_triggered(BELOW, 100.0, 100.0)
+    assert not is_triggered(BELOW, 100.0, 100.1)
+
+def _alert(alert_id, direction, threshold):
+    return Alert(alert_id, 1, 1, 'bitcoin', direction, threshold, 0.0)
+
+def test_book_pops_crossed_thresholds_from_the_tail():
+    book = CoinAlertBook()
+    alerts = [_alert(1, ABOVE, 110.0), _alert(2, ABOVE, 100.0), _alert(3, ABOVE, 120.0),
+              _alert(4, BELOW, 90.0), _alert(5, BELOW, 100.0), _alert(6, BELOW, 80.0)]
+    for alert in alerts:
+        book.add(alert)
+    book.remove(alerts[0])
+
+    assert book.pop_triggered(105.0) == [2]
+    assert book.pop_triggered(100.0) == [5]
+    assert sorted(book.pop_triggered(120.0)) == [3]
+    assert sorted(book.pop_triggered(50.0)) == [4, 6]
+    assert not len(book)
+
+def test_failed_notifications_keep_their_alerts(tmp_path):
+    async def scenario():
+        store = AlertStore(str(tmp_path / 'alerts.db'))
+        engine = AlertEngine(store)
+        responses = {
+            1: {'ok': True},
+            2: {'ok': False, 'error_code': 429, 'description': 'Too Many Requests'},
+            3: {'ok': False, 'error_code': 403, 'description': 'Forbidden: bot was blocked by the user'}
+        }
+        sent = []
+
+        async def notify(chat_id, text):
+            sent.append(chat_id)
+            if chat_id == 4:
+                raise ConnectionError('network down')
+            return responses[chat_id]
+
+        engine.set_notifier(notify)
+        for chat_id in (1, 2, 3, 4):
+            await engine.add(chat_id, chat_id, 'bitcoin', ABOVE, 100.0)
+
+        triggered = engine.evaluate({'bitcoin': 150.0})
+        assert len(triggered) == 4 and not engine.alerts
+        await engine._dispatch(triggered, {'bitcoin': 150.0})
+
+        assert sorted(sent) == [1, 2, 3, 4]
+        # Teslim edilen ve kalıcı hata alan silinir; geçici hatalar yeniden denenmek üzere kalır
+        remaining = sorted(alert.chat_id for alert in store.load_all())
+        assert remaining == [2, 4]
+        assert sorted(alert.chat_id for alert in engine.alerts.values()) == [2, 4]
+
+        sent.clear()
+        responses[2] = {'ok': True}
+        retried = engine.evaluate({'bitcoin': 150.0})
+        assert sorted(alert.chat_id for alert in retried) == [2, 4]
+        await engine._dispatch(retried, {'bitcoin': 150.0})
+        assert [alert.chat_id for alert in store.load_all()] == [4]
+        store.close()
+
+    asyncio.run(scenario())
+
+def test_snapshot_dispatch_task_is_retained(tmp_path):
+    async def scenario():
+        store = AlertStore(str(tmp_path / 'alerts.db'))
+        engine = AlertEngine(store)
+        delivered = asyncio.Event()
+
+        async def notify(chat_id, text):
+            await asyncio.sleep(0.01)
+            gc.collect()  # olay döngüsü görevi zayıf tutar; referans yoksa burada toplanırdı
+            delivered.set()
+            return {'ok': True}
+
+        engine.set_notifier(notify)
+        await engine.add(1, 1, 'bitcoin', ABOVE, 100.0)
+        engine.on_snapshot(SimpleNamespace(get_price=lambda coin_id: {'usd': 150.0}))
+        assert len(engine._dispatches) == 1
+
+        await asyncio.wait_for(delivered.wait(), 1)
+        await asyncio.sleep(0.05)
+        assert not engine._dispatches
+        assert not store.load_all()
+        store.close()
+
+    asyncio.run(scenario())
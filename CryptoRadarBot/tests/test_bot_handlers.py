@@ -0,0 +1,100 @@
+"""
+BotHandlers testleri
+Handlers run against minimal fake updates; nothing reaches the Bot API
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from telegram.error import BadRequest
+
+import bot_handlers
+from bot_handlers import BotHandlers
+from charts import Chart
+
+class FakeMessage:
+    """Gönderilen yanıtları kaydeden mesaj taklidi"""
+
+    def __init__(self, photo_error: Exception = None, text_errors=()):
+        self.photo_error = photo_error
+        self.text_errors = list(text_errors)  # sıradaki reply_text çağrılarında fırlatılır
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        if self.text_errors:
+            raise self.text_errors.pop(0)
+        self.replies.append(('text', text))
+        return SimpleNamespace(photo=None)
+
+    async def reply_photo(self, photo, **kwargs):
+        if self.photo_error is not None:
+            raise self.photo_error
+        self.replies.append(('photo', photo))
+        return SimpleNamespace(photo=None)
+
+def _update(message: FakeMessage):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=1), message=message)
+
+class StaleCharts:
+    """İlk çağrıda bayat file_id, sonrakilerde None döndüren grafik servisi"""
+
+    def __init__(self):
+        self.forgotten = []
+        self.calls = 0
+
+    async def get(self, coin_id, title, period, span):
+        self.calls += 1
+        if self.calls == 1:
+            return Chart(('bitcoin', period), 'stale-file-id', None, {'close': 1.0, 'change': 0.0})
+        return None
+
+    def forget_file_id(self, key):
+        self.forgotten.append(key)
+
+def test_chart_stale_file_id_without_history_replies_no_data():
+    charts = StaleCharts()
+    handlers = BotHandlers(charts=charts)
+    message = FakeMessage(photo_error=BadRequest('Wrong file identifier'))
+
+    asyncio.run(handlers.chart_command(_update(message), SimpleNamespace(args=['btc', '7g'])))
+
+    assert charts.forgotten == [('bitcoin', '7g')]
+    assert len(message.replies) == 1
+    kind, text = message.replies[0]
+    assert kind == 'text' and 'yeterli geçmiş veri yok' in text
+
+async def _slow_reply(delay: float, done: list):
+    try:
+        await asyncio.sleep(delay)
+        done.append(True)
+        return 'ready', None
+    except asyncio.CancelledError:
+        done.append(False)
+        raise
+
+def test_respond_delivers_reply_when_placeholder_fails(monkeypatch):
+    monkeypatch.setattr(bot_handlers, 'PROCESSING_MESSAGE_DELAY', 0.01)
+    message = FakeMessage(text_errors=[RuntimeError('Timed out')])
+    done = []
+
+    asyncio.run(BotHandlers()._respond(_update(message), 'price', _slow_reply(0.05, done)))
+
+    assert done == [True]
+    assert message.replies == [('text', 'ready')]
+
+def test_cancelled_respond_cancels_reply_task(monkeypatch):
+    monkeypatch.setattr(bot_handlers, 'PROCESSING_MESSAGE_DELAY', 10)
+    message = FakeMessage()
+    done = []
+
+    async def scenario():
+        respond = asyncio.create_task(BotHandlers()._respond(_update(message), 'price', _slow_reply(1, done)))
+        await asyncio.sleep(0.01)
+        respond.cancel()
+        await asyncio.gather(respond, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+    assert done == [False]
+    assert message.replies == []
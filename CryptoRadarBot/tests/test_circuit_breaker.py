@@ -0,0 +1,153 @@
+"""
+CircuitBreaker testleri
+State transitions with an injected clock, and stale-while-revalidate serving in CryptoAPI
+"""
+
+import asyncio
+import time
+
+import crypto_api
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from crypto_api import CryptoAPI, share_rate_limit
+from rate_limiter import TokenBucket
+from test_single_flight import STUB_DELAY, CoinGeckoStub
+
+OPEN_SECONDS = 30
+
+def _breaker(**overrides) -> CircuitBreaker:
+    settings = dict(window=10, min_calls=4, failure_rate=0.5, open_seconds=OPEN_SECONDS, half_open_calls=1)
+    settings.update(overrides)
+    return CircuitBreaker('test', **settings)
+
+def _tripped(**overrides) -> CircuitBreaker:
+    breaker = _breaker(**overrides)
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    return breaker
+
+def _after_open(extra: float = 1.0) -> float:
+    """Açılma süresinin dolduğu an (devre record_* içinde time.monotonic ile işaretlenir)"""
+    return time.monotonic() + OPEN_SECONDS + extra
+
+def test_trips_only_after_min_calls_and_failure_rate():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED  # 3/3 hata ama min_calls'a ulaşılmadı
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opened == 1
+
+def test_stays_closed_below_failure_rate():
+    breaker = _breaker()
+    for failed in (True, False, False, False, True, False):
+        breaker.record_failure() if failed else breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()['failure_rate'] == 2 / 6
+
+def test_open_circuit_rejects_until_open_seconds_pass():
+    breaker = _tripped()
+    assert not breaker.allow()
+    assert not breaker.allows()
+    assert breaker.rejected == 1
+
+    # allows durumu değiştirmez
+    assert breaker.allows(now=_after_open())
+    assert breaker.state == OPEN
+
+    assert breaker.allow(now=_after_open())
+    assert breaker.state == HALF_OPEN
+
+def test_half_open_limits_probes_and_success_closes():
+    breaker = _tripped(half_open_calls=2)
+    now = _after_open()
+    assert breaker.allow(now=now)
+    assert breaker.allow(now=now)
+    assert not breaker.allow(now=now)
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.stats()['failure_rate'] == 0.0
+
+def test_half_open_failure_reopens():
+    breaker = _tripped()
+    assert breaker.allow(now=_after_open())
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+    assert not breaker.allow()
+
+def test_lost_probe_is_rearmed_after_open_seconds():
+    breaker = _tripped()
+    assert breaker.allow(now=_after_open())
+    assert not breaker.allow(now=_after_open())
+
+    # Deneme isteğinin sonucu hiç gelmedi (iptal); süre yeniden dolunca yeni deneme geçer
+    assert breaker.allow(now=_after_open(OPEN_SECONDS + 2))
+    assert breaker.state == HALF_OPEN
+
+def _run(scenario):
+    """Senaryoyu temiz önbellek ve devrelerle, stub'a bağlı bir CryptoAPI ile çalıştırır"""
+    crypto_api._response_cache.clear()
+    crypto_api._last_good.clear()
+    crypto_api._breakers.clear()
+    # Kota beklemesi zamanlama ölçümlerini bozmasın; diğer testlerin kovasına da dokunulmaz
+    bucket = crypto_api._rate_limiter.bucket
+    share_rate_limit(TokenBucket(1e9, 1e9))
+
+    async def runner():
+        async with CoinGeckoStub() as stub:
+            api = CryptoAPI()
+            api.base_url = stub.url
+            async with api:
+                return await scenario(api, stub)
+
+    try:
+        return asyncio.run(runner())
+    finally:
+        crypto_api._breakers.clear()
+        share_rate_limit(bucket)
+
+def test_open_circuit_serves_last_good_without_upstream_call():
+    async def scenario(api, stub):
+        params = {'vs_currency': 'usd', 'page': 10}
+        fresh = await api._make_request('coins/markets', params)
+        assert stub.calls['coins/markets'] == 1
+
+        # Taze kayıt süresi doldu, kaynak çöktü
+        crypto_api._response_cache.clear()
+        breaker = crypto_api.get_breaker('coins/markets')
+        for _ in range(breaker.min_calls):
+            breaker.record_failure()
+        assert breaker.state == OPEN
+
+        assert await api._make_request('coins/markets', params) == fresh
+        await asyncio.sleep(STUB_DELAY * 2)
+        assert stub.calls['coins/markets'] == 1
+        assert not crypto_api._inflight_requests
+
+        # Son bilinen değer yoksa beklemeden None döner
+        assert await api._make_request('coins/markets', {'vs_currency': 'usd', 'page': 11}) is None
+        assert stub.calls['coins/markets'] == 1
+
+    _run(scenario)
+
+def test_closed_circuit_serves_stale_and_refreshes_in_background():
+    async def scenario(api, stub):
+        params = {'vs_currency': 'usd', 'page': 12}
+        fresh = await api._make_request('coins/markets', params)
+        crypto_api._response_cache.clear()
+
+        started = time.monotonic()
+        assert await api._make_request('coins/markets', params) == fresh
+        assert time.monotonic() - started < STUB_DELAY  # yenilemeyi beklemedi
+
+        await asyncio.sleep(STUB_DELAY * 2)
+        assert stub.calls['coins/markets'] == 2
+        assert crypto_api._response_cache.get(crypto_api.make_cache_key('coins/markets', params)) == fresh
+
+    _run(scenario)
@@ -0,0 +1,43 @@
+"""
+CoinIndex testleri
+"""
+
+from coin_index import CoinIndex, set_index
+from utils import get_coin_id, match_coin_id
+
+COINS = [
+    {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'rank': 1},
+    {'id': 'hello-world', 'symbol': 'hlw', 'name': 'Hello World', 'rank': 900},
+    {'id': 'thena', 'symbol': 'the', 'name': 'Thena', 'rank': 700},
+    {'id': 'selamcoin', 'symbol': 'slm', 'name': 'SelamCoin', 'rank': 5000},
+    {'id': 'solana', 'symbol': 'sol', 'name': 'Solana', 'rank': 5}
+]
+
+def test_resolve_exact_ignores_prefix_and_fuzzy_matches():
+    index = CoinIndex.build(COINS)
+
+    assert index.resolve_exact('hello') is None
+    assert index.resolve_exact('selam') is None
+    assert index.resolve_exact('bitcoinn') is None
+    assert index.resolve_exact('Bitcoin') == 'bitcoin'
+    assert index.resolve_exact('btc') == 'bitcoin'
+    assert index.resolve_exact('hello world') == 'hello-world'
+    assert index.resolve_exact('the') == 'thena'
+    assert index.resolve_exact('the', symbols=False) is None
+
+    # Açık sorgularda tahmin sürer
+    assert index.resolve('hello') == 'hello-world'
+    assert index.resolve('bitcoinn') == 'bitcoin'
+
+def test_free_text_matches_only_known_coins():
+    set_index(CoinIndex.build(COINS, {'btc': 'bitcoin'}))
+    try:
+        assert match_coin_id('selam') is None
+        assert match_coin_id('hello') is None
+        assert match_coin_id('BTC') == 'bitcoin'
+        assert match_coin_id('solana') == 'solana'
+        assert match_coin_id('the') is None  # yalnızca sembol eşleşmesi
+        assert match_coin_id('thena') == 'thena'
+        assert get_coin_id('selam') == 'selamcoin'
+    finally:
+        set_index(None)
@@ -0,0 +1,88 @@
+"""
+HistoryStore saklama süresi testleri
+Raw and 1m series are trimmed past the retention window; coarser rollups are kept
+"""
+
+import os
+
+from history import HistoryStore, CoinHistory, SeriesFile, RAW, TICK_DTYPE
+from market_snapshot import MarketSnapshot
+
+DAY = 24 * 60 * 60
+START = 1_700_000_000 - 1_700_000_000 % DAY
+RETENTION = {RAW: 2, '1m': 5}
+
+def _snapshot(ts: float, price: float) -> MarketSnapshot:
+    coins = [{'id': 'bitcoin', 'current_price': price, 'market_cap': 1e12, 'total_volume': 1e9}]
+    return MarketSnapshot.from_markets(coins, 30.0, ts, 1)
+
+def _fill(store: HistoryStore, days: int, step: float = 30 * 60) -> float:
+    ts = START
+    while ts < START + days * DAY:
+        store.record(_snapshot(ts, 100.0 + ts % 7))
+        ts += step
+    return ts - step
+
+def test_compact_drops_expired_raw_and_minute_records(tmp_path):
+    store = HistoryStore(str(tmp_path), top_n=1, retention=RETENTION, compact_interval=float('inf'))
+    now = _fill(store, 10)
+    hours_before = len(store.series('bitcoin', '1h'))
+
+    assert store.compact(now) > 0
+
+    assert store.series('bitcoin', RAW)['ts'][0] >= now - RETENTION[RAW] * DAY
+    assert store.series('bitcoin', '1m')['ts'][0] >= now - RETENTION['1m'] * DAY
+    assert len(store.series('bitcoin', '1h')) == hours_before
+    assert os.path.getsize(os.path.join(tmp_path, 'bitcoin', 'raw.bin')) == len(store.series('bitcoin', RAW)) * 24
+
+    # Kırpılan dosyalara yazmaya devam edilir, ikinci kırpma bir şey bulmaz
+    store.record(_snapshot(now + 60, 123.0))
+    assert store.series('bitcoin', RAW)['price'][-1] == 123.0
+    assert store.series('bitcoin', '1m')['close'][-1] == 123.0
+    assert store.compact(now) == 0
+
+def test_record_compacts_on_interval(tmp_path):
+    store = HistoryStore(str(tmp_path), top_n=1, retention=RETENTION, compact_interval=DAY)
+    now = _fill(store, 10)
+
+    # En fazla bir aralık kadar fazladan kayıt kalır
+    assert store.series('bitcoin', RAW)['ts'][0] >= now - (RETENTION[RAW] + 1) * DAY
+
+def test_reopened_history_resumes_after_compaction(tmp_path):
+    store = HistoryStore(str(tmp_path), top_n=1, retention={'1m': 1}, compact_interval=float('inf'))
+    now = _fill(store, 3)
+    store.compact(now + 2 * DAY)
+    assert not len(store.series('bitcoin', '1m'))
+
+    history = CoinHistory(os.path.join(tmp_path, 'bitcoin'))
+    assert history.add(now + 2 * DAY, 50.0, 0.0)
+    assert history.rollups['1m'].view()['close'].tolist() == [50.0]
+
+def test_readonly_store_sees_trimmed_files(tmp_path):
+    writer = HistoryStore(str(tmp_path), top_n=1, retention=RETENTION, compact_interval=float('inf'))
+    reader = HistoryStore(str(tmp_path), top_n=1, readonly=True)
+    now = _fill(writer, 4)
+    before = reader.series('bitcoin', RAW)
+
+    writer.compact(now)
+    # Aynı sayıda kayıt olsa bile dosya değiştiği için yeniden eşlenir
+    for ts in (now + 1, now + 2):
+        writer.record(_snapshot(ts, 1.0))
+
+    after = reader.series('bitcoin', RAW)
+    assert after['ts'][0] >= now - RETENTION[RAW] * DAY
+    assert after['ts'][-1] == now + 2
+    # Okuyucunun elindeki eski görünüm geçerli kalır
+    assert before['ts'][0] == START
+
+def test_view_sized_from_file_when_trimmed_after_count_was_read(tmp_path):
+    store = HistoryStore(str(tmp_path), top_n=1, retention=RETENTION, compact_interval=float('inf'))
+    now = _fill(store, 4)
+    # Sayısı kırpmadan önce okunmuş bir okuyucu (olay döngüsü ile kırpan iş parçacığı arasındaki yarış)
+    reader = SeriesFile(os.path.join(tmp_path, 'bitcoin', 'raw.bin'), TICK_DTYPE)
+    stale_count = reader.count
+
+    store.compact(now)
+    data = reader.view()
+    assert 0 < len(data) < stale_count
+    assert data['ts'][0] >= now - RETENTION[RAW] * DAY
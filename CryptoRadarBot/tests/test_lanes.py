@@ -0,0 +1,96 @@
+"""
+UserLaneProcessor testleri
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import lanes
+from lanes import UserLaneProcessor
+from metrics import UPDATES_DROPPED
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text):
+        self.replies.append(text)
+
+def _update(user_id, message):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user_id), effective_message=message)
+
+def test_dropped_updates_are_counted_and_noticed_once(monkeypatch):
+    monkeypatch.setattr(lanes, 'METRICS_ENABLED', True)
+
+    async def scenario():
+        processor = UserLaneProcessor(concurrency=4, max_pending=100, max_per_user=5, rate=0.001, burst=2,
+                                      notice_interval=60)
+        message = FakeMessage()
+        handled = []
+
+        async def handle(number):
+            handled.append(number)
+
+        before = UPDATES_DROPPED.value()
+        await asyncio.gather(*(
+            processor.do_process_update(_update(1, message), handle(number)) for number in range(6)
+        ))
+        await asyncio.sleep(0)
+
+        assert handled == [0, 1]
+        assert UPDATES_DROPPED.value() - before == 4
+        assert len(message.replies) == 1
+
+        # Başka kullanıcının uyarısı ayrı sayılır
+        other = FakeMessage()
+        for number in range(3):
+            await processor.do_process_update(_update(2, other), handle(number))
+        await asyncio.sleep(0)
+        assert len(other.replies) == 1
+
+        # Pencere dolunca aynı kullanıcı yeniden uyarılır
+        processor.notice_interval = 0
+        await processor.do_process_update(_update(1, message), handle(99))
+        await asyncio.sleep(0)
+        assert len(message.replies) == 2
+        await processor.shutdown()
+
+    asyncio.run(scenario())
+
+async def _consume(processor, update_queue, release):
+    """PTB'nin güncelleme döngüsü gibi: her güncelleme için ayrı görev açar"""
+    tasks = set()
+
+    async def handle():
+        await release.wait()
+
+    while True:
+        update = await update_queue.get()
+        task = asyncio.create_task(processor.process_update(update, handle()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+def test_enqueue_waits_for_pending_capacity():
+    async def scenario():
+        processor = UserLaneProcessor(concurrency=4, max_pending=2, rate=None)
+        update_queue = asyncio.Queue()
+        release = asyncio.Event()
+        consumer = asyncio.create_task(_consume(processor, update_queue, release))
+
+        for user_id in (1, 2):
+            await processor.enqueue(_update(user_id, None), update_queue)
+        third = asyncio.create_task(processor.enqueue(_update(3, None), update_queue))
+        await asyncio.sleep(0.05)
+        assert not third.done()
+        assert update_queue.empty()
+
+        # İlk iki güncelleme bitince üçüncüsü kuyruğa girer
+        release.set()
+        await asyncio.wait_for(third, 1)
+        await asyncio.wait_for(processor.wait_for_capacity(), 1)
+
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await processor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,33 @@
+"""
+Eski bot.py yanıt biçimi testleri
+Footers follow the data time instead of always claiming "now"
+"""
+
+import os
+import sys
+import time
+
+# bot.py depo kökündedir
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bot import format_gainers, format_price_details
+
+HOUR = 60 * 60
+
+def _gainers(updated_at):
+    return [{'symbol': 'btc', 'current_price': 1.0, 'price_change_percentage_1h_in_currency': 2.0,
+             'last_updated_at': updated_at}]
+
+def test_price_footer_says_now_only_for_fresh_data():
+    fresh = format_price_details("BTC", {'usd': 1.0, 'last_updated_at': time.time()})
+    stale = format_price_details("BTC", {'usd': 1.0, 'last_updated_at': time.time() - 2 * HOUR})
+
+    assert fresh.endswith("🕐 _Güncelleme: Şimdi_")
+    assert "Şimdi" not in stale and "Son bilinen veri" in stale
+
+def test_gainers_footer_uses_oldest_row_in_both_languages():
+    stale = _gainers(time.time() - 2 * HOUR)
+
+    assert "Son bilinen veri" in format_gainers(stale, "Başlık")
+    assert "Last known data as of" in format_gainers(stale, "Title", english=True)
+    assert format_gainers(_gainers(time.time()), "Title", english=True).endswith("🕐 _Updated: Now_")
@@ -0,0 +1,35 @@
+"""
+LoopBlockMonitor testleri
+A synchronous sleep on the event loop must show up as a blocked event
+"""
+
+import asyncio
+import logging
+import time
+
+from loop_monitor import LoopBlockMonitor
+
+THRESHOLD = 0.05  # saniye
+BLOCK = 0.3  # saniye, eşiğin açıkça üstünde
+
+def _watch(block: float) -> LoopBlockMonitor:
+    """İzleyiciyi başlatır, döngüyü time.sleep ile bloklar ve izleyiciye bir tur daha verir"""
+    monitor = LoopBlockMonitor(threshold=THRESHOLD, interval=0.01)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(block)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    return monitor
+
+def test_blocking_sleep_is_reported(caplog):
+    with caplog.at_level(logging.WARNING, logger='loop_monitor'):
+        monitor = _watch(BLOCK)
+
+    assert monitor.blocked_events >= 1
+    assert BLOCK - THRESHOLD < monitor.max_lag < BLOCK + 0.1
+    assert any("Event loop was blocked" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,21 @@
+"""
+MarketSnapshot testleri
+"""
+
+import math
+
+from market_snapshot import MarketSnapshot
+
+def test_legacy_24h_change_keeps_zero():
+    coins = [
+        {'id': 'flat', 'current_price': 1.0, 'price_change_percentage_24h': 0.0},
+        {'id': 'missing', 'current_price': 1.0, 'price_change_percentage_24h': None},
+        {'id': 'up', 'current_price': 1.0, 'price_change_percentage_24h': 2.5}
+    ]
+    snapshot = MarketSnapshot.from_markets(coins, 30.0, 0.0, 1)
+    change = snapshot.columns['change_24h']
+
+    assert change[0] == 0.0
+    assert math.isnan(change[1])
+    assert change[2] == 2.5
+    assert snapshot.row(0)['price_change_percentage_24h'] == 0.0
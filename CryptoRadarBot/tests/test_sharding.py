@@ -0,0 +1,65 @@
+"""
+Shard işçisi testleri
+A spawned worker talks to the fake Bot API and CoinGecko from loadtest and must shut down cleanly on SIGTERM
+"""
+
+import asyncio
+import ctypes
+import multiprocessing
+import os
+import signal
+import time
+
+from config import CRYPTO_ALIASES, SHARD_SNAPSHOT_BYTES
+from loadtest import FakeCoinGecko, FakeTelegram, _free_port, _start_site
+from sharding import SharedTokenBucket, run_worker
+
+STARTUP_TIMEOUT = 60  # saniye, spawn edilen süreç tüm bot modüllerini yükler
+
+def _start_update(chat_id: int) -> dict:
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'user'}
+    return {'update_id': 1, 'message': {
+        'message_id': 1, 'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'},
+        'from': user, 'text': '/start', 'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]
+    }}
+
+def test_worker_stops_gracefully_on_sigterm(monkeypatch, tmp_path):
+    telegram_port, coingecko_port = _free_port(), _free_port()
+    # İşçi config'i kendi içe aktarır; ortam spawn anında devralınır
+    monkeypatch.setenv('TELEGRAM_API_BASE', f'http://127.0.0.1:{telegram_port}/bot')
+    monkeypatch.setenv('COINGECKO_API_BASE', f'http://127.0.0.1:{coingecko_port}/api/v3')
+    monkeypatch.setenv('CRYPTO_RADAR_DATA_DIR', str(tmp_path))
+
+    telegram = FakeTelegram()
+    answered = asyncio.Event()
+    telegram.on_message = lambda chat_id, text: answered.set()
+
+    async def scenario():
+        runners = [
+            await _start_site(telegram.build_app(), telegram_port),
+            await _start_site(FakeCoinGecko(CRYPTO_ALIASES, coins=50).build_app(), coingecko_port)
+        ]
+        context = multiprocessing.get_context('spawn')
+        # Paylaşılan nesneler işçi onları açana kadar bu süreçte yaşamalı
+        updates = context.Queue()
+        snapshot_buffer = context.RawArray(ctypes.c_char, SHARD_SNAPSHOT_BYTES)
+        buckets = SharedTokenBucket.allocate(context, [1000, 1000])
+        bucket_lock = context.Lock()
+        process = context.Process(target=run_worker, args=(0, 1, updates, snapshot_buffer, buckets, bucket_lock))
+        process.start()
+        try:
+            updates.put(_start_update(42))
+            await asyncio.wait_for(answered.wait(), STARTUP_TIMEOUT)
+
+            os.kill(process.pid, signal.SIGTERM)
+            await asyncio.to_thread(process.join, 15)
+            return process.exitcode
+        finally:
+            if process.is_alive():
+                process.kill()
+                await asyncio.to_thread(process.join)
+            for runner in runners:
+                await runner.cleanup()
+
+    # Öntanımlı SIGTERM süreci -15 ile öldürürdü
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,134 @@
+"""
+SingleFlight testleri
+Concurrent identical CoinGecko requests against a local stub must share one upstream call
+"""
+
+import asyncio
+import gc
+from collections import Counter
+
+from aiohttp import web
+
+import crypto_api
+from crypto_api import CryptoAPI, share_rate_limit
+from rate_limiter import TokenBucket
+
+WAITERS = 20
+STUB_DELAY = 0.2  # saniye, eşzamanlı çağrıların uçuştaki isteğe yetişmesi için
+
+class CoinGeckoStub:
+    """Her isteği sayan, kısa bir gecikmeyle yanıt veren CoinGecko taklidi"""
+
+    def __init__(self, delay: float = STUB_DELAY):
+        self.delay = delay
+        self.calls: Counter = Counter()
+        self.url = None
+        self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info['endpoint']
+        self.calls[endpoint] += 1
+        await asyncio.sleep(self.delay)
+        if endpoint == 'simple/price':
+            ids = request.query['ids'].split(',')
+            return web.json_response({coin_id: {'usd': 1.0, 'try': 30.0} for coin_id in ids})
+        return web.json_response([{'id': 'bitcoin', 'current_price': 1.0}])
+
+    async def __aenter__(self) -> 'CoinGeckoStub':
+        app = web.Application()
+        app.router.add_get('/api/v3/{endpoint:.+}', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/api/v3'
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._runner.cleanup()
+
+def _run(scenario):
+    """Senaryoyu temiz önbellekle, stub'a bağlı bir CryptoAPI ile çalıştırır"""
+    crypto_api._response_cache.clear()
+    crypto_api._last_good.clear()
+    # Testler arka arkaya CoinGecko kotasının ilk dalgasını aşar; kota beklemesi zamanlamayı bozmasın
+    bucket = crypto_api._rate_limiter.bucket
+    share_rate_limit(TokenBucket(1e9, 1e9))
+
+    async def runner():
+        async with CoinGeckoStub() as stub:
+            api = CryptoAPI()
+            api.base_url = stub.url
+            async with api:
+                return await scenario(api, stub)
+
+    try:
+        return asyncio.run(runner())
+    finally:
+        share_rate_limit(bucket)
+
+def test_concurrent_requests_share_one_fetch():
+    async def scenario(api, stub):
+        params = {'vs_currency': 'usd', 'page': 1}
+        results = await asyncio.gather(*(api._make_request('coins/markets', params) for _ in range(WAITERS)))
+        assert stub.calls['coins/markets'] == 1
+        assert all(result == results[0] for result in results)
+        assert results[0][0]['id'] == 'bitcoin'
+
+    _run(scenario)
+
+def test_concurrent_price_lookups_share_one_fetch():
+    async def scenario(api, stub):
+        results = await asyncio.gather(*(api.get_coin_price('bitcoin') for _ in range(WAITERS)))
+        assert stub.calls['simple/price'] == 1
+        assert all(result == {'usd': 1.0, 'try': 30.0} for result in results)
+
+    _run(scenario)
+
+def test_price_batch_send_survives_garbage_collection():
+    async def scenario(api, stub):
+        lookups = asyncio.gather(*(api.get_coin_price(coin_id) for coin_id in ('bitcoin', 'ethereum', 'solana')))
+        await asyncio.sleep(STUB_DELAY / 2)
+        # Olay döngüsü görevi zayıf tutar; toplayıcı referans tutmasaydı istek burada kaybolurdu
+        gc.collect()
+        assert len(crypto_api._price_batcher._sends) == 1
+
+        results = await asyncio.wait_for(lookups, STUB_DELAY * 5)
+        assert all(result == {'usd': 1.0, 'try': 30.0} for result in results)
+        assert stub.calls['simple/price'] == 1
+        assert not crypto_api._price_batcher._sends
+
+    _run(scenario)
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    async def scenario(api, stub):
+        params = {'vs_currency': 'usd', 'page': 2}
+        tasks = [asyncio.create_task(api._make_request('coins/markets', params)) for _ in range(WAITERS)]
+        await asyncio.sleep(STUB_DELAY / 4)
+        tasks[0].cancel()
+
+        results = await asyncio.gather(*tasks[1:])
+        assert tasks[0].cancelled()
+        assert stub.calls['coins/markets'] == 1
+        assert all(result is not None and result == results[0] for result in results)
+
+    _run(scenario)
+
+def test_cancelling_every_waiter_still_completes_fetch():
+    async def scenario(api, stub):
+        params = {'vs_currency': 'usd', 'page': 3}
+        key = crypto_api.make_cache_key('coins/markets', params)
+        task = asyncio.create_task(api._make_request('coins/markets', params))
+        await asyncio.sleep(STUB_DELAY / 4)
+        assert key in crypto_api._inflight_requests
+
+        task.cancel()
+        await asyncio.sleep(STUB_DELAY * 2)
+        assert key not in crypto_api._inflight_requests
+
+        # İstek iptal edilmeden tamamlanıp önbelleğe yazıldı; yeni çağrı kaynağa gitmez
+        assert await api._make_request('coins/markets', params) is not None
+        assert stub.calls['coins/markets'] == 1
+
+    _run(scenario)
@@ -0,0 +1,109 @@
+"""
+TelegramSender testleri
+Per-chat spacing, the global cap and 429 retry_after handling against the fake Bot API
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from loadtest import ARRIVAL_JITTER, FakeTelegram, _free_port, _start_site, send_rate_report
+from telegram_sender import TelegramSender
+
+class FloodingTelegram(FakeTelegram):
+    """Seçilen sohbetlerin ilk gönderimini 429 ile reddeden sahte Bot API"""
+
+    def __init__(self, flood_chats, retry_after: int = 1):
+        super().__init__()
+        self.flood_chats = set(flood_chats)
+        self.retry_after = retry_after
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.match_info['method'] == 'sendMessage':
+            params = await request.json()
+            chat_id = int(params['chat_id'])
+            if chat_id in self.flood_chats:
+                self.flood_chats.discard(chat_id)
+                self.calls['sendMessage'] += 1
+                self.deliveries.append((time.monotonic(), chat_id))
+                return web.json_response({
+                    'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                    'parameters': {'retry_after': self.retry_after}
+                }, status=429)
+        return await super().handle(request)
+
+def _run(telegram, scenario, **limits):
+    """Sahte sunucuyu başlatıp ona bağlı bir TelegramSender ile senaryoyu çalıştırır"""
+    async def runner():
+        port = _free_port()
+        site = await _start_site(telegram.build_app(), port)
+        sender = TelegramSender(f'http://127.0.0.1:{port}/botTEST', **limits)
+        try:
+            return await scenario(sender)
+        finally:
+            await sender.stop()
+            await site.cleanup()
+
+    return asyncio.run(runner())
+
+def _arrivals(telegram, chat_id):
+    return [at for at, chat in telegram.deliveries if chat == chat_id]
+
+def test_messages_to_one_chat_are_spaced_and_ordered():
+    telegram = FakeTelegram()
+    received = []
+    telegram.on_message = lambda chat_id, text: received.append((chat_id, text))
+
+    async def scenario(sender):
+        sends = [sender.send_message(1, f'm{number}', parse_mode=None) for number in range(5)]
+        sends.append(sender.send_message(2, 'other', parse_mode=None))
+        results = await asyncio.gather(*sends)
+        assert all(result['ok'] for result in results)
+
+    _run(telegram, scenario, global_rate=1000, global_burst=100, chat_rate=5, chat_burst=1)
+
+    arrivals = _arrivals(telegram, 1)
+    gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+    assert len(gaps) == 4 and min(gaps) >= 1 / 5 - ARRIVAL_JITTER
+    assert [text for chat_id, text in received if chat_id == 1] == [f'm{number}' for number in range(5)]
+    # Diğer sohbet birinci sohbetin sırasını beklemez
+    assert _arrivals(telegram, 2)[0] < arrivals[1]
+
+def test_global_cap_holds_under_burst():
+    telegram = FakeTelegram()
+    chats = range(1, 61)
+
+    async def scenario(sender):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(sender.send_message(chat_id, 'burst', parse_mode=None) for chat_id in chats))
+        assert all(result['ok'] for result in results)
+        return loop.time() - started
+
+    elapsed = _run(telegram, scenario, global_rate=25, global_burst=5)
+
+    # 5 mesajlık ilk dalgadan sonra saniyede 25
+    assert elapsed >= (len(chats) - 5) / 25 - ARRIVAL_JITTER
+    assert send_rate_report(telegram.deliveries)['global'] <= 30
+    assert send_rate_report(telegram.deliveries, window=0.5)['global'] <= 5 + 25 * 0.5
+
+def test_flood_limit_requeues_after_retry_after():
+    telegram = FloodingTelegram({7})
+
+    async def scenario(sender):
+        flooded = asyncio.create_task(sender.send_message(7, 'late', parse_mode=None))
+        await asyncio.sleep(0.05)
+        other = await sender.send_message(8, 'on time', parse_mode=None)
+        assert other['ok'] and not flooded.done()
+
+        result = await flooded
+        assert result['ok']
+        assert sender.retried == 1
+
+    _run(telegram, scenario)
+
+    first, retry = _arrivals(telegram, 7)
+    assert retry - first >= 1 - ARRIVAL_JITTER
+    # 429 yalnızca o sohbeti bekletir
+    assert _arrivals(telegram, 8)[0] - first < 0.5
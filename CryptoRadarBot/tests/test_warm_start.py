@@ -0,0 +1,81 @@
+"""
+Sıcak başlangıç testleri
+Checkpoint round trip through disk, and rejection of stale or foreign-format files
+"""
+
+import json
+import time
+
+import numpy as np
+
+import crypto_api
+from cache import make_cache_key
+from config import STALE_MAX_AGE
+from market_snapshot import MarketSnapshot, get_snapshot, set_snapshot
+from warm_start import collect_checkpoint, restore_checkpoint, write_checkpoint
+
+COINS = [
+    {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'current_price': 67000.0,
+     'price_change_percentage_1h_in_currency': 0.4, 'total_volume': 3e10, 'market_cap_rank': 1},
+    {'id': 'ethereum', 'symbol': 'eth', 'name': 'Ethereum', 'current_price': 3500.0,
+     'price_change_percentage_1h_in_currency': None, 'total_volume': 1e10, 'market_cap_rank': 2}
+]
+PARAMS = {'ids': 'bitcoin', 'vs_currencies': 'usd'}
+
+def _checkpoint(tmp_path, **meta_changes) -> str:
+    """Canlı anlık görüntüyü ve bir yanıtı diske yazar, ardından bellekteki durumu siler"""
+    set_snapshot(MarketSnapshot.from_markets(COINS, 32.5, time.time(), 7))
+    crypto_api._last_good.set(make_cache_key('simple/price', PARAMS), {'bitcoin': {'usd': 67000.0}}, 60)
+
+    arrays = collect_checkpoint()
+    if meta_changes:
+        meta = json.loads(str(arrays['meta']))
+        meta['snapshot'].update(meta_changes.pop('snapshot', {}))
+        meta.update(meta_changes)
+        arrays['meta'] = np.array(json.dumps(meta))
+
+    path = str(tmp_path / 'warm_start.npz')
+    write_checkpoint(arrays, path)
+    set_snapshot(None)
+    crypto_api._last_good.clear()
+    return path
+
+def test_round_trip_restores_columns_ids_and_responses(tmp_path):
+    original = MarketSnapshot.from_markets(COINS, 32.5, time.time(), 7)
+    try:
+        assert restore_checkpoint(_checkpoint(tmp_path))
+        restored = get_snapshot(STALE_MAX_AGE)
+
+        assert restored is not None and restored.restored
+        assert restored.ids == original.ids
+        assert restored.symbols == original.symbols and restored.names == original.names
+        assert restored.columns.keys() == original.columns.keys()
+        for name, column in original.columns.items():
+            np.testing.assert_array_equal(restored.columns[name], column)
+        assert (restored.try_rate, restored.version) == (32.5, 7)
+        assert crypto_api._last_good.get(make_cache_key('simple/price', PARAMS)) == {'bitcoin': {'usd': 67000.0}}
+    finally:
+        set_snapshot(None)
+        crypto_api._last_good.clear()
+
+def test_snapshot_older_than_stale_max_age_is_ignored(tmp_path):
+    path = _checkpoint(tmp_path, snapshot={'updated_at': time.time() - STALE_MAX_AGE - 60})
+    try:
+        assert restore_checkpoint(path)
+        assert get_snapshot(float('inf')) is None
+    finally:
+        set_snapshot(None)
+        crypto_api._last_good.clear()
+
+def test_foreign_format_is_ignored(tmp_path):
+    path = _checkpoint(tmp_path, format=0)
+    try:
+        assert not restore_checkpoint(path)
+        assert get_snapshot(float('inf')) is None
+        assert len(crypto_api._last_good) == 0
+    finally:
+        set_snapshot(None)
+        crypto_api._last_good.clear()
+
+def test_missing_checkpoint_is_ignored(tmp_path):
+    assert not restore_checkpoint(str(tmp_path / 'missing.npz'))
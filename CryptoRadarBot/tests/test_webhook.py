@@ -0,0 +1,50 @@
+"""
+WebhookServer testleri
+Lane capacity must push back to the bounded webhook queue and out to Telegram as HTTP 503
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from lanes import UserLaneProcessor
+from webhook import WebhookServer
+from test_lanes import _consume
+
+def test_full_lanes_turn_into_503():
+    async def scenario():
+        processor = UserLaneProcessor(concurrency=4, max_pending=1, rate=None)
+        update_queue = asyncio.Queue()
+        release = asyncio.Event()
+        consumer = asyncio.create_task(_consume(processor, update_queue, release))
+
+        async def process(data):
+            update = SimpleNamespace(effective_user=SimpleNamespace(id=data['update_id']))
+            await processor.enqueue(update, update_queue)
+
+        server = WebhookServer(process, secret='', host='127.0.0.1', port=0, queue_size=1, workers=1)
+        await server.start()
+        client = TestClient(TestServer(server.build_app()))
+        await client.start_server()
+        try:
+            statuses = []
+            for update_id in range(1, 5):
+                response = await client.post(server.path, json={'update_id': update_id})
+                statuses.append(response.status)
+                await asyncio.sleep(0.02)
+
+            # 1 şeritte işleniyor, 2 işçide yer bekliyor, 3 webhook kuyruğunda, 4 geri çevrilir
+            assert statuses == [200, 200, 200, 503]
+            assert server.rejected == 1
+
+            release.set()
+            await asyncio.wait_for(server.queue.join(), 1)
+        finally:
+            await client.close()
+            await server.stop()
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            await processor.shutdown()
+
+    asyncio.run(scenario())
@@ -4,8 +4,19 @@ Utility functions for formatting and data processing
 """
 
 import re
-from typing import Dict, Optional
-from config import CRYPTO_ALIASES
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from config import CRYPTO_ALIASES, RENDER_CACHE_SIZE, RENDER_CACHE_TTL, STALE_NOTICE_AGE
+from coin_index import get_index
+from cache import TTLCache
+
+# Girdi temizleme ve sorgu doğrulama kalıpları
+_INPUT_JUNK = re.compile(r'[^\w\s.-]')
+_COIN_QUERY = re.compile(r'^[a-zA-Z][a-zA-Z0-9\-]*$')
+
+# Veri kuşağına göre anahtarlanmış hazır mesajlar
+_render_cache = TTLCache(RENDER_CACHE_SIZE, RENDER_CACHE_TTL)
 
 def format_price(price: float, currency: str = "USD") -> str:
     """Fiyatı formatlar"""
@@ -52,16 +63,92 @@ def get_coin_id(user_input: str) -> Optional[str]:
     if user_input in CRYPTO_ALIASES:
         return CRYPTO_ALIASES[user_input]
     
-    # Kısmi eşleşme kontrolü
-    for alias, coin_id in CRYPTO_ALIASES.items():
-        if user_input in alias or alias in user_input:
-            return coin_id
+    # İndeksten tam, önek ve bulanık eşleşme
+    coin_id = get_index().resolve(user_input)
+    if coin_id:
+        return coin_id
     
     # Eğer bulunamazsa, orijinal girdiyi döndür
     return user_input
 
-def create_price_message(coin_data: Dict, coin_name: str) -> str:
+def match_coin_id(text: str) -> Optional[str]:
+    """Serbest metin için coin ID'si: alias ya da id/isimle tam eşleşme, yoksa None"""
+    text = text.lower().strip()
+    
+    if text in CRYPTO_ALIASES:
+        return CRYPTO_ALIASES[text]
+    
+    # Sohbetteki sıradan kelimeler önek/bulanık eşleşmeyle ("selam" -> selamcoin)
+    # ya da başka bir coinin sembolüyle ("the" -> thena) fiyat sorgusuna dönüşmesin
+    return get_index().resolve_exact(text, symbols=False)
+
+def coin_timestamp(coin: Dict) -> Optional[float]:
+    """Verinin kaynaktaki zamanı: last_updated_at (epoch) veya last_updated (ISO 8601)"""
+    value = coin.get('last_updated_at')
+    if value:
+        return float(value)
+    text = coin.get('last_updated')
+    if text:
+        try:
+            return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+def data_timestamp(coins_data: list) -> Optional[float]:
+    """Listedeki en eski verinin zamanı"""
+    timestamps = [ts for ts in map(coin_timestamp, coins_data) if ts]
+    return min(timestamps) if timestamps else None
+
+def is_stale(timestamp: Optional[float]) -> bool:
+    """Veri "Şimdi" denemeyecek kadar eski mi (kaynak yanıt vermezken son bilinen değer)"""
+    return bool(timestamp) and time.time() - timestamp > STALE_NOTICE_AGE
+
+def format_updated(timestamp: Optional[float]) -> str:
+    """Güncelleme satırı: taze veride "Şimdi", eskisinde verinin zamanı"""
+    if not is_stale(timestamp):
+        return "🕐 _Güncelleme: Şimdi_"
+    when = time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))
+    return f"🕐 _Son bilinen veri: {when} itibarıyla_"
+
+def _data_version(coins_data: list) -> Optional[int]:
+    """Liste satırlarının ortak veri kuşağını döndürür (anlık görüntüden gelmiyorsa None)"""
+    versions = {coin.get('last_updated_at') for coin in coins_data}
+    if len(versions) != 1:
+        return None
+    return versions.pop()
+
+def _list_cache_key(template: str, title: str, coins_data: list) -> Optional[Tuple]:
+    """Liste mesajları için önbellek anahtarı: şablon, başlık, coinler ve veri kuşağı"""
+    version = _data_version(coins_data) if coins_data else None
+    if version is None:
+        return None
+    # Veri eskiyince aynı kuşak "Şimdi" yerine veri zamanıyla yeniden üretilir
+    return (template, title, tuple(coin.get('id') for coin in coins_data), version, is_stale(version))
+
+def render_cached(key: Optional[Tuple], render: Callable[[], str]) -> str:
+    """Aynı anahtar (şablon, coin, veri kuşağı) için daha önce üretilmiş mesajı döndürür"""
+    if key is None:
+        return render()
+
+    message = _render_cache.get(key)
+    if message is None:
+        message = render()
+        _render_cache.set(key, message)
+    return message
+
+def get_render_cache_stats() -> Dict:
+    """Mesaj önbelleği istatistiklerini döndürür"""
+    return _render_cache.stats()
+
+def create_price_message(coin_data: Dict, coin_name: str, coin_id: Optional[str] = None) -> str:
     """Fiyat mesajı oluşturur"""
+    version = coin_data.get('last_updated_at')
+    key = ('price', coin_name, coin_id, version, is_stale(version)) if coin_id and version else None
+    return render_cached(key, lambda: _render_price_message(coin_data, coin_name))
+
+def _render_price_message(coin_data: Dict, coin_name: str) -> str:
+    """Fiyat mesajını üretir"""
     try:
         usd_price = coin_data.get('usd', 0)
         try_price = coin_data.get('try', 0)
@@ -69,60 +156,136 @@ def create_price_message(coin_data: Dict, coin_name: str) -> str:
         market_cap = coin_data.get('usd_market_cap', 0)
         volume_24h = coin_data.get('usd_24h_vol', 0)
         
-        message = f"💰 **{coin_name.upper()} Fiyat Bilgileri**\n\n"
-        message += f"💵 **Fiyat:** {format_price(usd_price, 'USD')}\n"
+        lines = [
+            f"💰 **{coin_name.upper()} Fiyat Bilgileri**",
+            "",
+            f"💵 **Fiyat:** {format_price(usd_price, 'USD')}"
+        ]
         
         if try_price:
-            message += f"🇹🇷 **TL:** {format_price(try_price, 'TRY')}\n"
+            lines.append(f"🇹🇷 **TL:** {format_price(try_price, 'TRY')}")
         
-        message += f"📊 **24s Değişim:** {format_percentage(change_24h)}\n"
+        lines.append(f"📊 **24s Değişim:** {format_percentage(change_24h)}")
         
         if market_cap:
-            message += f"🏪 **Piyasa Değeri:** {format_market_cap(market_cap)}\n"
+            lines.append(f"🏪 **Piyasa Değeri:** {format_market_cap(market_cap)}")
         
         if volume_24h:
-            message += f"📈 **24s Hacim:** {format_volume(volume_24h)}\n"
+            lines.append(f"📈 **24s Hacim:** {format_volume(volume_24h)}")
         
-        message += f"\n🕐 _Güncelleme: Şimdi_"
+        lines.append("")
+        lines.append(format_updated(coin_timestamp(coin_data)))
         
-        return message
+        return "\n".join(lines)
         
     except Exception as e:
         return f"❌ Fiyat bilgileri formatlanırken hata oluştu: {str(e)}"
 
 def create_top_coins_message(coins_data: list) -> str:
     """Top 10 kripto para mesajı oluşturur"""
+    key = _list_cache_key('top', '', coins_data)
+    return render_cached(key, lambda: _render_top_coins_message(coins_data))
+
+def _render_top_coins_message(coins_data: list) -> str:
+    """Top 10 mesajını üretir"""
     try:
-        message = "🏆 **Top 10 Kripto Para**\n\n"
+        parts = ["🏆 **Top 10 Kripto Para**\n\n"]
         
         for i, coin in enumerate(coins_data, 1):
             name = coin.get('name', 'Bilinmeyen')
             symbol = coin.get('symbol', '').upper()
-            price = coin.get('current_price', 0)
-            change_24h = coin.get('price_change_percentage_24h', 0)
+            price = coin.get('current_price') or 0
+            change_24h = coin.get('price_change_percentage_24h') or 0
             
             change_emoji = "📈" if change_24h > 0 else "📉" if change_24h < 0 else "➡️"
             
-            message += f"{i}. **{name} ({symbol})**\n"
-            message += f"   💰 {format_price(price, 'USD')} "
-            message += f"{change_emoji} %{change_24h:.2f}\n\n"
+            parts.append(
+                f"{i}. **{name} ({symbol})**\n"
+                f"   💰 {format_price(price, 'USD')} {change_emoji} %{change_24h:.2f}\n\n"
+            )
         
-        message += "🕐 _Güncelleme: Şimdi_"
-        return message
+        parts.append(format_updated(data_timestamp(coins_data)))
+        return "".join(parts)
         
     except Exception as e:
         return f"❌ Top 10 listesi formatlanırken hata oluştu: {str(e)}"
 
+def create_movers_message(coins_data: list, title: str, window: str = '1h') -> str:
+    """Yükselen/düşen coin listesi mesajı oluşturur"""
+    key = _list_cache_key(f'movers_{window}', title, coins_data)
+    return render_cached(key, lambda: _render_movers_message(coins_data, title, window))
+
+def _render_movers_message(coins_data: list, title: str, window: str) -> str:
+    """Yükselen/düşen listesi mesajını üretir"""
+    try:
+        change_key = f'price_change_percentage_{window}_in_currency'
+        lines = [title, ""]
+        
+        for i, coin in enumerate(coins_data, 1):
+            symbol = coin.get('symbol', '').upper()
+            change = round(coin.get(change_key) or 0, 2)
+            price = round(coin.get('current_price') or 0, 4)
+            sign = "+" if change >= 0 else ""
+            lines.append(f"{i}. **{symbol}**: {sign}%{change} | ${price}")
+        
+        lines.append("")
+        lines.append(format_updated(data_timestamp(coins_data)))
+        return "\n".join(lines)
+        
+    except Exception as e:
+        return f"❌ Liste formatlanırken hata oluştu: {str(e)}"
+
+def create_volume_leaders_message(coins_data: list) -> str:
+    """24 saatlik hacim liderleri mesajı oluşturur"""
+    key = _list_cache_key('volume', '', coins_data)
+    return render_cached(key, lambda: _render_volume_leaders_message(coins_data))
+
+def _render_volume_leaders_message(coins_data: list) -> str:
+    """Hacim liderleri mesajını üretir"""
+    try:
+        lines = ["💹 **24 Saatlik Hacim Liderleri**", ""]
+        
+        for i, coin in enumerate(coins_data, 1):
+            symbol = coin.get('symbol', '').upper()
+            volume = coin.get('total_volume') or 0
+            price = coin.get('current_price') or 0
+            lines.append(f"{i}. **{symbol}**: {format_volume(volume)} | {format_price(price, 'USD')}")
+        
+        lines.append("")
+        lines.append(format_updated(data_timestamp(coins_data)))
+        return "\n".join(lines)
+        
+    except Exception as e:
+        return f"❌ Hacim listesi formatlanırken hata oluştu: {str(e)}"
+
+def create_history_message(coin_name: str, period: str, summary: Dict) -> str:
+    """Fiyat geçmişi özeti mesajı oluşturur"""
+    try:
+        since = time.strftime('%d.%m.%Y %H:%M', time.localtime(summary['start']))
+        lines = [
+            f"📜 **{coin_name.upper()} - Son {period} Fiyat Geçmişi**",
+            "",
+            f"🟢 **Açılış:** {format_price(summary['open'], 'USD')}",
+            f"🔴 **Kapanış:** {format_price(summary['close'], 'USD')}",
+            f"⬆️ **En Yüksek:** {format_price(summary['high'], 'USD')}",
+            f"⬇️ **En Düşük:** {format_price(summary['low'], 'USD')}",
+            f"📊 **Değişim:** {format_percentage(summary['change'])}",
+            "",
+            f"🕐 _{since} tarihinden beri {summary['points']} kayıt_"
+        ]
+        return "\n".join(lines)
+        
+    except Exception as e:
+        return f"❌ Geçmiş bilgileri formatlanırken hata oluştu: {str(e)}"
+
 def clean_user_input(text: str) -> str:
     """Kullanıcı girdisini temizler"""
     # Sadece harf, rakam ve bazı özel karakterleri bırak
-    cleaned = re.sub(r'[^\w\s-.]', '', text)
+    cleaned = _INPUT_JUNK.sub('', text)
     return cleaned.strip().lower()
 
-def is_valid_crypto_query(text: str) -> bool:
-    """Geçerli kripto para sorgusu mu kontrol eder"""
-    cleaned = clean_user_input(text)
-    
+def is_valid_crypto_query(cleaned: str) -> bool:
+    """Geçerli kripto para sorgusu mu kontrol eder (girdi clean_user_input'tan geçmiş olmalı)"""
     # En az 2 karakter olmalı
     if len(cleaned) < 2:
         return False
@@ -132,7 +295,7 @@ def is_valid_crypto_query(text: str) -> bool:
         return True
     
     # Kripto para ismi benzeri mi? (harf ve rakam içermeli)
-    if re.match(r'^[a-zA-Z][a-zA-Z0-9\-]*$', cleaned):
+    if _COIN_QUERY.match(cleaned):
         return True
     
     return False
@@ -0,0 +1,140 @@
+"""
+Sıcak başlangıç
+On-disk checkpoint of the market snapshot and last known good API responses,
+restored at boot so the first users are answered locally while data refreshes
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+import numpy as np
+from config import WARM_START_PATH, WARM_START_INTERVAL, STALE_MAX_AGE
+from market_snapshot import MarketSnapshot, get_snapshot, set_snapshot
+from crypto_api import export_responses, import_responses
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+def collect_checkpoint() -> Optional[Dict[str, np.ndarray]]:
+    """Anlık görüntü sütunlarını ve son iyi yanıtları yazılacak dizilere toplar (olay döngüsünde çağrılır)"""
+    snapshot = get_snapshot(STALE_MAX_AGE)
+    responses = export_responses()
+    if snapshot is None and not responses:
+        return None
+
+    meta: Dict = {'format': CHECKPOINT_FORMAT_VERSION, 'saved_at': time.time(), 'responses': responses}
+    arrays = {}
+    if snapshot is not None:
+        meta['snapshot'] = {
+            'try_rate': snapshot.try_rate,
+            'updated_at': snapshot.updated_at,
+            'version': snapshot.version
+        }
+        arrays['ids'] = np.array(snapshot.ids, dtype=np.str_)
+        arrays['symbols'] = np.array(snapshot.symbols, dtype=np.str_)
+        arrays['names'] = np.array(snapshot.names, dtype=np.str_)
+        for name, column in snapshot.columns.items():
+            arrays[f'column_{name}'] = column
+    arrays['meta'] = np.array(json.dumps(meta, separators=(',', ':'), ensure_ascii=False))
+    return arrays
+
+def write_checkpoint(arrays: Dict[str, np.ndarray], path: str = WARM_START_PATH) -> None:
+    """Dizileri sıkıştırmasız .npz olarak atomik yazar (iş parçacığında çalışabilir)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+def restore_checkpoint(path: str = WARM_START_PATH) -> bool:
+    """Kontrol noktasını yükler; canlı anlık görüntü varsa ona dokunmaz"""
+    if not os.path.exists(path):
+        return False
+
+    started = time.perf_counter()
+    try:
+        # allow_pickle=False: dosyadan yalnızca sayı ve metin dizileri okunur
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != CHECKPOINT_FORMAT_VERSION:
+                logger.warning(f"Ignoring warm start checkpoint with format {meta.get('format')}")
+                return False
+
+            info = meta.get('snapshot')
+            restored = None
+            if info and get_snapshot(STALE_MAX_AGE) is None and time.time() - info['updated_at'] <= STALE_MAX_AGE:
+                columns = {
+                    name[len('column_'):]: data[name] for name in data.files if name.startswith('column_')
+                }
+                restored = MarketSnapshot(
+                    data['ids'].tolist(), data['symbols'].tolist(), data['names'].tolist(),
+                    columns, info['try_rate'], info['updated_at'], info['version']
+                )
+                restored.restored = True
+                set_snapshot(restored)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Warm start checkpoint could not be read: {e}")
+        return False
+
+    responses = import_responses(meta.get('responses', []), time.time() - meta['saved_at'])
+    logger.info(
+        f"Warm start: {len(restored) if restored else 0} coins as of "
+        f"{time.strftime('%H:%M:%S', time.localtime(info['updated_at'])) if restored else '-'}, "
+        f"{responses} responses restored in {(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return True
+
+class Checkpointer:
+    """Kontrol noktasını belirli aralıkla (veri değiştiyse) ve kapanışta yazan görev"""
+
+    def __init__(self, path: str = WARM_START_PATH, interval: float = WARM_START_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self._saved_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Yazma döngüsünü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Döngüyü durdurur ve son kontrol noktasını yazar"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save(force=True)
+
+    async def _run(self) -> None:
+        """Ana döngü"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def save(self, force: bool = False) -> None:
+        """Anlık görüntü yenilendiyse (ya da force) kontrol noktasını diske yazar"""
+        snapshot = get_snapshot(STALE_MAX_AGE)
+        version = snapshot.version if snapshot is not None and not snapshot.restored else None
+        if not force and (version is None or version == self._saved_version):
+            return
+
+        started = time.perf_counter()
+        try:
+            arrays = collect_checkpoint()
+            if arrays is None:
+                return
+            await asyncio.to_thread(write_checkpoint, arrays, self.path)
+            self.saves += 1
+            self._saved_version = version
+            logger.debug(f"Warm start checkpoint written in {time.perf_counter() - started:.3f}s")
+        except Exception as e:
+            logger.error(f"Warm start checkpoint failed: {e}")
@@ -0,0 +1,110 @@
+"""
+Webhook sunucusu
+aiohttp webhook server feeding Telegram updates into a bounded worker queue
+"""
+
+import asyncio
+import hmac
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from aiohttp import web
+from config import (
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+class WebhookServer:
+    """Telegram'ın POST ettiği güncellemeleri kuyruğa alıp işçi görevlerle işler"""
+
+    def __init__(self, process: Callable[[Dict], Awaitable], secret: str = WEBHOOK_SECRET,
+                 path: str = WEBHOOK_PATH, host: str = WEBHOOK_LISTEN, port: int = WEBHOOK_PORT,
+                 queue_size: int = WEBHOOK_QUEUE_SIZE, workers: int = WEBHOOK_WORKERS):
+        self.process = process  # ham güncelleme sözlüğünü işleyen fonksiyon
+        self.secret = secret
+        self.path = path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.received = 0
+        self.rejected = 0  # kuyruk dolu olduğu için geri çevrilen güncellemeler
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def build_app(self) -> web.Application:
+        """aiohttp uygulamasını oluşturur"""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def start(self) -> None:
+        """HTTP sunucusunu ve işçi görevleri başlatır"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path} "
+                    f"with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Yeni güncelleme almayı bırakır, kuyruktakileri bitirip işçileri durdurur"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+        if self._tasks:
+            await self.queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Gizli anahtar başlığını sabit sürede karşılaştırır"""
+        if not self.secret:
+            return True
+        token = request.headers.get(SECRET_HEADER, '')
+        return hmac.compare_digest(token.encode(), self.secret.encode())
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Güncellemeyi doğrular ve kuyruğa ekler; işlenmesini beklemeden hemen yanıt verir"""
+        if not self._authorized(request):
+            logger.warning(f"Rejected webhook request with invalid secret from {request.remote}")
+            return web.Response(status=403)
+
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Telegram 2xx dışındaki yanıtlarda güncellemeyi daha sonra yeniden gönderir
+            self.rejected += 1
+            logger.warning("Webhook queue is full, asking Telegram to retry later")
+            return web.Response(status=503)
+
+        self.received += 1
+        return web.Response()
+
+    async def _worker(self) -> None:
+        """Kuyruktaki güncellemeleri sırayla işler"""
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.process(update)
+            except Exception as e:
+                logger.error(f"Error processing webhook update {update.get('update_id')}: {e}")
+            finally:
+                self.queue.task_done()
@@ -6,275 +6,363 @@ Simple Telegram Crypto Bot
 import asyncio
 import aiohttp
 import logging
-import requests
-from config import BOT_TOKEN, COINGECKO_API_BASE
+import time
+from config import (
+    BOT_TOKEN,
+    CRYPTO_ALIASES,
+    LOOP_DEBUG,
+    TELEGRAM_API_BASE,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    DROP_PENDING_UPDATES,
+    UPDATE_CONCURRENCY,
+    UPDATE_MAX_PENDING,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL
+)
+from crypto_api import get_crypto_api, close_crypto_api
+from loop_monitor import LoopBlockMonitor
+from market_snapshot import MarketPoller
+from warm_start import Checkpointer, restore_checkpoint
+from webhook import WebhookServer
+from lanes import KeyedLanes
+from telegram_sender import TelegramSender
+from utils import coin_timestamp, data_timestamp, format_updated, is_stale
 
 # Simple logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+WELCOME_TEXT = """
+🔍 **Kripto Radar Botu'na hoş geldin!** 🚀
+
+Bu bot ile kripto para fiyatlarını takip edebilirsin:
+
+📊 **Komutlar:**
+• `/fiyat bitcoin` - Bitcoin fiyatını öğren
+• `/btc` - Bitcoin fiyatı
+• `/eth` - Ethereum fiyatı
+• `/yukselenler` - En çok yükselen 5 coin
+• `/help` - Yardım menüsü
+
+💡 **İpucu:** Sadece kripto para ismini yazarak da fiyat öğrenebilirsin!
+                """
+
+HELP_TEXT = """
+🆘 **Yardım Menüsü**
+
+**Kullanılabilir Komutlar:**
+🏠 `/start` - Botu yeniden başlat
+📊 `/fiyat <coin>` - Kripto para fiyatını öğren
+₿ `/btc` - Bitcoin fiyatı
+⟠ `/eth` - Ethereum fiyatı
+🚀 `/yukselenler` - En çok yükselen 5 coin
+
+**Örnek Kullanım:**
+• `bitcoin` veya `btc`
+• `/fiyat ethereum`
+                """
+
+def format_price_details(title, price_data):
+    """Build the price reply for /btc, /eth and /fiyat"""
+    usd_price = price_data.get('usd', 0)
+    try_price = price_data.get('try', 0)
+    change_24h = price_data.get('usd_24h_change', 0)
+    try_line = f"🇹🇷 **TL:** ₺{try_price:,.2f}\n" if try_price else ""
+    
+    return (
+        f"💰 **{title} Fiyat Bilgileri**\n\n"
+        f"💵 **Fiyat:** ${usd_price:,.2f}\n"
+        f"{try_line}"
+        f"📊 **24s Değişim:** %{change_24h:.2f}\n"
+        f"\n{format_updated(coin_timestamp(price_data))}"
+    )
+
+def format_gainers(gainers, title, english=False):
+    """Build the top gainers list reply"""
+    rows = "".join(
+        f"{i}. **{coin['symbol'].upper()}**: "
+        f"{_format_change(coin.get('price_change_percentage_1h_in_currency') or 0, english)}"
+        f" | ${coin['current_price']:.4f}\n"
+        for i, coin in enumerate(gainers, 1)
+    )
+    return f"{title}\n\n{rows}\n{_format_updated(data_timestamp(gainers), english)}"
+
+def _format_updated(timestamp, english):
+    """Footer from the data time, so last-good or restored data is not labelled as current"""
+    if not english:
+        return format_updated(timestamp)
+    if not is_stale(timestamp):
+        return "🕐 _Updated: Now_"
+    when = time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))
+    return f"🕐 _Last known data as of {when}_"
+
+def _format_change(change, english):
+    """Percent sign goes after the number in English, before it in Turkish"""
+    return f"+{change:.2f}%" if english else f"+%{change:.2f}"
+
 class SimpleCryptoBot:
     def __init__(self, token):
         self.token = token
-        self.api_url = f"https://api.telegram.org/bot{token}"
+        self.api_url = f"{TELEGRAM_API_BASE}{token}"
         self.offset = 0
+        self.session = None
+        self.lanes = None
+        self.sender = TelegramSender(self.api_url)
+        self.commands = self._build_commands()
+    
+    async def _get_session(self):
+        """Return the persistent HTTP session used for Telegram"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+    
+    def _get_lanes(self):
+        """Return the per-chat lanes that process updates concurrently"""
+        if self.lanes is None:
+            self.lanes = KeyedLanes(self.process_update, UPDATE_CONCURRENCY, UPDATE_MAX_PENDING)
+        return self.lanes
+    
+    async def close(self):
+        """Drain pending updates and close the persistent HTTP session"""
+        if self.lanes:
+            try:
+                await self.lanes.join(timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self.lanes.pending} pending updates on shutdown")
+            await self.lanes.close()
+            self.lanes = None
         
-    async def send_message(self, chat_id, text):
-        """Send message to Telegram"""
-        url = f"{self.api_url}/sendMessage"
-        data = {
-            'chat_id': chat_id,
-            'text': text,
-            'parse_mode': 'Markdown'
-        }
+        await self.sender.stop()
+        
+        if self.session:
+            await self.session.close()
+            self.session = None
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data) as response:
-                return await response.json()
+    async def send_message(self, chat_id, text):
+        """Send message to Telegram through the rate-limited send queue"""
+        return await self.sender.send_message(chat_id, text)
     
-    def get_crypto_price(self, coin_id):
+    async def get_crypto_price(self, coin_id):
         """Get cryptocurrency price"""
         try:
-            url = f"{COINGECKO_API_BASE}/simple/price"
-            params = {
-                'ids': coin_id,
-                'vs_currencies': 'usd,try',
-                'include_24hr_change': 'true'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if coin_id in data:
-                return data[coin_id]
-            return None
+            api = await get_crypto_api()
+            return await api.get_coin_price(coin_id)
             
         except Exception as e:
             logger.error(f"Error fetching price: {e}")
             return None
     
-    def get_top_gainers(self):
+    async def get_top_gainers(self):
         """Get top gaining cryptocurrencies"""
         try:
-            url = f"{COINGECKO_API_BASE}/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'order': 'market_cap_desc',
-                'per_page': 50,
-                'page': 1,
-                'price_change_percentage': '1h'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            # Sort by 1h change and get top 5
-            sorted_coins = sorted(data, key=lambda x: x.get('price_change_percentage_1h_in_currency', 0), reverse=True)[:5]
-            return sorted_coins
+            api = await get_crypto_api()
+            return await api.get_top_gainers('1h', 5)
             
         except Exception as e:
             logger.error(f"Error fetching top gainers: {e}")
             return None
     
+    def _build_commands(self):
+        """Command name -> handler dispatch table"""
+        return {
+            'start': self.cmd_start,
+            'help': self.cmd_help,
+            'btc': self.cmd_btc,
+            'eth': self.cmd_eth,
+            'yukselenler': self.cmd_gainers,
+            'topgainers': self.cmd_topgainers,
+            'fiyat': self.cmd_price
+        }
+    
     async def handle_message(self, message):
         """Handle incoming messages"""
         chat_id = message['chat']['id']
         text = message.get('text', '').strip().lower()
         
         try:
-            if text.startswith('/start'):
-                welcome_text = """
-🔍 **Kripto Radar Botu'na hoş geldin!** 🚀
-
-Bu bot ile kripto para fiyatlarını takip edebilirsin:
-
-📊 **Komutlar:**
-• `/fiyat bitcoin` - Bitcoin fiyatını öğren
-• `/btc` - Bitcoin fiyatı
-• `/eth` - Ethereum fiyatı
-• `/yukselenler` - En çok yükselen 5 coin
-• `/help` - Yardım menüsü
-
-💡 **İpucu:** Sadece kripto para ismini yazarak da fiyat öğrenebilirsin!
-                """
-                await self.send_message(chat_id, welcome_text)
-                
-            elif text.startswith('/help'):
-                help_text = """
-🆘 **Yardım Menüsü**
-
-**Kullanılabilir Komutlar:**
-🏠 `/start` - Botu yeniden başlat
-📊 `/fiyat <coin>` - Kripto para fiyatını öğren
-₿ `/btc` - Bitcoin fiyatı
-⟠ `/eth` - Ethereum fiyatı
-🚀 `/yukselenler` - En çok yükselen 5 coin
-
-**Örnek Kullanım:**
-• `bitcoin` veya `btc`
-• `/fiyat ethereum`
-                """
-                await self.send_message(chat_id, help_text)
-                
-            elif text.startswith('/btc'):
-                price_data = self.get_crypto_price('bitcoin')
-                if price_data:
-                    usd_price = price_data.get('usd', 0)
-                    try_price = price_data.get('try', 0)
-                    change_24h = price_data.get('usd_24h_change', 0)
-                    
-                    message_text = f"💰 **Bitcoin (BTC) Fiyat Bilgileri**\n\n"
-                    message_text += f"💵 **Fiyat:** ${usd_price:,.2f}\n"
-                    if try_price:
-                        message_text += f"🇹🇷 **TL:** ₺{try_price:,.2f}\n"
-                    message_text += f"📊 **24s Değişim:** %{change_24h:.2f}\n"
-                    message_text += f"\n🕐 _Güncelleme: Şimdi_"
-                    
-                    await self.send_message(chat_id, message_text)
-                else:
-                    await self.send_message(chat_id, "❌ Bitcoin fiyatı alınamadı, lütfen daha sonra tekrar deneyin.")
-                    
-            elif text.startswith('/eth'):
-                price_data = self.get_crypto_price('ethereum')
-                if price_data:
-                    usd_price = price_data.get('usd', 0)
-                    try_price = price_data.get('try', 0)
-                    change_24h = price_data.get('usd_24h_change', 0)
-                    
-                    message_text = f"💰 **Ethereum (ETH) Fiyat Bilgileri**\n\n"
-                    message_text += f"💵 **Fiyat:** ${usd_price:,.2f}\n"
-                    if try_price:
-                        message_text += f"🇹🇷 **TL:** ₺{try_price:,.2f}\n"
-                    message_text += f"📊 **24s Değişim:** %{change_24h:.2f}\n"
-                    message_text += f"\n🕐 _Güncelleme: Şimdi_"
-                    
-                    await self.send_message(chat_id, message_text)
-                else:
-                    await self.send_message(chat_id, "❌ Ethereum fiyatı alınamadı, lütfen daha sonra tekrar deneyin.")
-                    
-            elif text.startswith('/yukselenler'):
-                gainers = self.get_top_gainers()
-                if gainers:
-                    message_text = "🚀 **Son 1 Saatte En Çok Yükselen 5 Coin:**\n\n"
-                    for i, coin in enumerate(gainers, 1):
-                        symbol = coin['symbol'].upper()
-                        change = coin.get('price_change_percentage_1h_in_currency', 0)
-                        price = coin['current_price']
-                        message_text += f"{i}. **{symbol}**: +%{change:.2f} | ${price:.4f}\n"
-                    
-                    message_text += f"\n🕐 _Güncelleme: Şimdi_"
-                    await self.send_message(chat_id, message_text)
-                else:
-                    await self.send_message(chat_id, "❌ Yükselen coinler listesi alınamadı, lütfen daha sonra tekrar deneyin.")
-                    
-            elif text.startswith('/topgainers'):
-                gainers = self.get_top_gainers()
-                if gainers:
-                    message_text = "🚀 **Top 5 Gaining Coins in Last Hour:**\n\n"
-                    for i, coin in enumerate(gainers, 1):
-                        symbol = coin['symbol'].upper()
-                        change = coin.get('price_change_percentage_1h_in_currency', 0)
-                        price = coin['current_price']
-                        message_text += f"{i}. **{symbol}**: +{change:.2f}% | ${price:.4f}\n"
-                    
-                    message_text += f"\n🕐 _Updated: Now_"
-                    await self.send_message(chat_id, message_text)
-                else:
-                    await self.send_message(chat_id, "❌ Could not fetch top gainers list, please try again later.")
-                    
-            elif text.startswith('/fiyat '):
-                coin_name = text.replace('/fiyat ', '').strip()
-                # Simple coin mapping
-                coin_map = {
-                    'bitcoin': 'bitcoin', 'btc': 'bitcoin',
-                    'ethereum': 'ethereum', 'eth': 'ethereum',
-                    'binance': 'binancecoin', 'bnb': 'binancecoin'
-                }
-                
-                coin_id = coin_map.get(coin_name, coin_name)
-                price_data = self.get_crypto_price(coin_id)
-                
-                if price_data:
-                    usd_price = price_data.get('usd', 0)
-                    try_price = price_data.get('try', 0)
-                    change_24h = price_data.get('usd_24h_change', 0)
-                    
-                    message_text = f"💰 **{coin_name.upper()} Fiyat Bilgileri**\n\n"
-                    message_text += f"💵 **Fiyat:** ${usd_price:,.2f}\n"
-                    if try_price:
-                        message_text += f"🇹🇷 **TL:** ₺{try_price:,.2f}\n"
-                    message_text += f"📊 **24s Değişim:** %{change_24h:.2f}\n"
-                    message_text += f"\n🕐 _Güncelleme: Şimdi_"
-                    
-                    await self.send_message(chat_id, message_text)
-                else:
-                    await self.send_message(chat_id, f"❌ '{coin_name}' bulunamadı. Desteklenen coinler: bitcoin, ethereum, binance")
-                    
+            if text.startswith('/'):
+                # "/command@botname args" -> "command", "args"
+                command, _, args = text.partition(' ')
+                handler = self.commands.get(command[1:].partition('@')[0])
+                if handler:
+                    await handler(chat_id, args.strip())
             else:
-                # Check if it's a simple coin name
-                coin_map = {
-                    'bitcoin': 'bitcoin', 'btc': 'bitcoin',
-                    'ethereum': 'ethereum', 'eth': 'ethereum'
-                }
-                
-                if text in coin_map:
-                    coin_id = coin_map[text]
-                    price_data = self.get_crypto_price(coin_id)
-                    
-                    if price_data:
-                        usd_price = price_data.get('usd', 0)
-                        change_24h = price_data.get('usd_24h_change', 0)
-                        
-                        message_text = f"💰 **{text.upper()} Fiyat:** ${usd_price:,.2f}\n"
-                        message_text += f"📊 **24s Değişim:** %{change_24h:.2f}"
-                        
-                        await self.send_message(chat_id, message_text)
+                await self.handle_text(chat_id, text)
                 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
             await self.send_message(chat_id, "⚠️ Bir hata oluştu, lütfen daha sonra tekrar deneyin.")
     
+    async def cmd_start(self, chat_id, args):
+        await self.send_message(chat_id, WELCOME_TEXT)
+    
+    async def cmd_help(self, chat_id, args):
+        await self.send_message(chat_id, HELP_TEXT)
+    
+    async def cmd_btc(self, chat_id, args):
+        price_data = await self.get_crypto_price('bitcoin')
+        if price_data:
+            await self.send_message(chat_id, format_price_details("Bitcoin (BTC)", price_data))
+        else:
+            await self.send_message(chat_id, "❌ Bitcoin fiyatı alınamadı, lütfen daha sonra tekrar deneyin.")
+    
+    async def cmd_eth(self, chat_id, args):
+        price_data = await self.get_crypto_price('ethereum')
+        if price_data:
+            await self.send_message(chat_id, format_price_details("Ethereum (ETH)", price_data))
+        else:
+            await self.send_message(chat_id, "❌ Ethereum fiyatı alınamadı, lütfen daha sonra tekrar deneyin.")
+    
+    async def cmd_gainers(self, chat_id, args):
+        gainers = await self.get_top_gainers()
+        if gainers:
+            await self.send_message(
+                chat_id,
+                format_gainers(gainers, "🚀 **Son 1 Saatte En Çok Yükselen 5 Coin:**")
+            )
+        else:
+            await self.send_message(chat_id, "❌ Yükselen coinler listesi alınamadı, lütfen daha sonra tekrar deneyin.")
+    
+    async def cmd_topgainers(self, chat_id, args):
+        gainers = await self.get_top_gainers()
+        if gainers:
+            await self.send_message(
+                chat_id,
+                format_gainers(gainers, "🚀 **Top 5 Gaining Coins in Last Hour:**", english=True)
+            )
+        else:
+            await self.send_message(chat_id, "❌ Could not fetch top gainers list, please try again later.")
+    
+    async def cmd_price(self, chat_id, coin_name):
+        if not coin_name:
+            return
+        
+        coin_id = CRYPTO_ALIASES.get(coin_name, coin_name)
+        price_data = await self.get_crypto_price(coin_id)
+        
+        if price_data:
+            await self.send_message(chat_id, format_price_details(coin_name.upper(), price_data))
+        else:
+            await self.send_message(chat_id, f"❌ '{coin_name}' bulunamadı. Desteklenen coinler: bitcoin, ethereum, binance")
+    
+    async def handle_text(self, chat_id, text):
+        """Reply with a short price line when the text is a known coin name"""
+        coin_id = CRYPTO_ALIASES.get(text)
+        if not coin_id:
+            return
+        
+        price_data = await self.get_crypto_price(coin_id)
+        if price_data:
+            usd_price = price_data.get('usd', 0)
+            change_24h = price_data.get('usd_24h_change', 0)
+            await self.send_message(
+                chat_id,
+                f"💰 **{text.upper()} Fiyat:** ${usd_price:,.2f}\n📊 **24s Değişim:** %{change_24h:.2f}"
+            )
+    
     async def get_updates(self):
         """Get updates from Telegram"""
         url = f"{self.api_url}/getUpdates"
         params = {'offset': self.offset, 'timeout': 30}
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    data = await response.json()
-                    
-                    if data.get('ok'):
-                        return data.get('result', [])
-                    return []
+            session = await self._get_session()
+            async with session.get(url, params=params) as response:
+                data = await response.json()
+                
+                if data.get('ok'):
+                    return data.get('result', [])
+                return []
                     
         except Exception as e:
             logger.error(f"Error getting updates: {e}")
             return []
     
+    async def process_update(self, update):
+        """Handle a single raw update (from getUpdates or the webhook)"""
+        if 'message' in update:
+            await self.handle_message(update['message'])
+    
+    async def dispatch(self, update):
+        """Queue an update on its chat's lane (same chat in order, different chats in parallel)"""
+        chat_id = update.get('message', {}).get('chat', {}).get('id')
+        await self._get_lanes().submit(chat_id, update)
+    
     async def run(self):
         """Main bot loop"""
         logger.info("🚀 Kripto Radar Botu başlatılıyor...")
         
         while True:
             try:
+                # getUpdates long-polls for up to 30 s, so no extra sleep is needed
                 updates = await self.get_updates()
                 
                 for update in updates:
                     self.offset = update['update_id'] + 1
-                    
-                    if 'message' in update:
-                        await self.handle_message(update['message'])
-                
-                await asyncio.sleep(1)
+                    await self.dispatch(update)
                 
             except Exception as e:
                 logger.error(f"Error in main loop: {e}")
                 await asyncio.sleep(5)
+    
+    async def run_webhook(self):
+        """Receive updates through the webhook server instead of polling"""
+        logger.info("🚀 Kripto Radar Botu başlatılıyor (webhook)...")
+        
+        server = WebhookServer(self.dispatch)
+        await server.start()
+        try:
+            if WEBHOOK_URL:
+                session = await self._get_session()
+                data = {'url': f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}", 'drop_pending_updates': DROP_PENDING_UPDATES}
+                if WEBHOOK_SECRET:
+                    data['secret_token'] = WEBHOOK_SECRET
+                async with session.post(f"{self.api_url}/setWebhook", json=data) as response:
+                    logger.info(f"setWebhook: {await response.json()}")
+            
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+async def _run_bot(bot):
+    """Run the bot and release its sessions on exit"""
+    monitor = LoopBlockMonitor() if LOOP_DEBUG else None
+    if monitor:
+        monitor.start()
+    
+    # Answer from the last checkpoint until the first refresh lands
+    restore_checkpoint()
+    checkpointer = Checkpointer()
+    checkpointer.start()
+    
+    poller = MarketPoller(await get_crypto_api())
+    poller.start()
+    
+    try:
+        if BOT_MODE == "webhook":
+            await bot.run_webhook()
+        else:
+            await bot.run()
+    finally:
+        await poller.stop()
+        await checkpointer.stop()
+        if monitor:
+            await monitor.stop()
+        await bot.close()
+        await close_crypto_api()
 
 def main():
     bot = SimpleCryptoBot(BOT_TOKEN)
-    asyncio.run(bot.run())
+    asyncio.run(_run_bot(bot))
 
 if __name__ == "__main__":
     main()